@@ -2,9 +2,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
 from math import erf, exp, sqrt, pi
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from validation.constraints import ConstraintSet
+
 try:  # Lazy import so the scheduler works without the pipeline
     from pipelines.retrain import run as _default_retrain
 except Exception:  # pragma: no cover - pipeline may not be available
@@ -57,6 +60,10 @@ class Scheduler:
     retrain_every:
         Trigger ``retrain_callback`` after this many completed runs. A value of
         ``0`` disables automatic retraining.
+    constraints:
+        Optional hard constraints (e.g. the operating window). Candidates
+        violating any of them are never suggested and runs that break them,
+        or do not report every constrained feature, are refused.
     """
 
     benefit_predictor: BenefitPredictor
@@ -66,6 +73,7 @@ class Scheduler:
     xi: float = 0.01
     retrain_callback: Optional[RetrainCallback] = _default_retrain
     retrain_every: int = 0
+    constraints: Optional[ConstraintSet] = None
     history: List[Dict[str, float]] = field(default_factory=list)
     best_observed: float = float("-inf")
 
@@ -97,11 +105,19 @@ class Scheduler:
         p_safe = self.safety_predictor(features)
         return p_safe * self._base_score(mean, std)
 
+    def feasible(self, candidates: Iterable[Dict[str, float]]) -> List[Dict[str, float]]:
+        """Return the candidates satisfying the hard constraints."""
+        candidates = list(candidates)
+        if self.constraints is None or not candidates:
+            return candidates
+        mask = self.constraints.feasible(candidates)
+        return [cand for cand, ok in zip(candidates, mask) if ok]
+
     def suggest(self, candidates: Iterable[Dict[str, float]]) -> Dict[str, float]:
-        """Return the best candidate according to the acquisition function."""
+        """Return the best feasible candidate according to the acquisition function."""
         best_candidate = None
         best_score = float("-inf")
-        for cand in candidates:
+        for cand in self.feasible(candidates):
             score = self.score(cand)
             if score > best_score:
                 best_score = score
@@ -111,7 +127,17 @@ class Scheduler:
         return best_candidate
 
     def register_run(self, features: Dict[str, float]) -> int:
-        """Log a run and return its identifier."""
+        """Log a run and return its identifier.
+
+        Raises :class:`~validation.runtime_checks.ConstraintViolation` if the
+        features break a constraint or lack a constrained column.
+        """
+        if self.constraints is not None:
+            import pandas as pd
+
+            from validation.runtime_checks import validate_constraints
+
+            validate_constraints(pd.DataFrame([features]), self.constraints)
         self.history.append({"features": features})
         return len(self.history) - 1
 
@@ -1,13 +1,15 @@
 """Endpoints for logging runs and outcomes triggering active learning."""
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, List
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from active_learning.scheduler import Scheduler
 from models.performance.train import train_all
+from validation.constraints import load_operating_window
+from validation.runtime_checks import ConstraintViolation
 
 # ---------------------------------------------------------------------------
 # Predictor connectors
@@ -54,6 +56,9 @@ def _safety_predictor(features: Dict[str, float]) -> float:
 def _retrain_callback(_history):  # pragma: no cover - runtime side effect
     try:
         train_all()
+        from ensemble.performance_predictor import clear_cache
+
+        clear_cache()
     except Exception:
         # Training requires optional dependencies; failures are ignored so the
         # API remains responsive in minimal environments.
@@ -61,7 +66,10 @@ def _retrain_callback(_history):  # pragma: no cover - runtime side effect
 
 
 scheduler = Scheduler(
-    _benefit_predictor, _safety_predictor, retrain_callback=_retrain_callback
+    _benefit_predictor,
+    _safety_predictor,
+    retrain_callback=_retrain_callback,
+    constraints=load_operating_window(),
 )
 
 
@@ -78,11 +86,33 @@ class RunResponse(BaseModel):
 
 @router.post("/runs", response_model=RunResponse)
 def create_run(req: RunRequest):
-    """Register a new run and return its identifier."""
-    run_id = scheduler.register_run(req.features)
+    """Register a new run and return its identifier.
+
+    Runs outside the operating window, or missing one of its features, are
+    refused with 422.
+    """
+    try:
+        run_id = scheduler.register_run(req.features)
+    except ConstraintViolation as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
     return {"run_id": run_id}
 
 
+class SuggestRequest(BaseModel):
+    candidates: List[Dict[str, float]]
+
+
+@router.post("/suggest")
+def suggest_run(req: SuggestRequest):
+    """Return the best candidate inside the operating window."""
+    try:
+        return {"features": scheduler.suggest(req.candidates)}
+    except KeyError as exc:
+        raise HTTPException(status_code=422, detail=str(exc.args[0]))
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc))
+
+
 class OutcomeRequest(BaseModel):
     run_id: int
     outcome: float
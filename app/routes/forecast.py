@@ -1,10 +1,17 @@
 """Endpoints exposing forecasting functionality via the shared API app."""
 from __future__ import annotations
 
+from typing import Dict, Optional
+
+import pandas as pd
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from ensemble.performance_predictor import predict_performance
+from explainability.explainers import explain_performance
+from storage.online_store import resolve_features
+
+FORECAST_FEATURES = ("feature1", "feature2")
 
 router = APIRouter()
 
@@ -14,15 +21,36 @@ class ForecastResponse(BaseModel):
 
     route: str
     forecast: float
+    shap: Optional[Dict[str, float]] = None
 
 
 @router.get("/", response_model=ForecastResponse)
-def get_forecast(route: str, feature1: float, feature2: float, time: float) -> ForecastResponse:
-    """Return the performance forecast for the provided route and features."""
+def get_forecast(
+    route: str,
+    time: float,
+    feature1: Optional[float] = None,
+    feature2: Optional[float] = None,
+    muestra_id: Optional[str] = None,
+    explain: bool = False,
+) -> ForecastResponse:
+    """Return the performance forecast for the provided route and features.
+
+    Features not given explicitly are read from the online feature store
+    for ``muestra_id``. With ``explain`` the response includes exact
+    TreeSHAP attributions of the ensemble for the given features.
+    """
     if time < 0:
         raise HTTPException(status_code=400, detail="time must be non-negative")
 
-    features = {"feature1": feature1, "feature2": feature2}
+    try:
+        resolved = resolve_features(
+            {"feature1": feature1, "feature2": feature2}, muestra_id, required=FORECAST_FEATURES
+        )
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=exc.args[0]) from exc
+    features = {name: float(resolved[name]) for name in FORECAST_FEATURES}
 
     try:
         forecast = predict_performance(route, features, time)
@@ -33,4 +61,12 @@ def get_forecast(route: str, feature1: float, feature2: float, time: float) -> F
     except Exception as exc:  # pragma: no cover - runtime error propagation
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
-    return ForecastResponse(route=route, forecast=float(forecast))
+    shap_values = None
+    if explain:
+        try:
+            attribution = explain_performance(route, pd.DataFrame([features]), time)
+        except Exception as exc:  # pragma: no cover - shap optional dependency
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        shap_values = attribution.as_dicts()[0]
+
+    return ForecastResponse(route=route, forecast=float(forecast), shap=shap_values)
@@ -1,7 +1,8 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
 
+from storage.online_store import resolve_features
 from ..ml import predict_process
 
 router = APIRouter()
@@ -9,6 +10,7 @@ router = APIRouter()
 class PredictionRequest(BaseModel):
     s_sulfuro_pct: Optional[float] = None
     as_ppm: Optional[float] = None
+    muestra_id: Optional[str] = None
 
 class PredictionResponse(BaseModel):
     score: float
@@ -18,6 +20,15 @@ class PredictionResponse(BaseModel):
 def predict_ml(request: PredictionRequest):
     """
     Endpoint to get ML-based recommendation using sulfide and arsenic data.
+    Values not sent are read from the online feature store when
+    ``muestra_id`` is given.
     """
-    result = predict_process(request.s_sulfuro_pct, request.as_ppm)
+    provided = {"s_sulfuro_pct": request.s_sulfuro_pct, "as_ppm": request.as_ppm}
+    features = provided
+    if request.muestra_id is not None:
+        try:
+            features = resolve_features(provided, request.muestra_id)
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+    result = predict_process(features.get("s_sulfuro_pct"), features.get("as_ppm"))
     return result
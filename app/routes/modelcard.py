@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException
 
+from explainability.global_summary import load_global_summary
 from governance.model_cards import load_model_card
 
 router = APIRouter()
@@ -15,3 +16,16 @@ def get_model_card():
         return load_model_card()
     except FileNotFoundError as exc:  # pragma: no cover - runtime error propagation
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@router.get("/explanations/{model_name}")
+def get_global_explanations(model_name: str):
+    """Return the precomputed global SHAP summary of a trained model.
+
+    Summaries are produced during training (e.g. ``performance_route_a`` or
+    ``route_classifier``); nothing is computed at request time.
+    """
+    try:
+        return load_global_summary(model_name)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
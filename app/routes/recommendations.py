@@ -1,34 +1,85 @@
 """Router providing optimisation recommendations."""
 from __future__ import annotations
 
-from typing import Dict
+from contextlib import asynccontextmanager
+from functools import lru_cache, partial
+from typing import AsyncIterator, Dict, List, Optional
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
+from explainability.service import ExplanationService, job_id_for
 from explainability.shap_recipes import shap_for_recommendation
-from optimization.bayes_opt import optimize
-from optimization.objective import objective
+from optimization.bayes_opt import optimize_pareto
+from optimization.objective import (
+    DEFAULT_WEIGHTS,
+    OBJECTIVE_VERSION,
+    objective,
+    objective_batch,
+)
+from optimization.pareto import ParetoFront
+from optimization.study_store import cached_optimize, warm_start_from_history
 
-router = APIRouter()
+from .active_learning import scheduler
+
+# SHAP values are computed in a worker pool and cached per (model, recipe)
+EXPLANATIONS = ExplanationService(
+    partial(shap_for_recommendation, objective, batch_fn=objective_batch)
+)
+
+# Version of the model being explained: the objective function
+MODEL_VERSION = f"objective-v{OBJECTIVE_VERSION}"
+
+
+@asynccontextmanager
+async def lifespan(_app) -> AsyncIterator[None]:
+    """Stop the explanation worker pool on shutdown."""
+    yield
+    EXPLANATIONS.shutdown()
+
+
+router = APIRouter(lifespan=lifespan)
 
 
 class RecommendationResponse(BaseModel):
-    """Response model containing optimisation results."""
+    """Response model containing optimisation results.
+
+    ``shap`` is filled when the explanation is already cached; otherwise poll
+    ``/recommendations/explanations/{explanation_job_id}``.
+    """
 
     params: Dict[str, float]
     score: float
-    shap: Dict[str, float]
+    shap: Optional[Dict[str, float]] = None
+    explanation_job_id: str
+    explanation_status: str
+
+
+class ExplanationResponse(BaseModel):
+    """State of an asynchronous explanation job."""
+
+    job_id: str
+    status: str
+    shap: Optional[Dict[str, float]] = None
+    error: Optional[str] = None
 
 
 @router.get("/", response_model=RecommendationResponse)
-def get_recommendations(n_trials: int = 50) -> RecommendationResponse:
-    """Return recommended parameters and SHAP explanations."""
+def get_recommendations(n_trials: int = 50, warm_start: bool = False) -> RecommendationResponse:
+    """Return recommended parameters and an explanation job.
+
+    The response does not wait for SHAP: the explanation is computed in the
+    background and cached per model version and recipe. The underlying
+    study is persisted, so repeated calls reuse its trials and larger
+    ``n_trials`` only run the missing ones. With ``warm_start`` the
+    runs registered through ``/runs`` and ``/outcomes`` are enqueued first.
+    """
     if n_trials <= 0:
         raise HTTPException(status_code=400, detail="n_trials must be positive")
 
+    warm = warm_start_from_history(scheduler.history) if warm_start else None
     try:
-        study = optimize(n_trials=n_trials)
+        study = cached_optimize(n_trials=n_trials, warm_start=warm)
     except Exception as exc:  # pragma: no cover - runtime failures
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -37,13 +88,84 @@ def get_recommendations(n_trials: int = 50) -> RecommendationResponse:
     if not params or score is None:
         raise HTTPException(status_code=404, detail="No feasible recommendations found")
 
+    params = {k: float(v) for k, v in params.items()}
     try:
-        shap_values = shap_for_recommendation(objective, params)
-    except Exception as exc:  # pragma: no cover - shap optional dependency
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+        job_id = EXPLANATIONS.submit(MODEL_VERSION, params)
+        job = EXPLANATIONS.status(job_id)
+    except Exception:  # pragma: no cover - worker pool failures
+        # The recommendation stands even if its explanation cannot be scheduled
+        job_id = job_id_for(MODEL_VERSION, params)
+        job = {"status": "failed", "shap": None}
 
     return RecommendationResponse(
-        params={k: float(v) for k, v in params.items()},
+        params=params,
         score=float(score),
-        shap={k: float(v) for k, v in shap_values.items()},
+        shap=job["shap"],
+        explanation_job_id=job_id,
+        explanation_status=job["status"],
+    )
+
+
+@router.get("/explanations/{job_id}", response_model=ExplanationResponse)
+def get_explanation(job_id: str) -> ExplanationResponse:
+    """Return the status and, once finished, the SHAP values of a job."""
+    job = EXPLANATIONS.status(job_id)
+    if job["status"] == "unknown":
+        raise HTTPException(status_code=404, detail="Explanation job not found")
+    return ExplanationResponse(job_id=job_id, **job)
+
+
+class ParetoPoint(BaseModel):
+    """A single non-dominated recipe and its objective values."""
+
+    params: Dict[str, float]
+    objectives: Dict[str, float]
+
+
+class ParetoResponse(BaseModel):
+    """Pareto front plus the trade-off selected with the requested weights."""
+
+    front: List[ParetoPoint]
+    hypervolume: float
+    selected: ParetoPoint
+    score: float
+    weights: Dict[str, float]
+
+
+@lru_cache(maxsize=8)
+def _cached_front(n_trials: int) -> ParetoFront:
+    """Compute the Pareto front once per ``n_trials`` and keep it in memory."""
+    return optimize_pareto(n_trials=n_trials)
+
+
+@router.get("/pareto", response_model=ParetoResponse)
+def get_pareto_front(
+    n_trials: int = 100,
+    w_extraction: float = DEFAULT_WEIGHTS["extraction"],
+    w_acid: float = DEFAULT_WEIGHTS["acid"],
+    w_arsenic: float = DEFAULT_WEIGHTS["arsenic"],
+) -> ParetoResponse:
+    """Return the Pareto front and the recipe best matching the given weights.
+
+    The front is cached per ``n_trials`` so changing the weights only
+    re-ranks the stored points instead of running a new study.
+    """
+    if n_trials <= 0:
+        raise HTTPException(status_code=400, detail="n_trials must be positive")
+
+    try:
+        front = _cached_front(n_trials)
+    except Exception as exc:  # pragma: no cover - runtime failures
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if not front.params:
+        raise HTTPException(status_code=404, detail="No feasible recommendations found")
+
+    weights = {"extraction": w_extraction, "acid": w_acid, "arsenic": w_arsenic}
+    params, objectives, score = front.select(weights)
+    return ParetoResponse(
+        front=[ParetoPoint(**record) for record in front.to_records()],
+        hypervolume=front.hypervolume(),
+        selected=ParetoPoint(params=params, objectives=objectives),
+        score=score,
+        weights=weights,
     )
@@ -1,8 +1,13 @@
+from typing import Optional
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from models.route_classifier import predict
 from rules.route_rules import validate_features
+from storage.online_store import resolve_features
+
+ROUTE_FEATURES = ("icp_fe", "icp_s", "pyrite_pct", "calcite_pct", "s_sulf", "anc", "npr")
 
 router = APIRouter()
 
@@ -10,10 +15,16 @@ class RouteResponse(BaseModel):
     route: int
 
 @router.get("/route", response_model=RouteResponse)
-def get_route(icp_fe: float, icp_s: float, pyrite_pct: float, calcite_pct: float,
-              s_sulf: float, anc: float, npr: float):
-    """Predict processing route based on geochemical metrics."""
-    features = {
+def get_route(icp_fe: Optional[float] = None, icp_s: Optional[float] = None,
+              pyrite_pct: Optional[float] = None, calcite_pct: Optional[float] = None,
+              s_sulf: Optional[float] = None, anc: Optional[float] = None,
+              npr: Optional[float] = None, muestra_id: Optional[str] = None):
+    """Predict processing route based on geochemical metrics.
+
+    With ``muestra_id`` the metrics not passed explicitly are read from the
+    online feature store.
+    """
+    provided = {
         "icp_fe": icp_fe,
         "icp_s": icp_s,
         "pyrite_pct": pyrite_pct,
@@ -22,6 +33,13 @@ def get_route(icp_fe: float, icp_s: float, pyrite_pct: float, calcite_pct: float
         "anc": anc,
         "npr": npr,
     }
+    try:
+        resolved = resolve_features(provided, muestra_id, required=ROUTE_FEATURES)
+    except LookupError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=exc.args[0]) from exc
+    features = {name: resolved[name] for name in ROUTE_FEATURES}
     if not validate_features(features):
         raise HTTPException(status_code=400, detail="Invalid input features")
     route = predict(features)
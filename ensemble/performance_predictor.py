@@ -3,8 +3,10 @@ from __future__ import annotations
 
 from pathlib import Path
 import json
-from typing import Dict
+import threading
+from typing import Any, Callable, Dict, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from joblib import load
 
@@ -12,21 +14,73 @@ from physics.simple_kinetics import predict as kinetics_predict
 
 STORAGE_DIR = Path(__file__).resolve().parents[1] / "storage"
 
+# (kind, route) -> (file stamps, loaded artifact)
+_CACHE: Dict[Tuple[str, str], Tuple[Tuple[Tuple[int, int], ...], Any]] = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _cached(kind: str, route: str, paths: Sequence[Path], loader: Callable[[], Any]) -> Any:
+    """Artifact loaded by ``loader``, reloaded when any of ``paths`` changes on disk.
+
+    Files are compared by modification time and size, so models retrained by
+    another process (e.g. ``pipelines.retrain``) are picked up on the next
+    call without restarting this one.
+    """
+    stamp = tuple((p.stat().st_mtime_ns, p.stat().st_size) for p in paths)
+    with _CACHE_LOCK:
+        hit = _CACHE.get((kind, route))
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    value = loader()
+    with _CACHE_LOCK:
+        _CACHE[(kind, route)] = (stamp, value)
+    return value
+
 
 def _load_models(route: str):
     cat_path = STORAGE_DIR / f"performance_{route}_catboost.pkl"
     lgb_path = STORAGE_DIR / f"performance_{route}_lgbm.pkl"
     if not cat_path.exists() or not lgb_path.exists():
         raise FileNotFoundError(f"Models for route '{route}' not found. Train them first.")
-    cat_model = load(cat_path)
-    lgb_model = load(lgb_path)
-    return cat_model, lgb_model
+    return _cached(
+        "models", route, (cat_path, lgb_path), lambda: (load(cat_path), load(lgb_path))
+    )
 
 
 def _load_kinetics(route: str) -> Dict[str, float]:
     path = STORAGE_DIR / f"performance_{route}_kinetics.json"
-    with open(path) as f:
-        return json.load(f)
+
+    def read() -> Dict[str, float]:
+        with open(path) as f:
+            return json.load(f)
+
+    return _cached("kinetics", route, (path,), read)
+
+
+def clear_cache() -> None:
+    """Drop preloaded models so the next prediction reads them from disk again."""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def predict_performance_batch(
+    route: str, features: pd.DataFrame, time: Union[float, np.ndarray]
+) -> np.ndarray:
+    """Predict performance for many rows in a single inference pass.
+
+    Models are loaded once per route and kept in memory until their files
+    change on disk. ``time`` may be a
+    scalar or one value per row of ``features``.
+    """
+    cat_model, lgb_model = _load_models(route)
+    params = _load_kinetics(route)
+
+    ml_pred = 0.5 * (
+        np.asarray(cat_model.predict(features), dtype=float)
+        + np.asarray(lgb_model.predict(features), dtype=float)
+    )
+    phy_pred = kinetics_predict(time, params["k"], params["n"])
+    return (ml_pred + phy_pred) / 2
 
 
 def predict_performance(route: str, features: Dict[str, float], time: float) -> float:
@@ -41,10 +95,5 @@ def predict_performance(route: str, features: Dict[str, float], time: float) ->
     time: float
         Time value for the kinetics prediction.
     """
-    cat_model, lgb_model = _load_models(route)
-    params = _load_kinetics(route)
-
     df = pd.DataFrame([features])
-    ml_pred = 0.5 * (cat_model.predict(df)[0] + lgb_model.predict(df)[0])
-    phy_pred = kinetics_predict(time, params["k"], params["n"])
-    return float((ml_pred + phy_pred) / 2)
+    return float(predict_performance_batch(route, df, time)[0])
@@ -0,0 +1,192 @@
+"""Explainer layer choosing exact TreeSHAP or a KernelSHAP fallback.
+
+Tree ensembles are explained exactly: LightGBM and CatBoost through their
+native TreeSHAP implementations (``pred_contrib`` and ``ShapValues``), which
+need no extra dependency, and scikit-learn trees through
+:class:`shap.TreeExplainer`. Black-box callables fall back to
+:class:`shap.KernelExplainer` over a cached k-means summary of a background
+sample, calling the objective once per batch of perturbations.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BatchFn = Callable[[np.ndarray], np.ndarray]
+
+_TREE_MODULES = ("lightgbm", "catboost", "xgboost", "sklearn.tree", "sklearn.ensemble")
+
+# k-means background summaries keyed by (data hash, n_clusters)
+_BACKGROUND_CACHE: Dict[Tuple[str, int], object] = {}
+
+
+@dataclass
+class Attribution:
+    """SHAP values for a batch of rows.
+
+    ``values`` has one row per explained sample and one column per feature;
+    ``values.sum(axis=1) + base_value`` reproduces the model output.
+    """
+
+    values: np.ndarray
+    base_value: float
+    feature_names: List[str]
+
+    def as_dicts(self) -> List[Dict[str, float]]:
+        """Return one ``{feature: shap}`` mapping per explained row."""
+        return [
+            {name: float(v) for name, v in zip(self.feature_names, row)}
+            for row in self.values
+        ]
+
+    def scaled(self, factor: float) -> "Attribution":
+        return Attribution(self.values * factor, self.base_value * factor, self.feature_names)
+
+    def __add__(self, other: "Attribution") -> "Attribution":
+        if list(other.feature_names) != list(self.feature_names):
+            raise ValueError("Attributions must share the same features")
+        return Attribution(
+            self.values + other.values,
+            self.base_value + other.base_value,
+            self.feature_names,
+        )
+
+
+def is_tree_model(model: object) -> bool:
+    """Return ``True`` for models supported by exact TreeSHAP."""
+    module = type(model).__module__
+    return any(module.startswith(prefix) for prefix in _TREE_MODULES)
+
+
+def _select_output(values: np.ndarray, base, class_index: Optional[int]):
+    """Reduce multi-output SHAP arrays to a single output."""
+    values = np.asarray(values)
+    base = np.atleast_1d(np.asarray(base, dtype=float))
+    if values.ndim == 3:
+        idx = values.shape[2] - 1 if class_index is None else class_index
+        return values[:, :, idx], float(base[idx])
+    return values, float(base[0])
+
+
+def tree_shap(
+    model: object, X: pd.DataFrame, class_index: Optional[int] = None
+) -> Attribution:
+    """Exact TreeSHAP attributions of ``model`` for every row of ``X``.
+
+    For classifiers the attributions of ``class_index`` are returned, by
+    default the last class (the positive class of binary problems).
+    """
+    names = list(X.columns)
+    module = type(model).__module__
+    if module.startswith("lightgbm") and class_index is None:
+        contrib = np.asarray(model.predict(X, pred_contrib=True))
+        if contrib.shape[1] == len(names) + 1:
+            return Attribution(contrib[:, :-1], float(contrib[0, -1]), names)
+    if module.startswith("catboost") and class_index is None:
+        from catboost import Pool  # Lazy import
+
+        contrib = np.asarray(model.get_feature_importance(Pool(X), type="ShapValues"))
+        if contrib.ndim == 2:
+            return Attribution(contrib[:, :-1], float(contrib[0, -1]), names)
+
+    try:  # pragma: no cover - optional dependency
+        import shap
+    except Exception as exc:  # pragma: no cover - shap not installed
+        raise ImportError("shap is required to explain this model") from exc
+    explainer = shap.TreeExplainer(model)
+    raw = explainer.shap_values(X)
+    if isinstance(raw, list):
+        raw = np.stack(raw, axis=-1)
+    values, base = _select_output(raw, explainer.expected_value, class_index)
+    return Attribution(values, base, names)
+
+
+def tree_shap_interactions(
+    model: object, X: pd.DataFrame, class_index: Optional[int] = None
+) -> np.ndarray:
+    """Exact TreeSHAP interaction values with shape ``(n, p, p)``.
+
+    Requires the ``shap`` package; off-diagonal entries hold half of each
+    pairwise interaction effect as returned by :class:`shap.TreeExplainer`.
+    """
+    try:  # pragma: no cover - optional dependency
+        import shap
+    except Exception as exc:  # pragma: no cover - shap not installed
+        raise ImportError("shap is required for interaction values") from exc
+    raw = shap.TreeExplainer(model).shap_interaction_values(X)
+    if isinstance(raw, list):
+        raw = np.stack(raw, axis=-1)
+    raw = np.asarray(raw)
+    if raw.ndim == 4:
+        raw = raw[..., raw.shape[-1] - 1 if class_index is None else class_index]
+    return raw
+
+
+def background_summary(background: np.ndarray, n_clusters: int = 10):
+    """Return a cached k-means summary of ``background`` for KernelSHAP."""
+    import shap  # Lazy import, callers handle the ImportError
+
+    background = np.ascontiguousarray(background, dtype=float)
+    key = (hashlib.sha1(background.tobytes()).hexdigest(), n_clusters)
+    summary = _BACKGROUND_CACHE.get(key)
+    if summary is None:
+        k = min(n_clusters, len(background))
+        summary = shap.kmeans(background, k) if k < len(background) else background
+        _BACKGROUND_CACHE[key] = summary
+    return summary
+
+
+def kernel_shap(
+    batch_fn: BatchFn,
+    X: np.ndarray,
+    feature_names: Sequence[str],
+    background: np.ndarray,
+    n_clusters: int = 10,
+    nsamples: object = "auto",
+) -> Attribution:
+    """Model-agnostic KernelSHAP for black-box objectives.
+
+    ``batch_fn`` receives a ``(n, len(feature_names))`` matrix and must return
+    one output per row; KernelSHAP calls it with whole perturbation batches.
+    """
+    import shap  # Lazy import, callers handle the ImportError
+
+    summary = background_summary(background, n_clusters)
+    explainer = shap.KernelExplainer(batch_fn, summary)
+    values = explainer.shap_values(np.atleast_2d(X), nsamples=nsamples, silent=True)
+    values, base = _select_output(values, explainer.expected_value, None)
+    return Attribution(np.atleast_2d(values), base, list(feature_names))
+
+
+def explain_performance(
+    route: str, features: pd.DataFrame, time: float = 0.0
+) -> Attribution:
+    """Exact attributions for :func:`ensemble.performance_predictor.predict_performance_batch`.
+
+    The ensemble output is ``0.25 * (catboost + lgbm) + 0.5 * kinetics``; the
+    ML part is additive in the tree attributions and the kinetics term does
+    not depend on the features, so it only shifts the base value.
+    """
+    from ensemble.performance_predictor import _load_kinetics, _load_models
+    from physics.simple_kinetics import predict as kinetics_predict
+
+    cat_model, lgb_model = _load_models(route)
+    params = _load_kinetics(route)
+    ml = (tree_shap(cat_model, features) + tree_shap(lgb_model, features)).scaled(0.25)
+    phy = float(np.mean(kinetics_predict(time, params["k"], params["n"])))
+    return Attribution(ml.values, ml.base_value + 0.5 * phy, ml.feature_names)
+
+
+__all__ = [
+    "Attribution",
+    "background_summary",
+    "explain_performance",
+    "is_tree_model",
+    "kernel_shap",
+    "tree_shap",
+    "tree_shap_interactions",
+]
@@ -0,0 +1,144 @@
+"""Global SHAP summaries computed at training time.
+
+A summary condenses TreeSHAP attributions over a sample of the training set
+into a small JSON document: mean |SHAP| per feature, pairwise interaction
+strengths and binned dependence curves. Summaries are written next to the
+trained models, logged to MLflow and served read-only, so dashboards and
+model cards never compute SHAP at request time.
+"""
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .explainers import Attribution
+
+STORAGE_DIR = Path(__file__).resolve().parents[1] / "storage"
+
+
+def summary_path(name: str) -> Path:
+    """Location of the stored summary for model ``name``."""
+    return STORAGE_DIR / f"{name}_shap_summary.json"
+
+
+def sample_rows(X: pd.DataFrame, sample_size: int = 500, random_state: int = 42) -> pd.DataFrame:
+    """Random sample of ``X`` used to compute the summary."""
+    if len(X) <= sample_size:
+        return X
+    return X.sample(n=sample_size, random_state=random_state)
+
+
+def _dependence_grid(x: np.ndarray, shap_col: np.ndarray, grid_points: int) -> Dict[str, list]:
+    """Mean feature value and mean SHAP value per quantile bin."""
+    mask = ~np.isnan(x)
+    x, shap_col = x[mask], shap_col[mask]
+    if len(x) == 0:
+        return {"x": [], "shap": [], "count": []}
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, grid_points + 1)))
+    bins = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, max(len(edges) - 2, 0))
+    n_bins = max(len(edges) - 1, 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    keep = counts > 0
+    mean_x = np.bincount(bins, weights=x, minlength=n_bins)[keep] / counts[keep]
+    mean_shap = np.bincount(bins, weights=shap_col, minlength=n_bins)[keep] / counts[keep]
+    return {
+        "x": mean_x.tolist(),
+        "shap": mean_shap.tolist(),
+        "count": counts[keep].astype(int).tolist(),
+    }
+
+
+def summarize(
+    attribution: Attribution,
+    X: pd.DataFrame,
+    interactions: Optional[np.ndarray] = None,
+    grid_points: int = 20,
+    top_interactions: int = 20,
+) -> Dict[str, Any]:
+    """Build a global summary from per-row attributions of ``X``."""
+    names = list(attribution.feature_names)
+    values = np.asarray(attribution.values, dtype=float)
+    mean_abs = np.abs(values).mean(axis=0)
+    order = np.argsort(-mean_abs)
+
+    pairs = []
+    if interactions is not None:
+        strength = np.abs(np.asarray(interactions, dtype=float)).mean(axis=0)
+        iu, ju = np.triu_indices(len(names), k=1)
+        # Off-diagonal entries hold half of the pairwise effect each
+        pair_strength = strength[iu, ju] + strength[ju, iu]
+        for idx in np.argsort(-pair_strength)[:top_interactions]:
+            pairs.append(
+                {
+                    "features": [names[iu[idx]], names[ju[idx]]],
+                    "mean_abs_interaction": float(pair_strength[idx]),
+                }
+            )
+
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "n_samples": int(len(values)),
+        "base_value": float(attribution.base_value),
+        "feature_names": names,
+        "mean_abs_shap": {names[i]: float(mean_abs[i]) for i in order},
+        "interactions": pairs,
+        "dependence": {
+            name: _dependence_grid(
+                X[name].to_numpy(dtype=float, na_value=np.nan), values[:, i], grid_points
+            )
+            for i, name in enumerate(names)
+            if pd.api.types.is_numeric_dtype(X[name])
+        },
+    }
+
+
+def compute_global_summary(
+    models: Sequence[object],
+    X: pd.DataFrame,
+    sample_size: int = 500,
+    grid_points: int = 20,
+    class_index: Optional[int] = None,
+    random_state: int = 42,
+) -> Dict[str, Any]:
+    """Summarise the averaged TreeSHAP attributions of ``models`` on ``X``.
+
+    Several models (e.g. the CatBoost and LightGBM halves of an ensemble) are
+    averaged the same way their predictions are. Interaction strengths are
+    included when the ``shap`` package is available.
+    """
+    from .explainers import tree_shap, tree_shap_interactions
+
+    sample = sample_rows(X, sample_size, random_state)
+    weight = 1.0 / len(models)
+    attribution = None
+    for model in models:
+        part = tree_shap(model, sample, class_index=class_index).scaled(weight)
+        attribution = part if attribution is None else attribution + part
+    try:
+        interactions = sum(
+            weight * tree_shap_interactions(model, sample, class_index) for model in models
+        )
+    except Exception:  # pragma: no cover - shap missing or unsupported model
+        interactions = None
+    return summarize(attribution, sample, interactions, grid_points)
+
+
+def save_global_summary(summary: Dict[str, Any], name: str) -> Path:
+    """Write ``summary`` to :func:`summary_path` and return the path."""
+    path = summary_path(name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(summary, indent=2))
+    return path
+
+
+def load_global_summary(name: str) -> Dict[str, Any]:
+    """Load a stored summary; raises ``FileNotFoundError`` if absent."""
+    path = summary_path(name)
+    if not path.exists():
+        raise FileNotFoundError(f"No SHAP summary for '{name}'. Train the model first.")
+    return json.loads(path.read_text())
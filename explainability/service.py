@@ -0,0 +1,152 @@
+"""Asynchronous explanation jobs with cached results.
+
+SHAP values are computed in a worker pool so endpoints can return a job id
+immediately. Finished explanations are cached keyed by
+``(model_version, input_hash)``: explaining the same recipe again with the
+same model is answered from memory without scheduling any work.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional
+
+ExplainFn = Callable[[Dict[str, float]], Dict[str, float]]
+
+
+def input_hash(params: Dict[str, float]) -> str:
+    """Stable hash of a parameter set."""
+    payload = json.dumps({k: float(v) for k, v in params.items()}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def job_id_for(model_version: str, params: Dict[str, float]) -> str:
+    """Return the job identifier of an explanation request.
+
+    Identical requests map to the same id, so concurrent submissions of one
+    recipe share a single job.
+    """
+    key = f"{model_version}:{input_hash(params)}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+class ExplanationService:
+    """Run explanation jobs in a pool and cache their results.
+
+    Parameters
+    ----------
+    explain_fn:
+        Picklable callable mapping a parameter dict to SHAP values.
+    max_workers:
+        Size of the worker pool.
+    cache_size:
+        Maximum number of finished explanations kept (least recently used
+        entries are evicted first).
+    use_processes:
+        Use a process pool (default) so CPU-bound SHAP work does not compete
+        with request handling for the GIL; otherwise a thread pool.
+    """
+
+    def __init__(
+        self,
+        explain_fn: ExplainFn,
+        max_workers: int = 2,
+        cache_size: int = 256,
+        use_processes: bool = True,
+    ) -> None:
+        self.explain_fn = explain_fn
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._results: "OrderedDict[str, Dict[str, float]]" = OrderedDict()
+        self._jobs: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                ctx = multiprocessing.get_context("spawn")
+                self._executor = ProcessPoolExecutor(self.max_workers, mp_context=ctx)
+            else:
+                self._executor = ThreadPoolExecutor(self.max_workers)
+        return self._executor
+
+    def _reset_executor(self) -> None:
+        """Drop a broken pool (e.g. after a worker died) so a new one is built."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _store(self, job_id: str, values: Dict[str, float]) -> None:
+        self._results[job_id] = values
+        self._results.move_to_end(job_id)
+        while len(self._results) > self.cache_size:
+            self._results.popitem(last=False)
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            if future.exception() is None:
+                self._store(job_id, future.result())
+                self._jobs.pop(job_id, None)
+
+    def cached(self, model_version: str, params: Dict[str, float]) -> Optional[Dict[str, float]]:
+        """Return cached SHAP values for ``params`` if already computed."""
+        job_id = job_id_for(model_version, params)
+        with self._lock:
+            values = self._results.get(job_id)
+            if values is not None:
+                self._results.move_to_end(job_id)
+            return values
+
+    def submit(self, model_version: str, params: Dict[str, float]) -> str:
+        """Schedule an explanation unless it is cached or already running.
+
+        If the process pool is broken, it is replaced and the job submitted
+        once more.
+        """
+        job_id = job_id_for(model_version, params)
+        with self._lock:
+            if job_id in self._results:
+                return job_id
+            running = self._jobs.get(job_id)
+            if running is not None and not (running.done() and running.exception()):
+                return job_id
+            try:
+                future = self._get_executor().submit(self.explain_fn, dict(params))
+            except BrokenProcessPool:
+                self._reset_executor()
+                future = self._get_executor().submit(self.explain_fn, dict(params))
+            self._jobs[job_id] = future
+        future.add_done_callback(lambda f: self._on_done(job_id, f))
+        return job_id
+
+    def status(self, job_id: str) -> Dict[str, object]:
+        """Return ``{"status", "shap", "error"}`` for a job.
+
+        ``status`` is ``"done"``, ``"pending"``, ``"failed"`` or ``"unknown"``.
+        """
+        with self._lock:
+            values = self._results.get(job_id)
+            future = self._jobs.get(job_id)
+        if values is not None:
+            return {"status": "done", "shap": values, "error": None}
+        if future is None:
+            return {"status": "unknown", "shap": None, "error": None}
+        if not future.done():
+            return {"status": "pending", "shap": None, "error": None}
+        exc = future.exception()
+        if exc is not None:
+            return {"status": "failed", "shap": None, "error": str(exc)}
+        return {"status": "done", "shap": future.result(), "error": None}
+
+    def shutdown(self) -> None:
+        """Stop the worker pool, waiting for running jobs."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -1,30 +1,92 @@
 """Utility to compute SHAP values for optimisation recommendations."""
 from __future__ import annotations
 
-from typing import Dict, Callable
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Sequence, Tuple
 
+import numpy as np
 
-def shap_for_recommendation(objective_fn: Callable[[Dict[str, float]], float],
-                            params: Dict[str, float]) -> Dict[str, float]:
+
+@lru_cache(maxsize=8)
+def _space_background(keys: Tuple[str, ...], n_samples: int, seed: int) -> np.ndarray:
+    from optimization.space import feasible_mask, get_search_space
+
+    space = get_search_space()
+    rng = np.random.default_rng(seed)
+    low = np.array([space[k][0] for k in keys])
+    high = np.array([space[k][1] for k in keys])
+    samples = rng.uniform(low, high, size=(n_samples * 4, len(keys)))
+    samples = samples[feasible_mask(samples, keys)]
+    return samples[:n_samples]
+
+
+def search_space_background(
+    keys: Sequence[str], n_samples: int = 200, seed: int = 0
+) -> np.ndarray:
+    """Feasible uniform samples of the search space used as SHAP background."""
+    return _space_background(tuple(keys), n_samples, seed)
+
+
+def shap_for_recommendation(
+    objective_fn: Callable[[Dict[str, float]], float],
+    params: Dict[str, float],
+    batch_fn: Optional[Callable[[np.ndarray, Sequence[str]], np.ndarray]] = None,
+    background: Optional[np.ndarray] = None,
+    n_clusters: int = 10,
+) -> Dict[str, float]:
     """Return SHAP values explaining the recommendation.
 
-    The function uses SHAP's :class:`KernelExplainer` on the provided
-    ``objective_fn``. If the ``shap`` package is not installed an empty
-    dictionary is returned instead of raising an ImportError, allowing the
-    caller to degrade gracefully.
+    The objective is treated as a black box and explained with KernelSHAP
+    against a k-means summary of ``background`` (by default feasible samples
+    of the search space), so attributions are relative to typical recipes.
+    When the vectorised ``batch_fn`` is given it is called once per batch of
+    perturbations instead of looping over ``objective_fn``. If the ``shap``
+    package is not installed an empty dictionary is returned instead of
+    raising an ImportError, allowing the caller to degrade gracefully.
     """
     try:  # pragma: no cover - optional dependency
-        import shap
-        import numpy as np
+        import shap  # noqa: F401
     except Exception:  # pragma: no cover - shap not installed
         return {}
 
+    from .explainers import kernel_shap
+
     keys = list(params.keys())
-    x = np.array([list(params.values())])
+    x = np.array([[params[k] for k in keys]], dtype=float)
+
+    if batch_fn is not None:
+        def _wrapped(x_arr):
+            return np.asarray(batch_fn(x_arr, keys), dtype=float)
+    else:
+        def _wrapped(x_arr):
+            return np.array([objective_fn(dict(zip(keys, row))) for row in x_arr])
 
-    def _wrapped(x_arr):
-        return [objective_fn(dict(zip(keys, row))) for row in x_arr]
+    if background is None:
+        background = search_space_background(keys)
+    attribution = kernel_shap(_wrapped, x, keys, background, n_clusters=n_clusters)
+    return attribution.as_dicts()[0]
+
+
+def shap_for_surrogate(surrogate, params: Dict[str, float]) -> Dict[str, float]:
+    """Exact TreeSHAP explanation of a :class:`~optimization.surrogate.SurrogateObjective`.
+
+    Each target ensemble is explained with TreeSHAP and the attributions are
+    combined with the same business weights as the score. Fixed lote
+    features appear alongside the optimised parameters.
+    """
+    from optimization.objective import DEFAULT_WEIGHTS, OBJECTIVE_DIRECTIONS, OBJECTIVE_NAMES
+
+    from .explainers import explain_performance
+
+    keys = list(params.keys())
+    df = surrogate._frame(np.array([[params[k] for k in keys]]), keys)
+    time = params[surrogate.time_param] if surrogate.time_param else surrogate.time
+    weights = {**DEFAULT_WEIGHTS, **(surrogate.weights or {})}
 
-    explainer = shap.KernelExplainer(_wrapped, x)
-    shap_values = explainer.shap_values(x)[0]
-    return {k: float(v) for k, v in zip(keys, shap_values)}
+    total = None
+    for name, direction in zip(OBJECTIVE_NAMES, OBJECTIVE_DIRECTIONS):
+        sign = 1.0 if direction == "maximize" else -1.0
+        part = explain_performance(surrogate.targets[name], df, time)
+        part = part.scaled(sign * weights[name])
+        total = part if total is None else total + part
+    return total.as_dicts()[0]
@@ -2,40 +2,249 @@
 Metagenomic vectorisation utilities using hashing and dimensionality reduction.
 
 The functions here turn DNA/RNA sequences into numeric feature vectors via
-hashed k‑mer counts and reduce their dimensionality with PCA or UMAP.
+hashed k‑mer counts and reduce their dimensionality with PCA or UMAP. Reading
+and hashing of raw reads lives in :mod:`features.kmers`; persisted,
+out‑of‑core reducers live in :mod:`features.reducers`.
 """
 
-from typing import Iterable, List
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Sequence, Union
 
 import numpy as np
-from sklearn.decomposition import PCA
-from sklearn.feature_extraction import FeatureHasher
+import pandas as pd
+from scipy import sparse as sp
 
-try:  # UMAP is optional at runtime but recommended
-    import umap
-except Exception:  # pragma: no cover - handled gracefully if missing
-    umap = None
+from features import kmers, markers
+from features.reducers import EmbeddingReducer
+from storage.embedding_cache import EmbeddingCache, default_cache, file_digest
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from scipy.sparse import csr_matrix
 
-def _kmers(seq: str, k: int) -> List[str]:
-    return [seq[i : i + k] for i in range(len(seq) - k + 1)]
+    from storage.feature_store import AbstractFeatureStore
 
 
-def hash_sequences(seqs: Iterable[str], n_features: int = 1024, k: int = 6) -> np.ndarray:
-    """Hash sequences into a sparse numeric matrix of k‑mers."""
-    hasher = FeatureHasher(n_features=n_features, input_type="string")
-    docs = [_kmers(s, k) for s in seqs]
-    return hasher.transform(docs).toarray()
+def hash_sequences(
+    seqs: Iterable[str],
+    n_features: int = 1024,
+    k: int = 6,
+    canonical: bool = False,
+    sparse: bool = False,
+    n_jobs: int = 1,
+) -> Union[np.ndarray, "csr_matrix"]:
+    """Hash sequences into a numeric matrix of k‑mers, one row per sequence.
+
+    K‑mers are encoded with two bits per base and hashed with NumPy (see
+    :mod:`features.kmers`); columns and signs match ``FeatureHasher`` on the
+    k‑mer strings. With ``sparse`` the CSR matrix is returned instead of a
+    dense array, and ``n_jobs > 1`` spreads the rows over a process pool. To
+    featurize whole FASTA/FASTQ files use :func:`hash_files`.
+    """
+    seqs = list(seqs)
+    if n_jobs > 1:
+        matrix = kmers.hash_reads_per_row_parallel(
+            seqs, n_features=n_features, k=k, canonical=canonical, n_jobs=n_jobs
+        )
+    else:
+        matrix = kmers.hash_reads_per_row(seqs, n_features=n_features, k=k, canonical=canonical)
+    return matrix if sparse else matrix.toarray()
+
+
+def _resolve_cache(cache: Union[bool, EmbeddingCache]) -> Optional[EmbeddingCache]:
+    if cache is True:
+        return default_cache()
+    return cache or None
+
+
+def _hash_files_uncached(
+    paths: List[str],
+    n_features: int,
+    k: int,
+    canonical: bool,
+    chunk_reads: int,
+    n_jobs: int,
+    progress: Optional[Callable[[int, int], None]],
+) -> "csr_matrix":
+    if n_jobs > 1:
+        return kmers.hash_files_parallel(
+            paths, n_features=n_features, k=k, canonical=canonical,
+            chunk_reads=chunk_reads, n_jobs=n_jobs, progress=progress,
+        )
+    return kmers.hash_files(
+        paths, n_features=n_features, k=k, canonical=canonical, chunk_reads=chunk_reads
+    )
+
+
+def hash_files(
+    paths: Iterable[Union[str, Path]],
+    n_features: int = 1024,
+    k: int = 6,
+    canonical: bool = False,
+    chunk_reads: int = 50_000,
+    n_jobs: int = 1,
+    progress: Optional[Callable[[int, int], None]] = None,
+    cache: Union[bool, EmbeddingCache] = True,
+) -> "csr_matrix":
+    """Stream FASTA/FASTQ files into a sparse ``(n_files, n_features)`` count matrix.
+
+    Each file is one sample; its reads are read and hashed in chunks of
+    ``chunk_reads`` so memory does not grow with the sequencing depth. With
+    ``n_jobs > 1`` files are sharded into byte ranges hashed in a process
+    pool, calling ``progress(done, total)`` after each shard.
+
+    Counts are looked up in the content-addressed
+    :class:`~storage.embedding_cache.EmbeddingCache` (the default cache when
+    ``cache`` is ``True``, none when ``False``) and only files whose content
+    or settings are new are hashed.
+    """
+    paths = [str(p) for p in paths]
+    store = _resolve_cache(cache)
+    if store is None:
+        return _hash_files_uncached(paths, n_features, k, canonical, chunk_reads, n_jobs, progress)
+
+    keys = [store.counts_key(file_digest(p), k, n_features, canonical) for p in paths]
+    rows: List[Optional["csr_matrix"]] = [store.get_counts(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        fresh = _hash_files_uncached(
+            [paths[i] for i in missing], n_features, k, canonical, chunk_reads, n_jobs, progress
+        )
+        for j, i in enumerate(missing):
+            rows[i] = fresh[j]
+            store.put_counts(keys[i], rows[i])
+    if not rows:
+        return sp.csr_matrix((0, n_features))
+    return sp.vstack(rows, format="csr")
+
+
+def fit_reducer(
+    matrix: Union[np.ndarray, "csr_matrix"],
+    method: str = "ipca",
+    n_components: int = 50,
+    random_state: int = 42,
+    path: Optional[Union[str, Path]] = None,
+) -> EmbeddingReducer:
+    """Fit a reducer on the training matrix and persist it.
+
+    ``"ipca"`` and ``"svd"`` work directly on sparse CSR input chunk by
+    chunk. The fitted reducer is saved to ``path`` (by default under
+    ``storage/reducers``) so new samples can later be projected with
+    :func:`project`.
+    """
+    reducer = EmbeddingReducer(method, n_components=n_components, random_state=random_state)
+    reducer.fit(matrix)
+    reducer.save(path)
+    return reducer
+
+
+def project(
+    matrix: Union[np.ndarray, "csr_matrix"],
+    reducer: Union[EmbeddingReducer, str, Path],
+) -> np.ndarray:
+    """Project samples into the embedding space of a fitted reducer or reducer file."""
+    if not isinstance(reducer, EmbeddingReducer):
+        reducer = EmbeddingReducer.load(reducer)
+    return reducer.transform(matrix)
+
+
+def project_files(
+    paths: Iterable[Union[str, Path]],
+    reducer: Union[EmbeddingReducer, str, Path],
+    k: int = 6,
+    canonical: bool = False,
+    n_jobs: int = 1,
+    cache: Union[bool, EmbeddingCache] = True,
+) -> np.ndarray:
+    """Embed FASTA/FASTQ samples with a fitted reducer, one row per file.
+
+    Embeddings are cached per file content and reducer version, so unchanged
+    samples are neither re-hashed nor re-projected.
+    """
+    paths = [str(p) for p in paths]
+    if not isinstance(reducer, EmbeddingReducer):
+        reducer = EmbeddingReducer.load(reducer)
+    store = _resolve_cache(cache)
+    if store is None:
+        counts = hash_files(
+            paths, n_features=reducer.n_features, k=k, canonical=canonical,
+            n_jobs=n_jobs, cache=False,
+        )
+        return reducer.transform(counts)
+
+    keys = [
+        store.embedding_key(file_digest(p), k, reducer.n_features, reducer.version, canonical)
+        for p in paths
+    ]
+    rows: List[Optional[np.ndarray]] = [store.get_embedding(key) for key in keys]
+    missing = [i for i, row in enumerate(rows) if row is None]
+    if missing:
+        counts = hash_files(
+            [paths[i] for i in missing], n_features=reducer.n_features, k=k,
+            canonical=canonical, n_jobs=n_jobs, cache=store,
+        )
+        for i, row in zip(missing, reducer.transform(counts)):
+            rows[i] = row
+            store.put_embedding(keys[i], row)
+    if not rows:
+        return np.empty((0, reducer.n_components))
+    return np.vstack(rows)
+
+
+def sample_features(
+    paths: Iterable[Union[str, Path]],
+    reducer: Union[EmbeddingReducer, str, Path],
+    sample_ids: Optional[Sequence[str]] = None,
+    marker_index: Optional[markers.MarkerIndex] = None,
+    k: int = 6,
+    canonical: bool = False,
+    n_jobs: int = 1,
+    include_markers: Optional[bool] = None,
+    store: Optional["AbstractFeatureStore"] = None,
+    table: str = "sample_features",
+) -> pd.DataFrame:
+    """Feature-store table of k‑mer embeddings and marker gene counts per sample.
+
+    ``n_features`` follows the fitted reducer. Columns are ``emb_<i>`` for
+    the embedding followed by the ``marker_*`` columns of
+    :func:`features.markers.marker_counts`, indexed by ``sample_id``.
+
+    Markers are scanned when ``include_markers`` is true, or by default
+    when a ``marker_index`` is given or the reference FASTA exists; set
+    ``include_markers=True`` to fail if it is missing. With a feature
+    ``store`` the table is appended to ``table`` and the marker counts to
+    ``marker_counts``.
+    """
+    paths = [str(p) for p in paths]
+    ids = list(sample_ids) if sample_ids is not None else [Path(p).stem for p in paths]
+    if len(ids) != len(paths):
+        raise ValueError("sample_ids must have one entry per path")
+    if not isinstance(reducer, EmbeddingReducer):
+        reducer = EmbeddingReducer.load(reducer)
+    if include_markers is None:
+        include_markers = marker_index is not None or markers.reference_available()
+    embedding = project_files(paths, reducer, k=k, canonical=canonical, n_jobs=n_jobs)
+    frame = pd.DataFrame(
+        embedding,
+        index=pd.Index(ids, name="sample_id"),
+        columns=[f"emb_{i}" for i in range(embedding.shape[1])],
+    )
+    if include_markers:
+        genes = markers.marker_counts(
+            paths, index=marker_index, sample_ids=ids, n_jobs=n_jobs, store=store
+        )
+        frame = frame.join(genes)
+    if store is not None:
+        store.save_table(frame.reset_index(), table)
+    return frame
 
 
 def reduce_dimensions(matrix: np.ndarray, method: str = "pca", n_components: int = 50, random_state: int = 42) -> np.ndarray:
-    """Reduce dimensionality of hashed features using PCA or UMAP."""
-    if method == "pca":
-        model = PCA(n_components=n_components, random_state=random_state)
-    elif method == "umap":
-        if umap is None:
-            raise ImportError("UMAP is not installed")
-        model = umap.UMAP(n_components=n_components, random_state=random_state)
-    else:
+    """Reduce dimensionality of hashed features using PCA or UMAP.
+
+    Fits a new model on every call; use :func:`fit_reducer` and
+    :func:`project` to reuse an embedding space across samples.
+    """
+    if method not in ("pca", "umap"):
         raise ValueError("method must be 'pca' or 'umap'")
-    return model.fit_transform(matrix)
+    reducer = EmbeddingReducer(method, n_components=n_components, random_state=random_state)
+    return reducer.fit_transform(matrix)
@@ -0,0 +1,453 @@
+"""
+Streaming sequence readers and a vectorised 2-bit k-mer hasher.
+
+Reads are consumed in chunks straight from FASTA/FASTQ files (optionally
+gzip-compressed). Each chunk is joined into one byte buffer, encoded with
+two bits per base and turned into integer k-mer codes with NumPy, without
+ever building a Python string per k-mer. Codes are mapped to hashed feature
+columns and accumulated into a sparse CSR row per sample.
+
+Hashing is compatible with :class:`sklearn.feature_extraction.FeatureHasher`
+on k-mer strings (same column and sign per k-mer), so matrices produced here
+can replace those of the original ``hash_sequences``. Bases are upper-cased
+and k-mers containing anything other than ``ACGT`` (e.g. ``N``) are skipped.
+"""
+
+from __future__ import annotations
+
+import gzip
+import mmap
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction import FeatureHasher
+
+PathLike = Union[str, Path]
+
+# Maximum k supported by 64-bit codes
+MAX_K = 31
+
+# Full lookup tables are precomputed for k up to this value (4**8 k-mers)
+_TABLE_MAX_K = 8
+
+_BASES = np.frombuffer(b"ACGT", dtype=np.uint8)
+_ENCODE = np.full(256, 4, dtype=np.uint8)
+for _code, _base in enumerate(b"ACGT"):
+    _ENCODE[_base] = _code
+    _ENCODE[ord(chr(_base).lower())] = _code
+_ENCODE[ord("U")] = _ENCODE[ord("u")] = 3
+
+
+def _open(path: PathLike) -> IO[bytes]:
+    path = Path(path)
+    if path.suffix == ".gz":
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _parse_records(lines: Iterator[bytes], origin: str = "input") -> Iterator[bytes]:
+    """Yield sequences from an iterator over FASTA or FASTQ lines."""
+    first = b""
+    for line in lines:
+        first = line.strip()
+        if first:
+            break
+    if not first:
+        return
+    if first.startswith(b"@"):
+        while True:
+            seq = next(lines, None)
+            if seq is None:
+                return
+            next(lines, None)  # '+' separator
+            next(lines, None)  # qualities
+            yield seq.strip()
+            header = next(lines, None)
+            while header is not None and not header.strip():
+                header = next(lines, None)
+            if header is None:
+                return
+    elif first.startswith(b">"):
+        parts: List[bytes] = []
+        for line in lines:
+            line = line.strip()
+            if line.startswith(b">"):
+                if parts:
+                    yield b"".join(parts)
+                parts = []
+            elif line:
+                parts.append(line)
+        if parts:
+            yield b"".join(parts)
+    else:
+        raise ValueError(f"Unrecognised sequence format in {origin}")
+
+
+def read_sequences(path: PathLike) -> Iterator[bytes]:
+    """Yield the sequences of a FASTA or FASTQ file one at a time.
+
+    The format is detected from the first non-empty line (``>`` for FASTA,
+    ``@`` for FASTQ). Multi-line FASTA records are joined; FASTQ records are
+    expected in the usual four-line layout.
+    """
+    with _open(path) as fh:
+        yield from _parse_records(iter(fh), str(path))
+
+
+def iter_read_chunks(
+    reads: Iterable[Union[bytes, str]], chunk_reads: int = 50_000
+) -> Iterator[List[bytes]]:
+    """Group an iterable of reads into lists of at most ``chunk_reads``."""
+    chunk: List[bytes] = []
+    for read in reads:
+        chunk.append(read.encode() if isinstance(read, str) else read)
+        if len(chunk) >= chunk_reads:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def kmer_codes(
+    buffer: Union[bytes, np.ndarray], k: int, canonical: bool = False
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the 2-bit codes of all valid k-mers in ``buffer``.
+
+    Returns ``(codes, starts)`` where ``starts`` holds the offset of each
+    k-mer in ``buffer``. Windows touching a non-``ACGT`` byte (including the
+    separators placed between joined reads) are dropped. With ``canonical``
+    each k-mer is replaced by the smaller of itself and its reverse
+    complement. ``buffer`` may also be a ``uint8`` array, e.g. a slice of a
+    memory-mapped file.
+    """
+    if not 1 <= k <= MAX_K:
+        raise ValueError(f"k must be between 1 and {MAX_K}")
+    if isinstance(buffer, np.ndarray):
+        raw = buffer.astype(np.uint8, copy=False)
+    else:
+        raw = np.frombuffer(buffer, dtype=np.uint8)
+    enc = _ENCODE[raw]
+    if len(enc) < k:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+
+    invalid = np.concatenate(([0], np.cumsum(enc > 3)))
+    starts = np.flatnonzero(invalid[k:] - invalid[:-k] == 0)
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.uint64), starts
+
+    values = enc.astype(np.uint64)
+    codes = np.zeros(len(starts), dtype=np.uint64)
+    for offset in range(k):
+        codes = (codes << np.uint64(2)) | values[starts + offset]
+    if canonical:
+        rc = np.zeros(len(starts), dtype=np.uint64)
+        for offset in range(k - 1, -1, -1):
+            rc = (rc << np.uint64(2)) | (np.uint64(3) - values[starts + offset])
+        codes = np.minimum(codes, rc)
+    return codes, starts
+
+
+def decode_kmers(codes: np.ndarray, k: int) -> List[str]:
+    """Turn 2-bit codes back into k-mer strings."""
+    codes = np.asarray(codes, dtype=np.uint64)
+    shifts = np.arange(2 * (k - 1), -1, -2, dtype=np.uint64)
+    digits = (codes[:, None] >> shifts[None, :]) & np.uint64(3)
+    letters = _BASES[digits.astype(np.intp)]
+    return [row.tobytes().decode() for row in letters]
+
+
+def _hash_strings(kmers: List[str], n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column and sign FeatureHasher assigns to each k-mer string."""
+    hasher = FeatureHasher(n_features=n_features, input_type="string")
+    mat = hasher.transform([[s] for s in kmers]).tocsr()
+    mat.sort_indices()
+    columns = np.zeros(len(kmers), dtype=np.int64)
+    signs = np.zeros(len(kmers), dtype=np.float64)
+    rows = np.repeat(np.arange(len(kmers)), np.diff(mat.indptr))
+    columns[rows] = mat.indices
+    signs[rows] = np.sign(mat.data)
+    return columns, signs
+
+
+@lru_cache(maxsize=16)
+def _hash_table(k: int, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Column and sign for every possible k-mer code (small k only)."""
+    return _hash_strings(decode_kmers(np.arange(4 ** k, dtype=np.uint64), k), n_features)
+
+
+def hash_codes(codes: np.ndarray, k: int, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Map k-mer codes to ``(columns, signs)`` compatible with FeatureHasher."""
+    if k <= _TABLE_MAX_K:
+        columns, signs = _hash_table(k, n_features)
+        idx = codes.astype(np.intp)
+        return columns[idx], signs[idx]
+    uniq, inverse = np.unique(codes, return_inverse=True)
+    columns, signs = _hash_strings(decode_kmers(uniq, k), n_features)
+    return columns[inverse], signs[inverse]
+
+
+def _join(reads: List[bytes]) -> Tuple[bytes, np.ndarray]:
+    """Join reads with a separator and return the buffer and read offsets."""
+    lengths = np.fromiter((len(r) + 1 for r in reads), dtype=np.int64, count=len(reads))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    return b"\n".join(reads) + b"\n", offsets
+
+
+def count_chunk(
+    reads: List[bytes],
+    n_features: int,
+    k: int,
+    canonical: bool = False,
+    alternate_sign: bool = True,
+) -> np.ndarray:
+    """Hashed k-mer counts of one chunk of reads as a dense vector."""
+    buffer, _ = _join(reads)
+    codes, _ = kmer_codes(buffer, k, canonical)
+    if len(codes) == 0:
+        return np.zeros(n_features)
+    columns, signs = hash_codes(codes, k, n_features)
+    weights = signs if alternate_sign else None
+    return np.bincount(columns, weights=weights, minlength=n_features).astype(float)
+
+
+def count_reads(
+    reads: Iterable[Union[bytes, str]],
+    n_features: int = 1024,
+    k: int = 6,
+    canonical: bool = False,
+    alternate_sign: bool = True,
+    chunk_reads: int = 50_000,
+) -> sparse.csr_matrix:
+    """Accumulate hashed k-mer counts of all ``reads`` into one CSR row.
+
+    Reads are processed ``chunk_reads`` at a time so memory stays bounded by
+    the chunk size and ``n_features`` regardless of how many reads there are.
+    """
+    acc = np.zeros(n_features)
+    for chunk in iter_read_chunks(reads, chunk_reads):
+        acc += count_chunk(chunk, n_features, k, canonical, alternate_sign)
+    return sparse.csr_matrix(acc[None, :])
+
+
+def count_file(path: PathLike, **kwargs) -> sparse.csr_matrix:
+    """Hashed k-mer counts of every read in a FASTA/FASTQ file (one sample)."""
+    return count_reads(read_sequences(path), **kwargs)
+
+
+def hash_files(paths: Iterable[PathLike], **kwargs) -> sparse.csr_matrix:
+    """Stack per-sample counts of several files into a ``(n_files, n_features)`` CSR."""
+    rows = [count_file(p, **kwargs) for p in paths]
+    if not rows:
+        return sparse.csr_matrix((0, kwargs.get("n_features", 1024)))
+    return sparse.vstack(rows, format="csr")
+
+
+def _rows_from_codes(
+    buffer: Union[bytes, np.ndarray],
+    offsets: np.ndarray,
+    n_features: int,
+    k: int,
+    canonical: bool,
+    alternate_sign: bool,
+) -> sparse.csr_matrix:
+    """Per-read CSR rows for reads joined in ``buffer`` starting at ``offsets``."""
+    n_rows = len(offsets) - 1
+    codes, starts = kmer_codes(buffer, k, canonical)
+    rows = np.searchsorted(offsets, starts, side="right") - 1
+    columns, signs = hash_codes(codes, k, n_features)
+    values = signs if alternate_sign else np.ones(len(codes))
+    mat = sparse.coo_matrix((values, (rows, columns)), shape=(n_rows, n_features))
+    mat = mat.tocsr()
+    mat.sum_duplicates()
+    mat.eliminate_zeros()
+    return mat
+
+
+def hash_reads_per_row(
+    reads: List[Union[bytes, str]],
+    n_features: int = 1024,
+    k: int = 6,
+    canonical: bool = False,
+    alternate_sign: bool = True,
+) -> sparse.csr_matrix:
+    """Hash each read into its own CSR row in a single vectorised pass."""
+    data = [r.encode() if isinstance(r, str) else r for r in reads]
+    if not data:
+        return sparse.csr_matrix((0, n_features))
+    buffer, offsets = _join(data)
+    return _rows_from_codes(buffer, offsets, n_features, k, canonical, alternate_sign)
+
+
+# ---------------------------------------------------------------------------
+# Parallel featurization
+# ---------------------------------------------------------------------------
+
+# Default size of the byte range a worker reads from a file at once
+SHARD_BYTES = 64 * 1024 * 1024
+
+ProgressFn = Callable[[int, int], None]
+
+
+def _is_fastq_record(mm: mmap.mmap, pos: int) -> bool:
+    """Whether the line starting at ``pos`` is a FASTQ header (``@`` ... ``+``)."""
+    seq_start = mm.find(b"\n", pos) + 1
+    if seq_start == 0:
+        return False
+    plus = mm.find(b"\n", seq_start) + 1
+    return plus != 0 and mm[plus:plus + 1] == b"+"
+
+
+def shard_ranges(path: PathLike, shard_bytes: int = SHARD_BYTES) -> List[Tuple[int, int]]:
+    """Split a file into byte ranges aligned to record boundaries.
+
+    Compressed files cannot be split and yield a single range covering the
+    whole file.
+    """
+    path = Path(path)
+    size = path.stat().st_size
+    if path.suffix == ".gz" or size <= shard_bytes:
+        return [(0, size)]
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        fastq = mm[:1] == b"@"
+        marker = b"\n@" if fastq else b"\n>"
+        bounds = [0]
+        target = shard_bytes
+        while target < size:
+            pos = mm.find(marker, target)
+            while pos != -1 and fastq and not _is_fastq_record(mm, pos + 1):
+                pos = mm.find(marker, pos + 1)
+            if pos == -1:
+                break
+            if pos + 1 > bounds[-1]:
+                bounds.append(pos + 1)
+            target = max(pos + 1, bounds[-1]) + shard_bytes
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def read_sequences_range(path: PathLike, start: int, end: int) -> Iterator[bytes]:
+    """Yield the sequences stored between byte offsets ``start`` and ``end``.
+
+    Uncompressed files are memory-mapped so only the requested range is
+    paged in; ``start`` must point at the beginning of a record.
+    """
+    path = Path(path)
+    if path.suffix == ".gz":
+        yield from read_sequences(path)
+        return
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = iter(mm[start:end].split(b"\n"))
+        yield from _parse_records(lines, str(path))
+
+
+def _count_shard(
+    path: str, start: int, end: int, kwargs: Dict[str, object]
+) -> sparse.csr_matrix:
+    return count_reads(read_sequences_range(path, start, end), **kwargs)
+
+
+def _count_rows_mmap(
+    buffer_path: str,
+    byte_start: int,
+    byte_end: int,
+    offsets: np.ndarray,
+    kwargs: Dict[str, object],
+) -> sparse.csr_matrix:
+    data = np.memmap(buffer_path, dtype=np.uint8, mode="r")[byte_start:byte_end]
+    return _rows_from_codes(data, offsets - byte_start, **kwargs)
+
+
+def hash_files_parallel(
+    paths: Iterable[PathLike],
+    n_features: int = 1024,
+    k: int = 6,
+    canonical: bool = False,
+    alternate_sign: bool = True,
+    chunk_reads: int = 50_000,
+    n_jobs: Optional[int] = None,
+    shard_bytes: int = SHARD_BYTES,
+    progress: Optional[ProgressFn] = None,
+) -> sparse.csr_matrix:
+    """Featurize files across a process pool, one CSR row per file.
+
+    Every file is split into record-aligned byte ranges of about
+    ``shard_bytes``. Workers receive only the path and offsets, memory-map
+    their range and hash it in chunks of ``chunk_reads`` reads, so each
+    worker holds at most one range plus one dense ``n_features`` vector.
+    Partial count rows are summed per file as they complete and
+    ``progress(done, total)`` is called after each shard.
+    """
+    paths = [str(p) for p in paths]
+    kwargs = dict(
+        n_features=n_features, k=k, canonical=canonical,
+        alternate_sign=alternate_sign, chunk_reads=chunk_reads,
+    )
+    tasks = [
+        (i, path, start, end)
+        for i, path in enumerate(paths)
+        for start, end in shard_ranges(path, shard_bytes)
+    ]
+    rows: List[sparse.csr_matrix] = [sparse.csr_matrix((1, n_features)) for _ in paths]
+    if not paths:
+        return sparse.csr_matrix((0, n_features))
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        futures = {
+            executor.submit(_count_shard, path, start, end, kwargs): i
+            for i, path, start, end in tasks
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            rows[i] = rows[i] + future.result()
+            if progress is not None:
+                progress(done, len(tasks))
+    return sparse.vstack(rows, format="csr")
+
+
+def hash_reads_per_row_parallel(
+    reads: List[Union[bytes, str]],
+    n_features: int = 1024,
+    k: int = 6,
+    canonical: bool = False,
+    alternate_sign: bool = True,
+    n_jobs: Optional[int] = None,
+    rows_per_task: int = 20_000,
+    progress: Optional[ProgressFn] = None,
+) -> sparse.csr_matrix:
+    """Parallel :func:`hash_reads_per_row` over in-memory reads.
+
+    The reads are joined once into a temporary memory-mapped file; workers
+    map it read-only and hash their slice of rows, so no sequence strings
+    are pickled to the pool.
+    """
+    data = [r.encode() if isinstance(r, str) else r for r in reads]
+    if not data:
+        return sparse.csr_matrix((0, n_features))
+    buffer, offsets = _join(data)
+    kwargs = dict(n_features=n_features, k=k, canonical=canonical, alternate_sign=alternate_sign)
+    bounds = list(range(0, len(data), rows_per_task)) + [len(data)]
+    parts: Dict[int, sparse.csr_matrix] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        buffer_path = os.path.join(tmp, "reads.bin")
+        with open(buffer_path, "wb") as fh:
+            fh.write(buffer)
+        del buffer
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = {}
+            for lo, hi in zip(bounds[:-1], bounds[1:]):
+                chunk_offsets = offsets[lo:hi + 1]
+                future = executor.submit(
+                    _count_rows_mmap, buffer_path, int(chunk_offsets[0]),
+                    int(chunk_offsets[-1]), chunk_offsets, kwargs,
+                )
+                futures[future] = lo
+            for done, future in enumerate(as_completed(futures), start=1):
+                parts[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done, len(futures))
+    return sparse.vstack([parts[lo] for lo in sorted(parts)], format="csr")
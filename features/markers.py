@@ -0,0 +1,242 @@
+"""
+Functional gene marker scanning (ars, fox, fer, sox).
+
+A local FASTA reference of marker genes is turned into one sorted index of
+canonical k-mer codes, each labelled with the gene family of the reference
+sequence it came from. Reads are then scanned in a single vectorised pass
+per chunk: all k-mers of the chunk are looked up with ``searchsorted`` and a
+read counts towards a family when it shares at least ``min_hits`` k-mers
+with it. Samples are scanned in parallel, one file per task.
+
+The family of a reference record is taken from its header: the first token
+(up to whitespace or ``|``) must start with the family name, e.g.
+``>arsC|P08692`` or ``>soxB_Acidithiobacillus``. Records of other families
+are ignored and k-mers shared by several families are dropped as ambiguous.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from features import kmers
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from storage.feature_store import AbstractFeatureStore
+
+PathLike = Union[str, Path]
+
+MARKER_FAMILIES = ("ars", "fox", "fer", "sox")
+
+MARKER_REFERENCE = Path(
+    os.getenv(
+        "MARKER_REFERENCE",
+        Path(__file__).resolve().parents[1] / "data" / "markers" / "markers.fasta",
+    )
+)
+
+# Worker-side copy of the index, set once per process by ``_init_worker``
+_WORKER_INDEX: Optional["MarkerIndex"] = None
+
+
+def _family_of(header: str, families: Sequence[str]) -> Optional[str]:
+    name = header.split()[0].split("|")[0].lower() if header.strip() else ""
+    for family in families:
+        if name.startswith(family):
+            return family
+    return None
+
+
+def read_reference(path: PathLike) -> Iterator[Tuple[str, bytes]]:
+    """Yield ``(header, sequence)`` pairs of a (optionally gzipped) FASTA file."""
+    header, parts = None, []
+    with kmers._open(path) as fh:
+        for line in fh:
+            line = line.strip()
+            if line.startswith(b">"):
+                if header is not None:
+                    yield header, b"".join(parts)
+                header, parts = line[1:].decode(errors="replace"), []
+            elif line and header is not None:
+                parts.append(line)
+    if header is not None:
+        yield header, b"".join(parts)
+
+
+@dataclass
+class MarkerIndex:
+    """Sorted canonical k-mer codes with the family index of each code."""
+
+    codes: np.ndarray
+    families: np.ndarray
+    family_names: Tuple[str, ...]
+    k: int
+
+    @classmethod
+    def from_records(
+        cls,
+        records: Iterable[Tuple[str, bytes]],
+        k: int = 21,
+        families: Sequence[str] = MARKER_FAMILIES,
+    ) -> "MarkerIndex":
+        """Build the index from ``(header, sequence)`` reference records."""
+        families = tuple(families)
+        all_codes, all_fams = [], []
+        for header, seq in records:
+            family = _family_of(header, families)
+            if family is None:
+                continue
+            codes, _ = kmers.kmer_codes(seq, k, canonical=True)
+            all_codes.append(codes)
+            all_fams.append(np.full(len(codes), families.index(family), dtype=np.int16))
+        if not all_codes:
+            return cls(np.empty(0, np.uint64), np.empty(0, np.int16), families, k)
+
+        pairs = np.unique(
+            np.rec.fromarrays([np.concatenate(all_codes), np.concatenate(all_fams)])
+        )
+        codes, fams = pairs["f0"].astype(np.uint64), pairs["f1"].astype(np.int16)
+        unique, counts = np.unique(codes, return_counts=True)
+        keep = np.isin(codes, unique[counts == 1])
+        return cls(codes[keep], fams[keep], families, k)
+
+    @classmethod
+    def from_fasta(
+        cls, path: PathLike, k: int = 21, families: Sequence[str] = MARKER_FAMILIES
+    ) -> "MarkerIndex":
+        """Build the index from a FASTA reference file."""
+        return cls.from_records(read_reference(path), k=k, families=families)
+
+    def lookup(self, codes: np.ndarray) -> np.ndarray:
+        """Family index of each code, ``-1`` where the code is not a marker k-mer."""
+        if len(self.codes) == 0:
+            return np.full(len(codes), -1, dtype=np.int16)
+        pos = np.minimum(np.searchsorted(self.codes, codes), len(self.codes) - 1)
+        return np.where(self.codes[pos] == codes, self.families[pos], -1)
+
+    def scan_chunk(self, reads: List[bytes], min_hits: int = 1) -> np.ndarray:
+        """Number of reads in ``reads`` assigned to each family."""
+        n_fam = len(self.family_names)
+        if not reads:
+            return np.zeros(n_fam, dtype=np.int64)
+        buffer, offsets = kmers._join(reads)
+        codes, starts = kmers.kmer_codes(buffer, self.k, canonical=True)
+        fams = self.lookup(codes)
+        hit = fams >= 0
+        rows = np.searchsorted(offsets, starts[hit], side="right") - 1
+        hits = np.bincount(rows * n_fam + fams[hit], minlength=len(reads) * n_fam)
+        return (hits.reshape(len(reads), n_fam) >= min_hits).sum(axis=0)
+
+    def scan_reads(
+        self, reads: Iterable[Union[bytes, str]], min_hits: int = 1, chunk_reads: int = 50_000
+    ) -> Tuple[np.ndarray, int]:
+        """Family read counts and total number of reads over all ``reads``."""
+        counts = np.zeros(len(self.family_names), dtype=np.int64)
+        total = 0
+        for chunk in kmers.iter_read_chunks(reads, chunk_reads):
+            counts += self.scan_chunk(chunk, min_hits)
+            total += len(chunk)
+        return counts, total
+
+    def scan_file(
+        self, path: PathLike, min_hits: int = 1, chunk_reads: int = 50_000
+    ) -> Tuple[np.ndarray, int]:
+        """Family read counts and total reads of one FASTA/FASTQ sample."""
+        return self.scan_reads(kmers.read_sequences(path), min_hits, chunk_reads)
+
+
+def reference_available(path: PathLike = MARKER_REFERENCE) -> bool:
+    """Whether the marker reference FASTA exists (it is not shipped with the repo)."""
+    return Path(path).exists()
+
+
+@lru_cache(maxsize=4)
+def load_marker_index(
+    path: PathLike = MARKER_REFERENCE, k: int = 21, families: Tuple[str, ...] = MARKER_FAMILIES
+) -> MarkerIndex:
+    """Build (once per process) the index of the marker reference at ``path``."""
+    path = Path(path)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"Marker reference {path} not found; set MARKER_REFERENCE to a FASTA file"
+        )
+    return MarkerIndex.from_fasta(path, k=k, families=families)
+
+
+def _init_worker(index: MarkerIndex) -> None:
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+
+def _scan_file(path: str, min_hits: int, chunk_reads: int) -> Tuple[np.ndarray, int]:
+    return _WORKER_INDEX.scan_file(path, min_hits, chunk_reads)
+
+
+def marker_counts(
+    paths: Iterable[PathLike],
+    index: Optional[MarkerIndex] = None,
+    sample_ids: Optional[Sequence[str]] = None,
+    min_hits: int = 1,
+    chunk_reads: int = 50_000,
+    normalize: bool = False,
+    n_jobs: int = 1,
+    store: Optional["AbstractFeatureStore"] = None,
+    table: str = "marker_counts",
+) -> pd.DataFrame:
+    """Per-sample gene-family read counts as feature columns.
+
+    Returns one row per file indexed by ``sample_ids`` (file stems by
+    default) with a ``marker_<family>`` column per family and
+    ``marker_total_reads``. With ``normalize`` family counts are expressed
+    in reads per million. ``n_jobs > 1`` scans files in a process pool
+    where each worker receives the index once. With a feature ``store`` the
+    counts are also appended to ``table`` (``sample_id`` as a column).
+    """
+    paths = [str(p) for p in paths]
+    index = index if index is not None else load_marker_index()
+    ids = list(sample_ids) if sample_ids is not None else [Path(p).stem for p in paths]
+    if len(ids) != len(paths):
+        raise ValueError("sample_ids must have one entry per path")
+
+    results: List[Tuple[np.ndarray, int]] = [None] * len(paths)  # type: ignore[list-item]
+    if n_jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs, initializer=_init_worker, initargs=(index,)
+        ) as executor:
+            futures = {
+                executor.submit(_scan_file, p, min_hits, chunk_reads): i
+                for i, p in enumerate(paths)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+    else:
+        results = [index.scan_file(p, min_hits, chunk_reads) for p in paths]
+
+    columns = [f"marker_{name}" for name in index.family_names]
+    counts = np.array([r[0] for r in results], dtype=float).reshape(len(paths), len(columns))
+    totals = np.array([r[1] for r in results], dtype=np.int64)
+    if normalize:
+        counts = counts / np.maximum(totals, 1)[:, None] * 1e6
+    frame = pd.DataFrame(counts, columns=columns, index=pd.Index(ids, name="sample_id"))
+    frame["marker_total_reads"] = totals
+    if store is not None:
+        store.save_table(frame.reset_index(), table)
+    return frame
+
+
+__all__ = [
+    "MARKER_FAMILIES",
+    "MARKER_REFERENCE",
+    "MarkerIndex",
+    "load_marker_index",
+    "marker_counts",
+    "read_reference",
+    "reference_available",
+]
@@ -0,0 +1,196 @@
+"""
+Persisted dimensionality reducers for genomic k‑mer embeddings.
+
+:class:`EmbeddingReducer` separates fitting from projecting: it is fitted
+once on the training matrix, saved next to the models and later loaded to
+project new samples into the same embedding space. The ``"ipca"`` and
+``"svd"`` methods work on sparse CSR input without densifying the whole
+matrix, and ``"ipca"`` can also be fitted out of core from an iterable of
+chunks.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+import numpy as np
+from joblib import dump, load
+from scipy import sparse
+from sklearn.decomposition import PCA, IncrementalPCA, TruncatedSVD
+
+try:  # UMAP is optional at runtime but recommended
+    import umap
+except Exception:  # pragma: no cover - handled gracefully if missing
+    umap = None
+
+REDUCER_DIR = Path(__file__).resolve().parents[1] / "storage" / "reducers"
+
+METHODS = ("ipca", "svd", "pca", "umap")
+
+Matrix = Union[np.ndarray, sparse.spmatrix]
+
+
+def _dense(chunk: Matrix) -> np.ndarray:
+    return chunk.toarray() if sparse.issparse(chunk) else np.asarray(chunk, dtype=float)
+
+
+def _vstack(top: Matrix, bottom: Matrix) -> Matrix:
+    if sparse.issparse(top) or sparse.issparse(bottom):
+        return sparse.vstack([top, bottom], format="csr")
+    return np.vstack([top, bottom])
+
+
+def _row_chunks(X: Matrix, batch_size: int) -> Iterator[Matrix]:
+    for start in range(0, X.shape[0], batch_size):
+        yield X[start:start + batch_size]
+
+
+class EmbeddingReducer:
+    """Fit/transform wrapper around PCA variants and UMAP that can be persisted.
+
+    Parameters
+    ----------
+    method:
+        ``"ipca"`` (IncrementalPCA fitted batch by batch), ``"svd"``
+        (randomized TruncatedSVD directly on sparse input, no centering),
+        ``"pca"`` (in-memory PCA) or ``"umap"``.
+    n_components:
+        Size of the embedding.
+    batch_size:
+        Rows densified at a time when fitting or projecting sparse input.
+    """
+
+    def __init__(
+        self,
+        method: str = "ipca",
+        n_components: int = 50,
+        batch_size: int = 1024,
+        random_state: int = 42,
+    ) -> None:
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        self.method = method
+        self.n_components = n_components
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.model = None
+        self.n_features: Optional[int] = None
+        self.version: Optional[str] = None
+
+    def _new_model(self):
+        if self.method == "ipca":
+            return IncrementalPCA(n_components=self.n_components)
+        if self.method == "svd":
+            return TruncatedSVD(
+                n_components=self.n_components, algorithm="randomized",
+                random_state=self.random_state,
+            )
+        if self.method == "pca":
+            return PCA(n_components=self.n_components, random_state=self.random_state)
+        if umap is None:
+            raise ImportError("UMAP is not installed")
+        return umap.UMAP(n_components=self.n_components, random_state=self.random_state)
+
+    def _finalize(self) -> "EmbeddingReducer":
+        digest = hashlib.sha1(self.method.encode())
+        for attr in ("components_", "mean_", "embedding_"):
+            value = getattr(self.model, attr, None)
+            if value is not None:
+                digest.update(np.ascontiguousarray(value, dtype=float).tobytes())
+        self.version = f"{self.method}-{self.n_components}-{digest.hexdigest()[:12]}"
+        return self
+
+    def partial_fit(self, chunk: Matrix) -> "EmbeddingReducer":
+        """Update an ``"ipca"`` reducer with one chunk of rows."""
+        if self.method != "ipca":
+            raise ValueError("partial_fit is only supported for method='ipca'")
+        if self.model is None:
+            self.model = self._new_model()
+        self.n_features = chunk.shape[1]
+        self.model.partial_fit(_dense(chunk))
+        return self._finalize()
+
+    def fit(self, X: Union[Matrix, Iterable[Matrix]]) -> "EmbeddingReducer":
+        """Fit on a matrix or, for ``"ipca"``, on an iterable of row chunks.
+
+        IncrementalPCA needs at least ``n_components`` rows per batch, so a
+        chunk smaller than that is merged into the batch before it (or the
+        one after it, for a short first chunk), like sklearn's
+        ``gen_batches(min_batch_size=...)``; no rows are dropped.
+        """
+        self.model = None
+        is_matrix = sparse.issparse(X) or isinstance(X, np.ndarray)
+        if self.method != "ipca":
+            if not is_matrix:
+                X = sparse.vstack(list(X), format="csr")
+            data = X if self.method == "svd" else _dense(X)
+            self.model = self._new_model().fit(data)
+            self.n_features = X.shape[1]
+            return self._finalize()
+
+        chunks = _row_chunks(X, self.batch_size) if is_matrix else iter(X)
+        # A batch is only fitted once the next one is known to be large enough
+        held = None
+        for chunk in chunks:
+            if chunk.shape[0] == 0:
+                continue
+            if held is None:
+                held = chunk
+            elif held.shape[0] < self.n_components or chunk.shape[0] < self.n_components:
+                held = _vstack(held, chunk)
+            else:
+                self.partial_fit(held)
+                held = chunk
+        if held is None or held.shape[0] < self.n_components:
+            raise ValueError("Not enough rows to fit the reducer")
+        return self.partial_fit(held)
+
+    def transform(self, X: Matrix) -> np.ndarray:
+        """Project rows of ``X`` into the fitted embedding space."""
+        if self.model is None:
+            raise ValueError("Reducer is not fitted")
+        if X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected {self.n_features} features, got {X.shape[1]}"
+            )
+        if self.method == "svd":
+            return self.model.transform(X)
+        if X.shape[0] == 0:
+            return np.empty((0, self.n_components))
+        return np.vstack(
+            [self.model.transform(_dense(c)) for c in _row_chunks(X, self.batch_size)]
+        )
+
+    def fit_transform(self, X: Matrix) -> np.ndarray:
+        """Fit on ``X`` and return its embedding.
+
+        ``"pca"`` and ``"umap"`` use the estimator's own ``fit_transform``,
+        so UMAP returns its training embedding rather than re-projecting
+        the training rows.
+        """
+        if self.method in ("pca", "umap"):
+            self.model = self._new_model()
+            embedding = self.model.fit_transform(_dense(X))
+            self.n_features = X.shape[1]
+            self._finalize()
+            return embedding
+        return self.fit(X).transform(X)
+
+    def save(self, path: Union[str, Path, None] = None) -> Path:
+        """Persist the fitted reducer; defaults to ``storage/reducers/<version>.joblib``."""
+        if self.model is None:
+            raise ValueError("Reducer is not fitted")
+        path = Path(path) if path is not None else REDUCER_DIR / f"{self.version}.joblib"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path: Union[str, Path]) -> "EmbeddingReducer":
+        """Load a reducer saved with :meth:`save`."""
+        reducer = load(path)
+        if not isinstance(reducer, EmbeddingReducer):
+            raise ValueError(f"{path} does not contain an EmbeddingReducer")
+        return reducer
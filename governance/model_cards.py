@@ -4,21 +4,35 @@ from __future__ import annotations
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 MODEL_CARD_PATH = Path("model_card.json")
 
 
 def generate_model_card(
-    model_name: str, version: str, metrics: Dict[str, Any], path: Path | str = MODEL_CARD_PATH
+    model_name: str,
+    version: str,
+    metrics: Dict[str, Any],
+    path: Path | str = MODEL_CARD_PATH,
+    explanations: Optional[Dict[str, Any]] = None,
 ) -> Dict[str, Any]:
-    """Create a basic model card and persist it as JSON."""
+    """Create a basic model card and persist it as JSON.
+
+    ``explanations`` may hold a precomputed global SHAP summary (see
+    :mod:`explainability.global_summary`); its feature ranking and top
+    interactions are embedded in the card.
+    """
     card = {
         "model_name": model_name,
         "version": version,
         "generated_at": datetime.utcnow().isoformat(),
         "metrics": metrics,
     }
+    if explanations:
+        card["explanations"] = {
+            "mean_abs_shap": explanations.get("mean_abs_shap", {}),
+            "interactions": explanations.get("interactions", []),
+        }
     Path(path).write_text(json.dumps(card, indent=2))
     return card
 
@@ -0,0 +1,253 @@
+"""
+Streaming parsing and vectorized validation of bulk measurement uploads.
+
+Large lab exports are read as Arrow record batches, a few MiB at a time,
+from CSV, newline-delimited JSON or Arrow IPC (stream or file format).
+Each batch is conformed to :data:`MEASUREMENT_SCHEMA` and validated with
+column-wide Arrow compute kernels instead of one pydantic object per row,
+so memory stays bounded by the batch size rather than the file size.
+
+Unit conversion and z-scores are computed over whole columns as well;
+z-scores use the client's ``mean``/``std`` when given and otherwise the
+running statistics of each variable kept in the feature store
+(:class:`~storage.running_stats.RunningStats`). Variables without enough
+history yet are scored robustly against the batch itself (median and MAD),
+so the first upload of a new variable is not accepted unchecked.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING, Any, BinaryIO, Dict, Iterator, List, Mapping, Optional, Tuple, Union
+)
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    from storage.running_stats import RunningStats
+
+# Columns of the ``measurements`` table, as written by ``/ingest``
+MEASUREMENT_SCHEMA = pa.schema(
+    [
+        ("name", pa.string()),
+        ("value", pa.float64()),
+        ("unit", pa.string()),
+        ("mean", pa.float64()),
+        ("std", pa.float64()),
+    ]
+)
+REQUIRED_COLUMNS = ("name", "value", "unit")
+
+# Scales the median absolute deviation to the standard deviation of a normal
+_MAD_SCALE = 1.4826
+
+FORMATS = ("csv", "ndjson", "arrow")
+_EXTENSIONS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    ".json": "ndjson",
+    ".arrow": "arrow",
+    ".arrows": "arrow",
+    ".ipc": "arrow",
+    ".feather": "arrow",
+}
+_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+_ARROW_FILE_MAGIC = b"ARROW1"
+
+
+def detect_format(
+    filename: Optional[str], content_type: Optional[str] = None, fmt: Optional[str] = None
+) -> str:
+    """Upload format from an explicit ``fmt``, the content type or the file extension."""
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported format: {fmt}")
+        return fmt
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in _CONTENT_TYPES:
+        return _CONTENT_TYPES[media_type]
+    suffix = Path(filename or "").suffix.lower()
+    if suffix in _EXTENSIONS:
+        return _EXTENSIONS[suffix]
+    raise ValueError(f"Cannot tell the format of '{filename}'; pass one of {', '.join(FORMATS)}")
+
+
+def read_batches(
+    source: BinaryIO, fmt: str, block_size: int = 4 << 20
+) -> Iterator[pa.RecordBatch]:
+    """Yield record batches of ``source`` without reading it all into memory.
+
+    CSV and NDJSON are parsed ``block_size`` bytes at a time with the known
+    columns typed as in :data:`MEASUREMENT_SCHEMA` (empty CSV fields are
+    null); Arrow IPC yields the batches as written by the client.
+    """
+    if fmt == "csv":
+        from pyarrow import csv
+
+        reader = csv.open_csv(
+            source,
+            read_options=csv.ReadOptions(block_size=block_size),
+            convert_options=csv.ConvertOptions(
+                column_types={f.name: f.type for f in MEASUREMENT_SCHEMA},
+                strings_can_be_null=True,
+            ),
+        )
+    elif fmt == "ndjson":
+        from pyarrow import json
+
+        reader = json.open_json(
+            source,
+            read_options=json.ReadOptions(block_size=block_size),
+            parse_options=json.ParseOptions(
+                explicit_schema=MEASUREMENT_SCHEMA, unexpected_field_behavior="ignore"
+            ),
+        )
+    elif fmt == "arrow":
+        if source.read(len(_ARROW_FILE_MAGIC)) == _ARROW_FILE_MAGIC:
+            source.seek(0)
+            file_reader = pa.ipc.open_file(source)
+            for i in range(file_reader.num_record_batches):
+                yield file_reader.get_batch(i)
+            return
+        source.seek(0)
+        reader = pa.ipc.open_stream(source)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+    yield from reader
+
+
+def conform(batch: Union[pa.RecordBatch, pa.Table]) -> pa.Table:
+    """Select and cast the :data:`MEASUREMENT_SCHEMA` columns of ``batch``.
+
+    Missing optional columns are filled with nulls, extra columns dropped.
+    Raises ``ValueError`` if a required column is missing.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in batch.schema.names]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+    arrays = []
+    for field in MEASUREMENT_SCHEMA:
+        if field.name in batch.schema.names:
+            arrays.append(batch.column(field.name).cast(field.type))
+        else:
+            arrays.append(pa.nulls(batch.num_rows, field.type))
+    return pa.Table.from_arrays(arrays, schema=MEASUREMENT_SCHEMA)
+
+
+def to_kg(table: pa.Table, unit_factors: Mapping[str, float]) -> np.ndarray:
+    """``value`` converted with the factor of each row's ``unit`` (``NaN`` if unknown)."""
+    factors = np.append(np.asarray(list(unit_factors.values()), dtype=float), np.nan)
+    pos = pc.index_in(table["unit"], value_set=pa.array(list(unit_factors)))
+    pos = pos.fill_null(len(unit_factors)).to_numpy()
+    return _floats(table["value"]) * factors[pos]
+
+
+def _floats(column: pa.ChunkedArray) -> np.ndarray:
+    return np.asarray(column.to_numpy(), dtype=float)
+
+
+def robust_zscores(names: np.ndarray, values: np.ndarray, min_count: int = 5) -> np.ndarray:
+    """``|value - median| / (1.4826 * MAD)`` of each value within its variable.
+
+    ``NaN`` for variables with fewer than ``min_count`` finite values in
+    ``values`` and for those without spread (MAD of zero).
+    """
+    series = pd.Series(np.asarray(values, dtype=float))
+    keys = pd.Series(np.asarray(names, dtype=object))
+    deviation = (series - series.groupby(keys).transform("median")).abs()
+    scale = _MAD_SCALE * deviation.groupby(keys).transform("median")
+    count = series.groupby(keys).transform("count")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = deviation / scale
+    return z.where((count >= min_count) & (scale > 0)).to_numpy(dtype=float)
+
+
+def zscores(
+    table: pa.Table,
+    unit_factors: Mapping[str, float],
+    stats: Optional["RunningStats"] = None,
+    min_batch_count: int = 5,
+) -> np.ndarray:
+    """Absolute z-score of every row, ``NaN`` where there is nothing to compare to.
+
+    Rows with ``mean`` and ``std`` (> 0) are scored against them in their own
+    unit; the others against ``stats`` in kilograms. Rows still without a
+    score (e.g. variables ``stats`` has not seen ``min_count`` times) get
+    their :func:`robust_zscores` within the batch, in kilograms, when their
+    variable has at least ``min_batch_count`` of them.
+    """
+    value, mean, std = (_floats(table[c]) for c in ("value", "mean", "std"))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = np.where(std > 0, np.abs(value - mean) / std, np.nan)
+    cold = np.isnan(z)
+    if not cold.any():
+        return z
+    names = table["name"].to_numpy(zero_copy_only=False)
+    kg = to_kg(table, unit_factors)
+    if stats is not None:
+        z[cold] = stats.zscores(names[cold], kg[cold])
+        cold = np.isnan(z)
+    if cold.any():
+        z[cold] = robust_zscores(names[cold], kg[cold], min_batch_count)
+    return z
+
+
+def validate_measurements(
+    table: pa.Table,
+    unit_factors: Mapping[str, float],
+    z_threshold: float = 3.0,
+    offset: int = 0,
+    max_errors: int = 20,
+    stats: Optional["RunningStats"] = None,
+) -> Tuple[pa.Table, int, List[Dict[str, Any]]]:
+    """Split ``table`` into valid rows and rejections using column-wide checks.
+
+    A row is rejected when its name is missing, its unit is not in
+    ``unit_factors``, its value is missing or not finite, or its
+    :func:`zscores` exceeds ``z_threshold``. Returns the valid rows, the
+    number rejected and up to ``max_errors`` examples ``{"row", "error"}``
+    with row numbers counted from ``offset``.
+    """
+    checks = {
+        "missing name": pc.is_valid(table["name"]),
+        "unsupported unit": pc.is_in(table["unit"], value_set=pa.array(list(unit_factors))),
+        "value is missing or not finite": pc.is_finite(table["value"]),
+    }
+    masks = {
+        reason: np.asarray(mask.fill_null(False).to_numpy(), dtype=bool)
+        for reason, mask in checks.items()
+    }
+    z = zscores(table, unit_factors, stats)
+    masks[f"outlier (|z| > {z_threshold:g})"] = ~(np.nan_to_num(z, nan=0.0) > z_threshold)
+    ok = np.logical_and.reduce(list(masks.values()))
+    rejected = int(len(ok) - ok.sum())
+    errors = []
+    for row in np.flatnonzero(~ok)[:max_errors]:
+        reason = next(r for r, mask in masks.items() if not mask[row])
+        errors.append({"row": offset + int(row), "error": reason})
+    return table.filter(pa.array(ok)), rejected, errors
+
+
+__all__ = [
+    "FORMATS",
+    "MEASUREMENT_SCHEMA",
+    "REQUIRED_COLUMNS",
+    "conform",
+    "detect_format",
+    "read_batches",
+    "robust_zscores",
+    "to_kg",
+    "validate_measurements",
+    "zscores",
+]
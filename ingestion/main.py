@@ -3,6 +3,13 @@ FastAPI ingestion service with unit validation and outlier detection.
 
 This module exposes a minimal API for ingesting measurement data while
 checking that units are valid and values are not statistical outliers.
+Values are converted to kilograms and scored over whole columns; per-variable
+running statistics kept in the feature store are updated with every
+accepted batch and used for the z-score when a client sends no ``mean``/``std``.
+Large exports are uploaded to ``/ingest/bulk`` as CSV, NDJSON or Arrow IPC
+and are parsed, validated and stored chunk by chunk. ``/admin/compact``
+compacts the feature store from this process, which holds the only
+read-write handle on the DuckDB file.
 """
 
 from pathlib import Path
@@ -10,14 +17,20 @@ import os
 from typing import List, Literal, Optional
 
 import pandas as pd
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, validator
+import pyarrow as pa
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
+from pydantic import BaseModel
 
+from ingestion.bulk import conform, detect_format, read_batches, to_kg, validate_measurements
+from storage.compaction import compact_store
 from storage.feature_store import (
     DuckDBFeatureStore,
     PostgresFeatureStore,
     SheetsFeatureStore,
 )
+from storage.online_store import default_online_store
+from storage.running_stats import RunningStats
+from storage.write_queue import BatchingWriter
 
 # Supported units and conversion factors to kilograms
 UNIT_FACTORS = {"kg": 1.0, "g": 1e-3, "mg": 1e-6}
@@ -36,6 +49,18 @@ elif BACKEND == "sheets":
 else:
     raise ValueError(f"Unsupported feature store backend: {BACKEND}")
 
+# Keep the latest features per muestra available for low-latency serving
+FEATURE_STORE.attach_online_store(default_online_store())
+
+# Concurrent /ingest requests are batched by a single writer thread
+WRITER = BatchingWriter(FEATURE_STORE)
+
+# Running mean/variance per measurement name (in kg) for outlier detection
+STATS = RunningStats(FEATURE_STORE)
+
+# Values further than this many standard deviations from the mean are rejected
+Z_THRESHOLD = 3.0
+
 
 class Measurement(BaseModel):
     """A single measurement with optional statistical context."""
@@ -46,17 +71,6 @@ class Measurement(BaseModel):
     mean: Optional[float] = None
     std: Optional[float] = None
 
-    @validator("value")
-    def check_outlier(cls, v, values):
-        """Simple z‑score based outlier detection."""
-        mean = values.get("mean")
-        std = values.get("std")
-        if mean is not None and std is not None and std > 0:
-            z = abs(v - mean) / std
-            if z > 3:
-                raise ValueError(f"value {v} is an outlier (z={z:.2f})")
-        return v
-
     def to_kg(self) -> float:
         """Return the measurement converted to kilograms."""
         factor = UNIT_FACTORS.get(self.unit)
@@ -68,18 +82,83 @@ class Measurement(BaseModel):
 app = FastAPI(title="Ingestion API")
 
 
+def _store_valid(valid: pa.Table) -> None:
+    """Write accepted rows and fold them into the running statistics."""
+    WRITER.write(valid, "measurements")
+    STATS.update(valid["name"].to_numpy(zero_copy_only=False), to_kg(valid, UNIT_FACTORS))
+
+
 @app.post("/ingest")
 def ingest(data: List[Measurement]):
-    """Ingest a batch of measurements ensuring unit validity."""
-    for m in data:
-        if m.unit not in UNIT_FACTORS:
-            raise HTTPException(status_code=400, detail=f"Unsupported unit: {m.unit}")
+    """Ingest a batch of measurements; any invalid row rejects the whole batch."""
+    if not data:
+        return {"count": 0, "values_kg": []}
     df = pd.DataFrame([m.dict() for m in data])
-    FEATURE_STORE.save_table(df, "measurements")
-    return {"count": len(data), "values_kg": [m.to_kg() for m in data]}
+    table = conform(pa.Table.from_pandas(df, preserve_index=False))
+    valid, rejected, errors = validate_measurements(
+        table, UNIT_FACTORS, Z_THRESHOLD, stats=STATS
+    )
+    if rejected:
+        raise HTTPException(status_code=422, detail=errors)
+    _store_valid(valid)
+    return {"count": len(data), "values_kg": to_kg(valid, UNIT_FACTORS).tolist()}
+
+
+@app.post("/ingest/bulk")
+def ingest_bulk(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, description="csv, ndjson or arrow; guessed if omitted"),
+):
+    """Stream a CSV/NDJSON/Arrow IPC upload into the feature store chunk by chunk.
+
+    Invalid rows are skipped and reported; valid chunks are written as they
+    are parsed, so a parse error part-way through reports the rows already
+    stored.
+    """
+    try:
+        fmt = detect_format(file.filename, file.content_type, format)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    count = rejected = rows = 0
+    errors: List[dict] = []
+    try:
+        for batch in read_batches(file.file, fmt):
+            valid, n_rejected, chunk_errors = validate_measurements(
+                conform(batch), UNIT_FACTORS, Z_THRESHOLD, offset=rows,
+                max_errors=20 - len(errors), stats=STATS,
+            )
+            rows += batch.num_rows
+            rejected += n_rejected
+            errors += chunk_errors
+            if valid.num_rows:
+                _store_valid(valid)
+                count += valid.num_rows
+    except (pa.ArrowInvalid, ValueError) as exc:
+        raise HTTPException(
+            status_code=400, detail={"error": str(exc), "count": count, "rejected": rejected}
+        )
+    return {"count": count, "rejected": rejected, "errors": errors}
+
+
+@app.post("/admin/compact")
+def compact(
+    tables: Optional[List[str]] = Query(None, description="Tables to compact; all if omitted"),
+    min_files: int = Query(4, ge=2),
+    vacuum: bool = True,
+):
+    """Compact the Parquet datasets and vacuum the feature store database.
+
+    DuckDB lets only one process open the database read-write, so scheduled
+    compaction (``pipelines/nightly_compaction.cron``) calls this endpoint
+    instead of opening the store itself.
+    """
+    report = compact_store(FEATURE_STORE, tables, min_files=min_files, vacuum=vacuum)
+    return report.as_dict()
 
 
 @app.on_event("shutdown")
 def shutdown_event() -> None:
-    """Close feature store connections on shutdown."""
+    """Flush pending writes and statistics and close the feature store on shutdown."""
+    STATS.save()
+    WRITER.close()
     FEATURE_STORE.close()
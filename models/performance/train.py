@@ -10,8 +10,10 @@ import mlflow
 import pandas as pd
 from joblib import dump
 
+from explainability.global_summary import compute_global_summary, save_global_summary
 from mlflow_logging import log_run
 from physics.simple_kinetics import fit_rate
+from storage.training_sets import load_training_set
 
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data" / "performance"
@@ -19,6 +21,11 @@ STORAGE_DIR = Path(__file__).resolve().parents[1] / "storage"
 
 
 def _load_dataset(route: str) -> pd.DataFrame:
+    """Latest ``performance_<route>`` training-set snapshot, else the route CSV."""
+    try:
+        return load_training_set(f"performance_{route}", drop_keys=True)
+    except FileNotFoundError:
+        pass
     path = DATA_DIR / route / "train.csv"
     if not path.exists():
         raise FileNotFoundError(f"Dataset for route '{route}' not found at {path}")
@@ -29,7 +36,9 @@ def train_route(route: str) -> Dict[str, float]:
     """Train CatBoost and LightGBM quantile regressors for a route.
 
     The trained models are stored in ``storage`` and the fitted kinetics
-    parameters ``k`` and ``n`` are returned as a dictionary.
+    parameters ``k`` and ``n`` are returned as a dictionary. A global SHAP
+    summary of the ensemble on a sample of the training set is stored and
+    logged alongside the models.
     """
     df = _load_dataset(route)
     X = df[["feature1", "feature2"]]
@@ -61,6 +70,8 @@ def train_route(route: str) -> Dict[str, float]:
         "lgbm_model": str(lgb_path),
         "kinetics": str(kin_path),
     }
+    summary = compute_global_summary([cat_model, lgb_model], X)
+    artifacts["shap_summary"] = str(save_global_summary(summary, f"performance_{route}"))
     run_id = log_run(f"performance_{route}", metrics, artifacts)
     with mlflow.start_run(run_id=run_id):
         mlflow.set_tags({"route": route, "version": "1"})
@@ -9,20 +9,31 @@ from joblib import dump, load
 from sklearn.metrics import accuracy_score, confusion_matrix
 from sklearn.tree import DecisionTreeClassifier
 
+from explainability.global_summary import compute_global_summary, save_global_summary
 from mlflow_logging import log_run
 from rules.route_rules import validate_features
+from storage.training_sets import load_training_set
 
 DATA_PATH = Path(__file__).resolve().parents[1] / "data" / "route" / "training_data.csv"
 MODEL_PATH = Path(__file__).resolve().parents[1] / "storage" / "route_model.pkl"
 
 
+def _load_dataset() -> pd.DataFrame:
+    """Latest ``route_classifier`` training-set snapshot, else the CSV."""
+    try:
+        return load_training_set("route_classifier", drop_keys=True)
+    except FileNotFoundError:
+        return pd.read_csv(DATA_PATH)
+
+
 def train() -> Dict[str, object]:
     """Train the decision tree model and evaluate its performance.
 
     Returns a dict with accuracy, confusion matrix and penalized accuracy that
-    subtracts a penalty for false negatives in critical samples.
+    subtracts a penalty for false negatives in critical samples. When ``shap``
+    is installed a global SHAP summary is stored and logged with the model.
     """
-    df = pd.read_csv(DATA_PATH)
+    df = _load_dataset()
     df = df[df.apply(lambda r: validate_features(r.to_dict()), axis=1)]
 
     X = df.drop(columns=["critical"])
@@ -41,6 +52,11 @@ def train() -> Dict[str, object]:
 
     metrics = {"accuracy": acc, "penalized_accuracy": penalized_acc}
     artifacts = {"model": str(MODEL_PATH)}
+    try:
+        summary = compute_global_summary([clf], X)
+        artifacts["shap_summary"] = str(save_global_summary(summary, "route_classifier"))
+    except ImportError:  # pragma: no cover - shap optional dependency
+        pass
     run_id = log_run("route_classifier", metrics, artifacts)
     with mlflow.start_run(run_id=run_id):
         mlflow.set_tags({"route": "route_classifier", "version": "1"})
@@ -2,11 +2,20 @@
 from __future__ import annotations
 
 import random
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Sequence
 
-from .objective import objective
-from .space import get_search_space, is_feasible
+import numpy as np
+
+from .objective import (
+    OBJECTIVE_DIRECTIONS,
+    OBJECTIVE_NAMES,
+    objective,
+    objective_metrics,
+)
+from .pareto import ParetoFront
+from .space import feasible_mask, get_search_space, is_feasible
 
 try:  # pragma: no cover - optional dependency
     import optuna
@@ -14,6 +23,11 @@ except Exception:  # pragma: no cover - optuna not installed
     optuna = None
 
 
+ObjectiveFn = Callable[[Dict[str, float]], float]
+BatchObjectiveFn = Callable[[np.ndarray, Sequence[str]], np.ndarray]
+MetricsFn = Callable[[Dict[str, float]], Sequence[float]]
+
+
 @dataclass
 class SimpleStudy:
     """Fallback study object mimicking Optuna's interface."""
@@ -21,16 +35,84 @@ class SimpleStudy:
     best_value: float
 
 
-def optimize(n_trials: int = 50):
-    """Optimise the objective returning a study-like object.
+def _feasible(batch: List[Dict[str, float]], names: Sequence[str]) -> np.ndarray:
+    """Evaluate the hard constraints for a whole batch at once."""
+    if not batch:
+        return np.zeros(0, dtype=bool)
+    X = np.array([[p[name] for name in names] for p in batch], dtype=float)
+    return feasible_mask(X, names)
 
-    If Optuna is available it is used to sample the space. Otherwise a very
-    basic random search is performed so that the system remains functional in
-    environments without the dependency installed.
+
+def _evaluate_batch(
+    batch: List[Dict[str, float]],
+    names: Sequence[str],
+    objective_fn: Callable,
+    batch_objective: Optional[Callable],
+    executor: Optional[ProcessPoolExecutor],
+) -> np.ndarray:
+    """Score a batch of feasible parameter sets.
+
+    A vectorised ``batch_objective`` takes precedence and is called once with
+    the whole batch as a matrix. Otherwise ``objective_fn`` is mapped over the
+    batch, in ``executor`` when one is given. Scalar objectives yield one
+    value per row, multi-objective ones a ``(len(batch), n_objectives)``
+    matrix.
     """
-    space = get_search_space()
+    if not batch:
+        return np.empty(0)
+    if batch_objective is not None:
+        X = np.array([[p[name] for name in names] for p in batch], dtype=float)
+        return np.asarray(batch_objective(X, names), dtype=float)
+    if executor is not None:
+        return np.asarray(list(executor.map(objective_fn, batch)), dtype=float)
+    return np.asarray([objective_fn(p) for p in batch], dtype=float)
+
 
-    if optuna is not None:
+def _evaluate_trials(study, trials, names, objective_fn, batch_objective, executor):
+    """Evaluate asked ``trials``; mark them failed in ``study`` if evaluation raises.
+
+    Without this an exception would leave the trials RUNNING in persistent
+    storage, where resumed studies would keep seeing them.
+    """
+    try:
+        return _evaluate_batch(
+            [t.params for t in trials], names, objective_fn, batch_objective, executor
+        )
+    except BaseException:
+        for trial in trials:
+            study.tell(trial, state=optuna.trial.TrialState.FAIL)
+        raise
+
+
+def _check_study_name(storage: Optional[str], study_name: Optional[str]) -> None:
+    """A persistent study needs a name, otherwise it can never be loaded again."""
+    if storage is not None and study_name is None:
+        raise ValueError("study_name is required when storage is given")
+
+
+def _optimize_optuna(
+    space: Dict[str, tuple],
+    n_trials: int,
+    batch_size: int,
+    objective_fn: ObjectiveFn,
+    batch_objective: Optional[BatchObjectiveFn],
+    executor: Optional[ProcessPoolExecutor],
+    storage: Optional[str],
+    study_name: Optional[str],
+):
+    study = optuna.create_study(
+        direction="maximize",
+        storage=storage,
+        study_name=study_name,
+        load_if_exists=storage is not None,
+    )
+    distributions = {
+        name: optuna.distributions.FloatDistribution(low, high)
+        for name, (low, high) in space.items()
+    }
+    names = list(space)
+
+    if batch_size <= 1 and batch_objective is None and executor is None:
         def _obj(trial: "optuna.Trial") -> float:
             params = {
                 name: trial.suggest_float(name, low, high)
@@ -38,21 +120,246 @@ def optimize(n_trials: int = 50):
             }
             if not is_feasible(params):
                 raise optuna.TrialPruned()
-            return objective(params)
+            return objective_fn(params)
 
-        study = optuna.create_study(direction="maximize")
         study.optimize(_obj, n_trials=n_trials)
         return study
 
-    # Fallback random search
+    # Ask/tell mode: propose ``batch_size`` trials, evaluate them together and
+    # report the results back before asking for the next batch.
+    remaining = n_trials
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        trials = [study.ask(distributions) for _ in range(size)]
+        feasible = []
+        for trial, ok in zip(trials, _feasible([t.params for t in trials], names)):
+            if ok:
+                feasible.append(trial)
+            else:
+                study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+        values = _evaluate_trials(
+            study, feasible, names, objective_fn, batch_objective, executor
+        )
+        for trial, value in zip(feasible, values):
+            study.tell(trial, float(value))
+        remaining -= size
+    return study
+
+
+def _optimize_random(
+    space: Dict[str, tuple],
+    n_trials: int,
+    batch_size: int,
+    objective_fn: ObjectiveFn,
+    batch_objective: Optional[BatchObjectiveFn],
+    executor: Optional[ProcessPoolExecutor],
+) -> SimpleStudy:
     best_params = None
     best_value = float("-inf")
-    for _ in range(n_trials):
-        params = {k: random.uniform(low, high) for k, (low, high) in space.items()}
-        if not is_feasible(params):
-            continue
-        value = objective(params)
-        if value > best_value:
-            best_value = value
-            best_params = params
+    remaining = n_trials
+    while remaining > 0:
+        size = min(max(batch_size, 1), remaining)
+        candidates = [
+            {k: random.uniform(low, high) for k, (low, high) in space.items()}
+            for _ in range(size)
+        ]
+        mask = _feasible(candidates, list(space))
+        feasible = [p for p, ok in zip(candidates, mask) if ok]
+        values = _evaluate_batch(
+            feasible, list(space), objective_fn, batch_objective, executor
+        )
+        for params, value in zip(feasible, values):
+            if value > best_value:
+                best_value = float(value)
+                best_params = params
+        remaining -= size
     return SimpleStudy(best_params, best_value)
+
+
+def optimize(
+    n_trials: int = 50,
+    batch_size: int = 1,
+    n_jobs: int = 1,
+    objective_fn: ObjectiveFn = objective,
+    batch_objective: Optional[BatchObjectiveFn] = None,
+    storage: Optional[str] = None,
+    study_name: Optional[str] = None,
+):
+    """Optimise the objective returning a study-like object.
+
+    If Optuna is available it is used to sample the space. Otherwise a very
+    basic random search is performed so that the system remains functional in
+    environments without the dependency installed.
+
+    Parameters
+    ----------
+    n_trials:
+        Total number of trials to evaluate.
+    batch_size:
+        Number of trials proposed at once. Values above one switch Optuna to
+        its ask/tell interface so each batch is evaluated together.
+    n_jobs:
+        Size of the process pool used to evaluate ``objective_fn`` in
+        parallel. Ignored when ``batch_objective`` is given.
+    objective_fn:
+        Scalar objective taking a parameter dictionary. It must be picklable
+        when ``n_jobs > 1``.
+    batch_objective:
+        Optional vectorised objective receiving a ``(batch, n_params)``
+        matrix and the parameter names, returning one score per row.
+    storage:
+        Optional Optuna storage URL (e.g. ``sqlite:///storage/optuna.db``).
+        Combined with ``study_name`` several workers can contribute trials
+        to the same persistent study.
+    study_name:
+        Name of the study inside ``storage``; required when ``storage`` is
+        given so other workers can load the same study.
+    """
+    _check_study_name(storage, study_name)
+    space = get_search_space()
+    executor = None
+    if n_jobs > 1 and batch_objective is None:
+        executor = ProcessPoolExecutor(max_workers=n_jobs)
+        batch_size = max(batch_size, n_jobs)
+
+    try:
+        if optuna is not None:
+            return _optimize_optuna(
+                space, n_trials, batch_size, objective_fn, batch_objective,
+                executor, storage, study_name,
+            )
+        # Fallback random search
+        return _optimize_random(
+            space, n_trials, batch_size, objective_fn, batch_objective, executor
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _pareto_optuna(
+    space: Dict[str, tuple],
+    n_trials: int,
+    batch_size: int,
+    metrics_fn: MetricsFn,
+    batch_metrics: Optional[Callable],
+    executor: Optional[ProcessPoolExecutor],
+    sampler: str,
+    storage: Optional[str],
+    study_name: Optional[str],
+) -> ParetoFront:
+    if sampler == "nsga2":
+        optuna_sampler = optuna.samplers.NSGAIISampler(population_size=batch_size)
+    elif sampler == "tpe":
+        optuna_sampler = optuna.samplers.TPESampler()
+    else:
+        raise ValueError("sampler must be 'nsga2' or 'tpe'")
+    study = optuna.create_study(
+        directions=list(OBJECTIVE_DIRECTIONS),
+        sampler=optuna_sampler,
+        storage=storage,
+        study_name=study_name,
+        load_if_exists=storage is not None,
+    )
+    distributions = {
+        name: optuna.distributions.FloatDistribution(low, high)
+        for name, (low, high) in space.items()
+    }
+    names = list(space)
+    remaining = n_trials
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        trials = [study.ask(distributions) for _ in range(size)]
+        feasible = []
+        for trial, ok in zip(trials, _feasible([t.params for t in trials], names)):
+            if ok:
+                feasible.append(trial)
+            else:
+                study.tell(trial, state=optuna.trial.TrialState.PRUNED)
+        values = _evaluate_trials(
+            study, feasible, names, metrics_fn, batch_metrics, executor
+        )
+        for trial, row in zip(feasible, values):
+            study.tell(trial, [float(v) for v in row])
+        remaining -= size
+
+    complete = study.get_trials(
+        deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,)
+    )
+    front = ParetoFront.from_candidates(
+        [t.params for t in complete],
+        np.array([t.values for t in complete], dtype=float),
+        OBJECTIVE_NAMES,
+        OBJECTIVE_DIRECTIONS,
+    )
+    front.metadata["study"] = study
+    return front
+
+
+def _pareto_random(
+    space: Dict[str, tuple],
+    n_trials: int,
+    batch_size: int,
+    metrics_fn: MetricsFn,
+    batch_metrics: Optional[Callable],
+    executor: Optional[ProcessPoolExecutor],
+) -> ParetoFront:
+    candidates = [
+        {k: random.uniform(low, high) for k, (low, high) in space.items()}
+        for _ in range(n_trials)
+    ]
+    mask = _feasible(candidates, list(space))
+    feasible = [p for p, ok in zip(candidates, mask) if ok]
+    rows = []
+    for start in range(0, len(feasible), max(batch_size, 1)):
+        chunk = feasible[start:start + max(batch_size, 1)]
+        rows.append(
+            _evaluate_batch(chunk, list(space), metrics_fn, batch_metrics, executor)
+        )
+    values = np.vstack(rows) if rows else np.empty((0, len(OBJECTIVE_NAMES)))
+    return ParetoFront.from_candidates(
+        feasible, values, OBJECTIVE_NAMES, OBJECTIVE_DIRECTIONS
+    )
+
+
+def optimize_pareto(
+    n_trials: int = 100,
+    batch_size: int = 20,
+    n_jobs: int = 1,
+    metrics_fn: MetricsFn = objective_metrics,
+    batch_metrics: Optional[Callable] = None,
+    sampler: str = "nsga2",
+    storage: Optional[str] = None,
+    study_name: Optional[str] = None,
+) -> ParetoFront:
+    """Search the Pareto front of extraction, acid and arsenic.
+
+    Unlike :func:`optimize` the objectives are kept separate, so the business
+    weights can be changed afterwards with :meth:`ParetoFront.select` without
+    running a new study. Optuna's NSGA-II (``sampler="nsga2"``, one
+    generation per batch) or multi-objective TPE (``"tpe"``) is used when
+    available, otherwise random search followed by non-dominated sorting.
+
+    ``metrics_fn`` returns the objective tuple for one parameter dictionary;
+    ``batch_metrics`` is its vectorised variant returning a
+    ``(batch, n_objectives)`` matrix. Remaining arguments behave as in
+    :func:`optimize`.
+    """
+    _check_study_name(storage, study_name)
+    space = get_search_space()
+    executor = None
+    if n_jobs > 1 and batch_metrics is None:
+        executor = ProcessPoolExecutor(max_workers=n_jobs)
+
+    try:
+        if optuna is not None:
+            return _pareto_optuna(
+                space, n_trials, max(batch_size, 2), metrics_fn, batch_metrics,
+                executor, sampler, storage, study_name,
+            )
+        return _pareto_random(
+            space, n_trials, batch_size, metrics_fn, batch_metrics, executor
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -1,24 +1,43 @@
 """Composite objective function combining extraction, acid usage and arsenic."""
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Optional, Sequence, Tuple
 
+import numpy as np
 
-def _combine_metrics(extraction: float, acid: float, arsenic: float) -> float:
+# Bump whenever the objective formula changes so cached studies are not reused
+OBJECTIVE_VERSION = "1"
+
+# Individual objectives and whether each one is maximised or minimised
+OBJECTIVE_NAMES: Tuple[str, ...] = ("extraction", "acid", "arsenic")
+OBJECTIVE_DIRECTIONS: Tuple[str, ...] = ("maximize", "minimize", "minimize")
+
+# Business weights used to collapse the objectives into a single score
+DEFAULT_WEIGHTS: Dict[str, float] = {"extraction": 1.0, "acid": 0.5, "arsenic": 0.2}
+
+
+def _combine_metrics(
+    extraction: float,
+    acid: float,
+    arsenic: float,
+    weights: Optional[Dict[str, float]] = None,
+) -> float:
     """Combine individual metrics into a single score.
 
     Extraction is maximised while acid consumption and arsenic content are
-    penalised. Coefficients are illustrative and can be tuned.
+    penalised. Coefficients are illustrative and can be tuned through
+    ``weights``; by default :data:`DEFAULT_WEIGHTS` is used.
     """
-    return extraction - 0.5 * acid - 0.2 * arsenic
+    w = DEFAULT_WEIGHTS if weights is None else {**DEFAULT_WEIGHTS, **weights}
+    return w["extraction"] * extraction - w["acid"] * acid - w["arsenic"] * arsenic
 
 
-def objective(params: Dict[str, float]) -> float:
-    """Toy objective using the optimisation parameters.
+def objective_metrics(params: Dict[str, float]) -> Tuple[float, float, float]:
+    """Return the individual ``(extraction, acid, arsenic)`` proxies.
 
-    In a real scenario this function would evaluate laboratory experiments or
-    a surrogate ML model. For testing purposes we derive simple proxies for
-    extraction, acid consumption and arsenic from the input parameters.
+    In a real scenario these would come from laboratory experiments or a
+    surrogate ML model. For testing purposes we derive simple proxies from
+    the input parameters.
     """
     temperature = params["temperature"]
     acid_conc = params["acid_concentration"]
@@ -27,4 +46,30 @@ def objective(params: Dict[str, float]) -> float:
     extraction = 0.8 * temperature - 0.3 * acid_conc - 2 * time
     acid = acid_conc
     arsenic = 0.1 * temperature + 0.4 * time
-    return _combine_metrics(extraction, acid, arsenic)
+    return extraction, acid, arsenic
+
+
+def objective(params: Dict[str, float]) -> float:
+    """Toy objective using the optimisation parameters.
+
+    The proxies from :func:`objective_metrics` are collapsed into a single
+    score with :func:`_combine_metrics`.
+    """
+    return _combine_metrics(*objective_metrics(params))
+
+
+def metrics_batch(X: np.ndarray, names: Sequence[str]) -> np.ndarray:
+    """Vectorised :func:`objective_metrics` returning a ``(n, 3)`` matrix."""
+    X = np.asarray(X, dtype=float)
+    cols = {name: X[:, i] for i, name in enumerate(names)}
+    return np.column_stack(objective_metrics(cols))
+
+
+def objective_batch(X: np.ndarray, names: Sequence[str]) -> np.ndarray:
+    """Vectorised counterpart of :func:`objective`.
+
+    ``X`` holds one parameter set per row with columns ordered as ``names``.
+    The whole batch is scored with array arithmetic so the optimiser can
+    evaluate many trials in a single call.
+    """
+    return _combine_metrics(*metrics_batch(X, names).T)
@@ -0,0 +1,170 @@
+"""Pareto utilities for multi-objective recipe optimisation.
+
+Objective matrices have one row per candidate and one column per objective.
+``directions`` tells for each column whether it is maximised or minimised;
+internally everything is converted to minimisation.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def _as_minimisation(F: np.ndarray, directions: Sequence[str]) -> np.ndarray:
+    F = np.asarray(F, dtype=float)
+    if F.ndim != 2 or F.shape[1] != len(directions):
+        raise ValueError("F must be a 2-D array with one column per direction")
+    signs = np.array([-1.0 if d == "maximize" else 1.0 for d in directions])
+    return F * signs
+
+
+def non_dominated_sort(F: np.ndarray, directions: Sequence[str]) -> np.ndarray:
+    """Return the non-domination rank of every row of ``F``.
+
+    Rank ``0`` is the Pareto front, rank ``1`` the front obtained after
+    removing it, and so on. Dominance is computed for all pairs at once with
+    broadcasting, so memory grows with ``len(F) ** 2``.
+    """
+    G = _as_minimisation(F, directions)
+    n = len(G)
+    ranks = np.full(n, -1, dtype=int)
+    if n == 0:
+        return ranks
+    # dominates[i, j] is True when row i dominates row j
+    leq = np.all(G[:, None, :] <= G[None, :, :], axis=2)
+    lt = np.any(G[:, None, :] < G[None, :, :], axis=2)
+    dominates = leq & lt
+    dominated_by = dominates.sum(axis=0)
+    current = 0
+    remaining = np.ones(n, dtype=bool)
+    while remaining.any():
+        front = remaining & (dominated_by == 0)
+        ranks[front] = current
+        remaining &= ~front
+        dominated_by -= dominates[front].sum(axis=0)
+        current += 1
+    return ranks
+
+
+def pareto_mask(F: np.ndarray, directions: Sequence[str]) -> np.ndarray:
+    """Return a boolean mask selecting the non-dominated rows of ``F``."""
+    return non_dominated_sort(F, directions) == 0
+
+
+def _hv_min(points: np.ndarray, ref: np.ndarray) -> float:
+    """Exact hypervolume of minimisation ``points`` bounded by ``ref``."""
+    if len(points) == 0:
+        return 0.0
+    if points.shape[1] == 1:
+        return float(ref[0] - points[:, 0].min())
+    if points.shape[1] == 2:
+        order = np.argsort(points[:, 0], kind="stable")
+        xs = points[order, 0]
+        ys = np.minimum.accumulate(points[order, 1])
+        widths = np.diff(np.append(xs, ref[0]))
+        return float(np.sum(widths * (ref[1] - ys)))
+    # Slice along the last objective and recurse on the remaining ones
+    order = np.argsort(points[:, -1], kind="stable")
+    pts = points[order]
+    bounds = np.append(pts[1:, -1], ref[-1])
+    volume = 0.0
+    for i in range(len(pts)):
+        depth = bounds[i] - pts[i, -1]
+        if depth <= 0:
+            continue
+        volume += _hv_min(pts[: i + 1, :-1], ref[:-1]) * depth
+    return float(volume)
+
+
+def hypervolume(
+    F: np.ndarray, reference: Sequence[float], directions: Sequence[str]
+) -> float:
+    """Return the hypervolume dominated by ``F`` with respect to ``reference``.
+
+    ``reference`` must be worse than every point on each objective; points not
+    strictly better than it contribute nothing.
+    """
+    G = _as_minimisation(F, directions)
+    ref = _as_minimisation(np.asarray([reference], dtype=float), directions)[0]
+    G = G[np.all(G < ref, axis=1)]
+    if len(G) == 0:
+        return 0.0
+    G = G[pareto_mask(G, ["minimize"] * G.shape[1])]
+    return _hv_min(G, ref)
+
+
+@dataclass
+class ParetoFront:
+    """Non-dominated recipes together with their objective values."""
+
+    params: List[Dict[str, float]]
+    values: np.ndarray
+    names: Tuple[str, ...]
+    directions: Tuple[str, ...]
+    n_trials: int = 0
+    metadata: Dict[str, object] = field(default_factory=dict)
+
+    @classmethod
+    def from_candidates(
+        cls,
+        params: List[Dict[str, float]],
+        values: np.ndarray,
+        names: Sequence[str],
+        directions: Sequence[str],
+    ) -> "ParetoFront":
+        """Build a front keeping only the non-dominated ``params``."""
+        values = np.asarray(values, dtype=float).reshape(len(params), len(names))
+        mask = pareto_mask(values, directions) if len(params) else np.zeros(0, bool)
+        return cls(
+            params=[p for p, keep in zip(params, mask) if keep],
+            values=values[mask],
+            names=tuple(names),
+            directions=tuple(directions),
+            n_trials=len(params),
+        )
+
+    def reference_point(self, margin: float = 0.1) -> np.ndarray:
+        """Nadir point of the front pushed outwards by ``margin`` of its range."""
+        G = _as_minimisation(self.values, self.directions)
+        span = np.ptp(G, axis=0)
+        span[span == 0] = 1.0
+        ref = G.max(axis=0) + margin * span
+        return _as_minimisation(ref[None, :], self.directions)[0]
+
+    def hypervolume(self, reference: Optional[Sequence[float]] = None) -> float:
+        """Hypervolume of the front, by default against :meth:`reference_point`."""
+        if len(self.values) == 0:
+            return 0.0
+        ref = self.reference_point() if reference is None else reference
+        return hypervolume(self.values, ref, self.directions)
+
+    def scores(self, weights: Dict[str, float]) -> np.ndarray:
+        """Weighted score of every point; minimised objectives are subtracted."""
+        signs = np.array([1.0 if d == "maximize" else -1.0 for d in self.directions])
+        w = np.array([weights.get(name, 0.0) for name in self.names])
+        return self.values @ (signs * w)
+
+    def select(self, weights: Dict[str, float]) -> Tuple[Dict[str, float], Dict[str, float], float]:
+        """Pick the trade-off maximising ``weights`` without re-optimising.
+
+        Returns the parameters, the objective values and the weighted score of
+        the chosen point.
+        """
+        if not self.params:
+            raise ValueError("Pareto front is empty")
+        scores = self.scores(weights)
+        idx = int(np.argmax(scores))
+        objectives = {n: float(v) for n, v in zip(self.names, self.values[idx])}
+        return self.params[idx], objectives, float(scores[idx])
+
+    def to_records(self) -> List[Dict[str, object]]:
+        """Return the front as a list of ``{"params", "objectives"}`` dicts."""
+        return [
+            {
+                "params": {k: float(v) for k, v in p.items()},
+                "objectives": {n: float(v) for n, v in zip(self.names, row)},
+            }
+            for p, row in zip(self.params, self.values)
+        ]
@@ -1,7 +1,20 @@
 """Parameter search space and hard constraints for optimization."""
 from __future__ import annotations
 
-from typing import Dict, Tuple
+from pathlib import Path
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+from validation.constraints import ConstraintSet, load_constraints
+
+CONSTRAINTS_PATH = Path(__file__).with_name("constraints.json")
+
+# Hard constraints compiled from ``constraints.json``
+SPACE_CONSTRAINTS: ConstraintSet = load_constraints(CONSTRAINTS_PATH)
+
+# Changes whenever the constraint spec changes so cached studies are not reused
+CONSTRAINTS_VERSION = SPACE_CONSTRAINTS.fingerprint()
 
 
 def get_search_space() -> Dict[str, Tuple[float, float]]:
@@ -20,12 +33,14 @@ def get_search_space() -> Dict[str, Tuple[float, float]]:
 def is_feasible(params: Dict[str, float]) -> bool:
     """Return ``True`` if a parameter set satisfies all hard constraints.
 
-    The constraints encode domain knowledge that must not be violated.
-    For example, acid concentration should not exceed twice the extraction
-    time and extreme acid levels are disallowed at low temperature.
+    The constraints encode domain knowledge that must not be violated and
+    are declared in ``constraints.json``. For example, acid concentration
+    should not exceed twice the extraction time and extreme acid levels are
+    disallowed at low temperature.
     """
-    if params["acid_concentration"] > 2 * params["extraction_time"]:
-        return False
-    if params["temperature"] < 70 and params["acid_concentration"] > 5:
-        return False
-    return True
+    return bool(SPACE_CONSTRAINTS.feasible(params)[0])
+
+
+def feasible_mask(X: np.ndarray, names: Sequence[str]) -> np.ndarray:
+    """Vectorised :func:`is_feasible` over a ``(n, len(names))`` matrix."""
+    return SPACE_CONSTRAINTS.feasible(X, names)
@@ -0,0 +1,152 @@
+"""Persistent, warm-started recommendation studies.
+
+Studies are keyed by a hash of the search space, the constraint version and
+the objective version. Repeated requests reuse the stored trials: if the
+study already holds ``n_trials`` finished trials its best result is returned
+without evaluating anything, and larger requests only run the missing trials.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .bayes_opt import SimpleStudy, optimize
+from .objective import OBJECTIVE_VERSION, objective
+from .space import CONSTRAINTS_VERSION, get_search_space, is_feasible
+
+try:  # pragma: no cover - optional dependency
+    import optuna
+except Exception:  # pragma: no cover - optuna not installed
+    optuna = None
+
+STORAGE_DIR = Path(__file__).resolve().parents[1] / "storage"
+STUDY_STORAGE = os.getenv(
+    "OPTUNA_STORAGE", f"sqlite:///{STORAGE_DIR / 'optuna_studies.db'}"
+)
+FALLBACK_DIR = STORAGE_DIR / "studies"
+
+
+def study_key(
+    space: Optional[Dict[str, tuple]] = None,
+    constraints_version: str = CONSTRAINTS_VERSION,
+    objective_version: str = OBJECTIVE_VERSION,
+) -> str:
+    """Return a short hash identifying the optimisation problem."""
+    space = get_search_space() if space is None else space
+    payload = json.dumps(
+        {
+            "space": {k: list(v) for k, v in sorted(space.items())},
+            "constraints": constraints_version,
+            "objective": objective_version,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def warm_start_from_history(
+    history: Iterable[Dict[str, object]],
+    space: Optional[Dict[str, tuple]] = None,
+) -> List[Dict[str, float]]:
+    """Extract warm-start parameter sets from scheduler history.
+
+    Only runs with a registered outcome whose features cover every parameter
+    of the search space within its bounds are kept.
+    """
+    space = get_search_space() if space is None else space
+    params_list = []
+    for entry in history:
+        if "outcome" not in entry:
+            continue
+        features = entry.get("features", {})
+        try:
+            params = {name: float(features[name]) for name in space}
+        except (KeyError, TypeError, ValueError):
+            continue
+        if all(low <= params[n] <= high for n, (low, high) in space.items()):
+            params_list.append(params)
+    return params_list
+
+
+def _finished_trials(study) -> int:
+    states = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+    return len(study.get_trials(deepcopy=False, states=states))
+
+
+def _optuna_study(
+    n_trials: int, key: str, warm_start: List[Dict[str, float]], storage: str
+):
+    study_name = f"recipes-{key}"
+    study = optuna.create_study(
+        direction="maximize",
+        storage=storage,
+        study_name=study_name,
+        load_if_exists=True,
+    )
+    for params in warm_start:
+        study.enqueue_trial(params, skip_if_exists=True)
+    waiting = len(
+        study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.WAITING,))
+    )
+    remaining = max(n_trials - _finished_trials(study), waiting)
+    if remaining > 0:
+        study = optimize(n_trials=remaining, storage=storage, study_name=study_name)
+    return study
+
+
+def _fallback_study(
+    n_trials: int, key: str, warm_start: List[Dict[str, float]]
+) -> SimpleStudy:
+    path = FALLBACK_DIR / f"{key}.json"
+    state = {"n_trials": 0, "best_params": None, "best_value": float("-inf"), "seen": []}
+    if path.exists():
+        state.update(json.loads(path.read_text()))
+
+    candidates = []
+    for params in warm_start:
+        marker = json.dumps(params, sort_keys=True)
+        if marker not in state["seen"] and is_feasible(params):
+            state["seen"].append(marker)
+            candidates.append((params, objective(params)))
+    remaining = n_trials - state["n_trials"]
+    if remaining > 0:
+        result = optimize(n_trials=remaining)
+        state["n_trials"] += remaining
+        if result.best_params is not None:
+            candidates.append((result.best_params, result.best_value))
+    for params, value in candidates:
+        if value > state["best_value"]:
+            state["best_params"], state["best_value"] = params, float(value)
+
+    if candidates:
+        FALLBACK_DIR.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(state))
+    return SimpleStudy(state["best_params"], state["best_value"])
+
+
+def cached_optimize(
+    n_trials: int = 50,
+    warm_start: Optional[Iterable[Dict[str, float]]] = None,
+    storage: Optional[str] = None,
+):
+    """Optimise reusing the persisted study for the current problem.
+
+    Parameters
+    ----------
+    n_trials:
+        Total number of finished trials the study should hold. Requests at or
+        below the stored count are answered from the cache.
+    warm_start:
+        Parameter sets to evaluate first, e.g. from
+        :func:`warm_start_from_history`. Each distinct set is enqueued once.
+    storage:
+        Optuna storage URL; defaults to :data:`STUDY_STORAGE`.
+    """
+    key = study_key()
+    warm = list(warm_start or [])
+    if optuna is not None:
+        return _optuna_study(n_trials, key, warm, storage or STUDY_STORAGE)
+    return _fallback_study(n_trials, key, warm)
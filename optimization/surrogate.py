@@ -0,0 +1,100 @@
+"""Surrogate objective backed by the trained performance ensemble.
+
+The toy formula in :mod:`optimization.objective` stands in for laboratory
+results. :class:`SurrogateObjective` replaces it with the per-route models of
+:mod:`ensemble.performance_predictor` (boosted trees averaged with the fitted
+kinetics), evaluating a whole batch of candidate recipes per call.
+"""
+from __future__ import annotations
+
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from ensemble.performance_predictor import (
+    _load_kinetics,
+    _load_models,
+    predict_performance_batch,
+)
+
+from .objective import OBJECTIVE_NAMES, _combine_metrics
+
+
+class SurrogateObjective:
+    """Batched objective evaluating extraction, acid and arsenic models.
+
+    Parameters
+    ----------
+    route:
+        Process route the recipe is optimised for.
+    targets:
+        Mapping of objective name to the model identifier passed to the
+        ensemble. Defaults to ``"<route>_<objective>"`` for each of
+        :data:`~optimization.objective.OBJECTIVE_NAMES`.
+    fixed_features:
+        Features that do not change during the search, e.g. the mineralogy
+        of the lote. They are broadcast to every candidate row.
+    feature_map:
+        Optional renaming of optimiser parameters to model feature names.
+    time:
+        Time used by the kinetics models. When ``time_param`` names one of
+        the optimised parameters its per-row value is used instead.
+    time_param:
+        Name of the parameter holding the leaching time, if any.
+    weights:
+        Business weights for :func:`~optimization.objective._combine_metrics`.
+    """
+
+    def __init__(
+        self,
+        route: str,
+        targets: Optional[Mapping[str, str]] = None,
+        fixed_features: Optional[Mapping[str, float]] = None,
+        feature_map: Optional[Mapping[str, str]] = None,
+        time: float = 1.0,
+        time_param: Optional[str] = None,
+        weights: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.route = route
+        self.targets = dict(targets or {n: f"{route}_{n}" for n in OBJECTIVE_NAMES})
+        missing = [n for n in OBJECTIVE_NAMES if n not in self.targets]
+        if missing:
+            raise ValueError(f"Missing target models for: {missing}")
+        self.fixed_features = dict(fixed_features or {})
+        self.feature_map = dict(feature_map or {})
+        self.time = time
+        self.time_param = time_param
+        self.weights = weights
+
+    def preload(self) -> "SurrogateObjective":
+        """Load every target model into memory ahead of the first batch."""
+        for model_id in self.targets.values():
+            _load_models(model_id)
+            _load_kinetics(model_id)
+        return self
+
+    def _frame(self, X: np.ndarray, names: Sequence[str]) -> pd.DataFrame:
+        df = pd.DataFrame(np.asarray(X, dtype=float), columns=list(names))
+        df = df.rename(columns=self.feature_map)
+        for name, value in self.fixed_features.items():
+            df[name] = value
+        return df
+
+    def metrics(self, X: np.ndarray, names: Sequence[str]) -> np.ndarray:
+        """Return a ``(len(X), 3)`` matrix of extraction, acid and arsenic."""
+        df = self._frame(X, names)
+        if self.time_param is not None:
+            time = np.asarray(X, dtype=float)[:, list(names).index(self.time_param)]
+        else:
+            time = self.time
+        return np.column_stack(
+            [
+                predict_performance_batch(self.targets[n], df, time)
+                for n in OBJECTIVE_NAMES
+            ]
+        )
+
+    def __call__(self, X: np.ndarray, names: Sequence[str]) -> np.ndarray:
+        """Return the combined score of every row of ``X``."""
+        return _combine_metrics(*self.metrics(X, names).T, weights=self.weights)
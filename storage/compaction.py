@@ -0,0 +1,320 @@
+"""
+Compaction of feature store Parquet datasets and databases.
+
+Frequent small ingests leave many tiny part files in each partition of the
+Parquet mirror, which slows down every scan. :func:`compact_dataset` merges
+the small files of a partition into files of about ``target_file_bytes``,
+rewritten sorted by the usual filter keys so row-group statistics prune
+well. :func:`compact_store` does this for every table of a store and then
+runs ``CHECKPOINT``/``VACUUM ANALYZE`` on DuckDB (``VACUUM ANALYZE`` on
+PostgreSQL), reporting files and bytes before and after.
+
+Compaction must not break concurrent readers of the dataset. With a
+:class:`FileSwap` the merged files are swapped in under a lock shared with
+readers listing the dataset, and the originals are only deleted after a
+grace period, so queries planned before the swap can still read them.
+
+DuckDB allows a single read-write process per database file, so compaction
+runs in the process that owns the store: through
+:meth:`DuckDBFeatureStore.compact`, the ingestion service's
+``POST /admin/compact`` (called nightly by
+``pipelines/nightly_compaction.cron``) or automatically once a table's
+dataset exceeds ``auto_compact_files`` part files. The command line::
+
+    python -m storage.compaction --db storage/feature_store.duckdb
+
+is only for maintenance while no service has the database open.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+SORT_KEYS = ("lote_id", "muestra_id", "run_id", "timestamp")
+
+
+@dataclass
+class CompactionReport:
+    """Files and bytes of the compacted datasets (and database) before and after."""
+
+    files_before: int = 0
+    files_after: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    db_bytes_before: int = 0
+    db_bytes_after: int = 0
+    partitions_compacted: int = 0
+
+    def __add__(self, other: "CompactionReport") -> "CompactionReport":
+        totals = (a + b for a, b in zip(asdict(self).values(), asdict(other).values()))
+        return CompactionReport(*totals)
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+def dataset_files(dataset_dir: Path) -> List[Path]:
+    """Part files of a (possibly hive-partitioned) dataset."""
+    return sorted(Path(dataset_dir).glob("**/*.parquet"))
+
+
+def count_files(dataset_dir: Path) -> int:
+    return len(dataset_files(dataset_dir))
+
+
+def _size(paths: Sequence[Path]) -> int:
+    return sum(p.stat().st_size for p in paths)
+
+
+class FileSwap:
+    """Swap merged part files in for the originals without breaking readers.
+
+    Readers list a dataset through :meth:`live_files`. A compaction moves the
+    merged files in and retires the originals under the same lock, so a
+    listing holds either the originals or the merged files, never both.
+    Retired files stay on disk for ``grace_seconds`` so queries that listed
+    them before the swap can finish, and are then deleted by :meth:`purge`.
+    The retired files are recorded in ``<root>/.retired.json`` so they stay
+    hidden after a restart until purged.
+    """
+
+    def __init__(self, root: Path, grace_seconds: float = 600.0) -> None:
+        self.root = Path(root)
+        self.grace_seconds = grace_seconds
+        self._path = self.root / ".retired.json"
+        self._lock = threading.Lock()
+        self._retired: Dict[str, float] = (
+            json.loads(self._path.read_text()) if self._path.exists() else {}
+        )
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        return os.path.abspath(path)
+
+    def _save(self) -> None:
+        if not self._retired:
+            self._path.unlink(missing_ok=True)
+            return
+        tmp = self._path.with_name(f"{self._path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps(self._retired))
+        tmp.replace(self._path)
+
+    def live_files(self, dataset_dir: Path) -> List[Path]:
+        """Part files of ``dataset_dir`` that have not been retired."""
+        with self._lock:
+            return [p for p in dataset_files(dataset_dir) if self._key(p) not in self._retired]
+
+    def swap(self, moves: Sequence[Tuple[Path, Path]], retired: Sequence[Path]) -> None:
+        """Move ``(source, destination)`` files in and retire ``retired`` at once."""
+        with self._lock:
+            for source, destination in moves:
+                source.replace(destination)
+            now = time.time()
+            self._retired.update({self._key(p): now for p in retired})
+            self._save()
+
+    def purge(self, force: bool = False) -> int:
+        """Delete files retired more than ``grace_seconds`` ago (all with ``force``)."""
+        cutoff = time.time() - (0.0 if force else self.grace_seconds)
+        with self._lock:
+            expired = [key for key, retired_at in self._retired.items() if retired_at <= cutoff]
+            for key in expired:
+                Path(key).unlink(missing_ok=True)
+                del self._retired[key]
+            if expired:
+                self._save()
+        return len(expired)
+
+
+def compact_partition(
+    conn,
+    files: Sequence[Path],
+    target_dir: Path,
+    sort_by: Sequence[str] = SORT_KEYS,
+    target_file_bytes: int = 128 * 1024 * 1024,
+    row_group_size: int = 122_880,
+    scratch_root: Optional[Path] = None,
+    swap: Optional[FileSwap] = None,
+) -> List[Path]:
+    """Merge ``files`` into sorted files of about ``target_file_bytes`` in ``target_dir``.
+
+    The merged files are written to a scratch directory under
+    ``scratch_root`` (which must be on the same filesystem and outside the
+    dataset) and moved into ``target_dir``, so a failure never loses data.
+    With ``swap`` the move retires the originals for a later
+    :meth:`FileSwap.purge`; without it they are deleted right away and
+    readers may briefly see both copies.
+    """
+    sources = ", ".join(f"'{p.as_posix()}'" for p in files)
+    relation = f"read_parquet([{sources}], union_by_name = true, hive_partitioning = false)"
+    columns = {row[0] for row in conn.execute(f"DESCRIBE SELECT * FROM {relation}").fetchall()}
+    keys = [f'"{c}"' for c in sort_by if c in columns]
+    order = f" ORDER BY {', '.join(keys)}" if keys else ""
+    scratch = Path(scratch_root or target_dir.parent) / f".compact-{uuid.uuid4().hex}"
+    try:
+        conn.execute(
+            f"COPY (SELECT * FROM {relation}{order}) TO '{scratch.as_posix()}' "
+            f"(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {row_group_size}, "
+            f"FILE_SIZE_BYTES {int(target_file_bytes)}, FILENAME_PATTERN 'part-{{uuid}}')"
+        )
+        moves = [(path, target_dir / path.name) for path in sorted(scratch.glob("*.parquet"))]
+        if swap is None:
+            for source, destination in moves:
+                source.replace(destination)
+        else:
+            swap.swap(moves, files)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    if swap is None:
+        for path in files:
+            path.unlink(missing_ok=True)
+    return [destination for _, destination in moves]
+
+
+def compact_dataset(
+    conn,
+    dataset_dir: Path,
+    sort_by: Sequence[str] = SORT_KEYS,
+    target_file_bytes: int = 128 * 1024 * 1024,
+    min_files: int = 4,
+    swap: Optional[FileSwap] = None,
+) -> CompactionReport:
+    """Compact every partition of ``dataset_dir`` holding at least ``min_files`` small files.
+
+    Files of half the target size or more are left untouched. With ``swap``
+    only live files are considered and expired retired files are purged
+    first.
+    """
+    if swap is not None:
+        swap.purge()
+    listing = dataset_files if swap is None else swap.live_files
+    files = listing(dataset_dir)
+    report = CompactionReport(files_before=len(files), bytes_before=_size(files))
+    partitions: Dict[Path, List[Path]] = {}
+    for path in files:
+        if path.stat().st_size < target_file_bytes // 2:
+            partitions.setdefault(path.parent, []).append(path)
+    for directory, small in partitions.items():
+        if len(small) >= min_files:
+            compact_partition(
+                conn, small, directory, sort_by, target_file_bytes,
+                scratch_root=Path(dataset_dir).parent, swap=swap,
+            )
+            report.partitions_compacted += 1
+    files = listing(dataset_dir)
+    report.files_after, report.bytes_after = len(files), _size(files)
+    return report
+
+
+def _datasets(parquet_dir: Path) -> List[Path]:
+    """Table datasets under ``parquet_dir``, including the timeseries ones."""
+    found = []
+    for path in sorted(parquet_dir.iterdir()) if parquet_dir.exists() else []:
+        if not path.is_dir() or path.name.startswith("."):
+            continue
+        if path.name == "timeseries":
+            found += _datasets(path)
+        else:
+            found.append(path)
+    return found
+
+
+def _vacuum_duckdb(store) -> CompactionReport:
+    db_path = Path(store.db_path)
+    before = db_path.stat().st_size if db_path.exists() else 0
+    with store._write_lock:
+        cur = store.cursor()
+        cur.execute("CHECKPOINT")
+        cur.execute("VACUUM ANALYZE")
+    after = db_path.stat().st_size if db_path.exists() else 0
+    return CompactionReport(db_bytes_before=before, db_bytes_after=after)
+
+
+def _vacuum_postgres(store, tables: Sequence[str]) -> CompactionReport:
+    with store.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for name in tables:
+            conn.exec_driver_sql(f"VACUUM (ANALYZE) {store._relation(name)}")
+    return CompactionReport()
+
+
+def compact_store(
+    store,
+    tables: Optional[Sequence[str]] = None,
+    sort_by: Sequence[str] = SORT_KEYS,
+    target_file_bytes: int = 128 * 1024 * 1024,
+    min_files: int = 4,
+    vacuum: bool = True,
+) -> CompactionReport:
+    """Compact the Parquet datasets of ``store`` and vacuum its database.
+
+    Supports :class:`DuckDBFeatureStore` (Parquet compaction plus
+    ``CHECKPOINT``/``VACUUM ANALYZE``) and :class:`PostgresFeatureStore`
+    (``VACUUM (ANALYZE)`` per table); other stores are left untouched.
+    """
+    from storage.feature_store import DuckDBFeatureStore, PostgresFeatureStore
+
+    report = CompactionReport()
+    if isinstance(store, DuckDBFeatureStore):
+        for dataset in _datasets(Path(store.parquet_dir)):
+            if tables is not None and dataset.name not in tables:
+                continue
+            with store._write_lock:
+                report = report + compact_dataset(
+                    store.cursor(), dataset, sort_by, target_file_bytes, min_files,
+                    swap=store._file_swap,
+                )
+        if vacuum:
+            report = report + _vacuum_duckdb(store)
+    elif isinstance(store, PostgresFeatureStore) and vacuum:
+        report = report + _vacuum_postgres(store, tables or store.list_tables())
+    return report
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    from storage.feature_store import DuckDBFeatureStore
+
+    parser = argparse.ArgumentParser(
+        description="Compact the DuckDB feature store (stop services using it first)"
+    )
+    parser.add_argument("--db", default="storage/feature_store.duckdb")
+    parser.add_argument("--parquet", default="storage/parquet")
+    parser.add_argument("--tables", nargs="*", default=None)
+    parser.add_argument("--min-files", type=int, default=4)
+    parser.add_argument("--target-mb", type=int, default=128)
+    args = parser.parse_args(argv)
+
+    store = DuckDBFeatureStore(Path(args.db), Path(args.parquet))
+    try:
+        report = compact_store(
+            store, args.tables, target_file_bytes=args.target_mb * 1024 * 1024,
+            min_files=args.min_files,
+        )
+    finally:
+        store.close()
+    for key, value in report.as_dict().items():
+        print(f"{key}: {value}")
+    return report.as_dict()
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
+
+
+__all__ = [
+    "CompactionReport",
+    "FileSwap",
+    "SORT_KEYS",
+    "compact_dataset",
+    "compact_partition",
+    "compact_store",
+    "count_files",
+]
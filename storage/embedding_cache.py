@@ -0,0 +1,183 @@
+"""
+Content-addressed cache of genomic k‑mer counts and embeddings.
+
+Entries are keyed by the SHA‑256 of the sequencing file's bytes plus the
+featurization settings (``k``, ``n_features``, ``canonical``) and, for
+embeddings, the version of the fitted reducer. Renaming or re-uploading an
+unchanged file therefore hits the cache, while any change to the content or
+the settings produces a new key. Sparse counts are stored as ``.npz`` and
+embeddings as ``.npy`` files; the total size is bounded by evicting the
+least recently used entries (tracked through file modification times).
+The total size is tracked incrementally; the directory is only rescanned
+when the tracked total exceeds the budget.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from scipy import sparse
+
+PathLike = Union[str, Path]
+
+CACHE_DIR = Path(
+    os.getenv(
+        "EMBEDDING_CACHE_DIR", Path(__file__).resolve().parent / "embedding_cache"
+    )
+)
+MAX_CACHE_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# In-progress writes; never matched by the entry globs below
+_TMP_SUFFIX = ".tmp"
+_ENTRIES = "*/*.np[yz]"
+# Temp files older than this are left over from crashed writers
+_STALE_TMP_SECONDS = 3600
+
+
+def file_digest(path: PathLike, block_size: int = 1 << 20) -> str:
+    """SHA‑256 of the file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """Size-bounded LRU cache of per-sample counts and embeddings on disk."""
+
+    def __init__(self, root: PathLike = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+
+    @staticmethod
+    def counts_key(digest: str, k: int, n_features: int, canonical: bool = False) -> str:
+        return f"{digest}-k{k}-f{n_features}-{'c' if canonical else 'f'}"
+
+    @classmethod
+    def embedding_key(
+        cls, digest: str, k: int, n_features: int, reducer_version: str, canonical: bool = False
+    ) -> str:
+        return f"{cls.counts_key(digest, k, n_features, canonical)}-{reducer_version}"
+
+    def _path(self, key: str, suffix: str) -> Path:
+        # Two-level fan-out keeps directories small
+        return self.root / key[:2] / f"{key}{suffix}"
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:  # pragma: no cover - evicted concurrently
+            pass
+
+    def _write(self, path: Path, write) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=_TMP_SUFFIX)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                write(fh)
+            added = os.path.getsize(tmp)
+            try:
+                added -= path.stat().st_size
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        with self._lock:
+            if self._total is not None:
+                self._total += added
+            over = self._total is None or self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    def get_counts(self, key: str) -> Optional[sparse.csr_matrix]:
+        path = self._path(key, ".npz")
+        try:
+            counts = sparse.load_npz(path).tocsr()
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        self._touch(path)
+        return counts
+
+    def put_counts(self, key: str, counts: sparse.spmatrix) -> None:
+        matrix = sparse.csr_matrix(counts)
+        self._write(self._path(key, ".npz"), lambda fh: sparse.save_npz(fh, matrix))
+
+    def get_embedding(self, key: str) -> Optional[np.ndarray]:
+        path = self._path(key, ".npy")
+        try:
+            embedding = np.load(path, allow_pickle=False)
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        self._touch(path)
+        return embedding
+
+    def put_embedding(self, key: str, embedding: np.ndarray) -> None:
+        self._write(self._path(key, ".npy"), lambda fh: np.save(fh, np.asarray(embedding)))
+
+    def size(self) -> int:
+        """Total bytes currently stored."""
+        return sum(p.stat().st_size for p in self.root.glob(_ENTRIES))
+
+    def evict(self) -> int:
+        """Delete least recently used entries until under ``max_bytes``.
+
+        Rescans the directory (also dropping stale temp files of crashed
+        writers) and resets the tracked total. Returns the bytes freed.
+        """
+        stale = time.time() - _STALE_TMP_SECONDS
+        for tmp in self.root.glob(f"*/*{_TMP_SUFFIX}"):
+            try:
+                if tmp.stat().st_mtime < stale:
+                    tmp.unlink()
+            except FileNotFoundError:  # pragma: no cover - finished concurrently
+                pass
+        entries = []
+        for path in self.root.glob(_ENTRIES):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # pragma: no cover - removed concurrently
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total - freed <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            freed += size
+        with self._lock:
+            self._total = total - freed
+        return freed
+
+    def clear(self) -> None:
+        for path in self.root.glob(_ENTRIES):
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._total = 0
+
+
+_DEFAULT: Optional[EmbeddingCache] = None
+
+
+def default_cache() -> EmbeddingCache:
+    """Process-wide cache under :data:`CACHE_DIR`."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = EmbeddingCache()
+    return _DEFAULT
+
+
+__all__ = ["CACHE_DIR", "EmbeddingCache", "default_cache", "file_digest"]
@@ -3,26 +3,182 @@ Feature store interfaces and implementations.
 
 Provides an abstract interface for persisting tabular and time series data
 along with concrete implementations for DuckDB, PostgreSQL and Google Sheets.
+
+Stores accept pandas DataFrames as well as Arrow tables, record batches and
+``RecordBatchReader`` streams (see :data:`TableLike`) and read back Arrow
+(:meth:`AbstractFeatureStore.scan`, :meth:`AbstractFeatureStore.scan_batches`).
+Arrow data is handed to DuckDB and the Parquet writer without conversion;
+pandas is only produced where a backend or caller needs it.
 """
 
+import shutil
+import threading
+import uuid
 from abc import ABC, abstractmethod
+from datetime import date
 from pathlib import Path
-from typing import Optional
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+)
 
 import pandas as pd
 
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pyarrow as pa
+
+    from storage.online_store import OnlineFeatureStore
+
+# A filter is ``(column, operator, value)``; ``value`` is a sequence for "in"/"not in"
+Filter = Tuple[str, str, Any]
+
+FILTER_OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "in", "not in")
+
+# Anything ``save_table`` accepts
+TableLike = Union[pd.DataFrame, "pa.Table", "pa.RecordBatch", "pa.RecordBatchReader"]
+
+
+def column_names(data: TableLike) -> List[str]:
+    """Column names of a DataFrame or Arrow table/batch/stream."""
+    if isinstance(data, pd.DataFrame):
+        return [str(c) for c in data.columns]
+    return list(data.schema.names)
+
+
+def to_arrow(data: TableLike) -> "pa.Table":
+    """``data`` as an Arrow table; Arrow input is wrapped without copying."""
+    import pyarrow as pa
+
+    if isinstance(data, pa.Table):
+        return data
+    if isinstance(data, pa.RecordBatch):
+        return pa.Table.from_batches([data])
+    if isinstance(data, pa.RecordBatchReader):
+        return data.read_all()
+    return pa.Table.from_pandas(data, preserve_index=False)
+
+
+def to_pandas(data: TableLike) -> pd.DataFrame:
+    """``data`` as a DataFrame (DataFrames are returned unchanged)."""
+    if isinstance(data, pd.DataFrame):
+        return data
+    return to_arrow(data).to_pandas()
+
+
+def _chunks(data: TableLike, max_rows: int) -> Iterator[Union[pd.DataFrame, "pa.Table"]]:
+    """Yield ``data`` whole, or a stream as tables of about ``max_rows`` rows.
+
+    A ``RecordBatchReader`` is consumed incrementally so it is never fully
+    materialised; an empty stream still yields one empty table.
+    """
+    import pyarrow as pa
+
+    if not isinstance(data, pa.RecordBatchReader):
+        yield data if isinstance(data, pd.DataFrame) else to_arrow(data)
+        return
+    batches, rows, emitted = [], 0, False
+    for batch in data:
+        batches.append(batch)
+        rows += batch.num_rows
+        if rows >= max_rows:
+            yield pa.Table.from_batches(batches, data.schema)
+            batches, rows, emitted = [], 0, True
+    if batches or not emitted:
+        yield pa.Table.from_batches(batches, data.schema)
+
+
+def _sorted(data: TableLike, column: str) -> Union[pd.DataFrame, "pa.Table"]:
+    if isinstance(data, pd.DataFrame):
+        return data.sort_values(column)
+    return to_arrow(data).sort_by(column)
+
+
+def _check_filters(filters: Optional[Sequence[Filter]]) -> List[Filter]:
+    checked = []
+    for column, op, value in filters or ():
+        op = "=" if op == "==" else op.lower()
+        if op not in FILTER_OPERATORS:
+            raise ValueError(f"Unsupported filter operator: {op}")
+        if op in ("in", "not in"):
+            value = list(value)
+        checked.append((column, op, value))
+    return checked
+
+
+def _sql_where(
+    filters: Sequence[Filter], quote: Callable[[str], str], param: Callable[[int], str]
+) -> Tuple[str, List[Any]]:
+    """Render checked filters as a parametrised ``WHERE`` clause.
+
+    ``param(i)`` returns the placeholder of the ``i``-th bound value.
+    """
+    clauses, params = [], []
+    for column, op, value in filters:
+        if op in ("in", "not in"):
+            if not value:
+                clauses.append("FALSE" if op == "in" else "TRUE")
+                continue
+            marks = []
+            for item in value:
+                marks.append(param(len(params)))
+                params.append(item)
+            clauses.append(f"{quote(column)} {op.upper()} ({', '.join(marks)})")
+        else:
+            clauses.append(f"{quote(column)} {op} {param(len(params))}")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _filter_frame(df: pd.DataFrame, filters: Sequence[Filter]) -> pd.DataFrame:
+    """Apply checked filters in pandas for backends without pushdown."""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        col = df[column]
+        if op == "in":
+            mask &= col.isin(value)
+        elif op == "not in":
+            mask &= ~col.isin(value)
+        else:
+            mask &= {
+                "=": col.__eq__, "!=": col.__ne__, "<": col.__lt__,
+                "<=": col.__le__, ">": col.__gt__, ">=": col.__ge__,
+            }[op](value)
+    return df[mask]
+
+
+def _duckdb_quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
 
 class AbstractFeatureStore(ABC):
     """Abstract feature store interface."""
 
+    online_store: Optional["OnlineFeatureStore"] = None
+    online_entity_col: str = "muestra_id"
+
+    def attach_online_store(
+        self, online_store: "OnlineFeatureStore", entity_col: str = "muestra_id"
+    ) -> None:
+        """Publish the latest row per entity of every saved table to ``online_store``."""
+        self.online_store = online_store
+        self.online_entity_col = entity_col
+
+    def _publish_online(self, data: TableLike) -> None:
+        if self.online_store is None or self.online_entity_col not in column_names(data):
+            return
+        self.online_store.update_from_frame(to_pandas(data), self.online_entity_col)
+
     @abstractmethod
-    def save_table(self, df: pd.DataFrame, name: str) -> None:
-        """Persist a DataFrame as a named table."""
+    def save_table(self, data: TableLike, name: str) -> None:
+        """Persist a DataFrame or Arrow data as a named table."""
         raise NotImplementedError
 
     @abstractmethod
-    def save_timeseries(self, df: pd.DataFrame, name: str, timestamp_col: str) -> None:
-        """Persist a time series DataFrame sorted by timestamp."""
+    def save_timeseries(self, data: TableLike, name: str, timestamp_col: str) -> None:
+        """Persist a time series sorted by timestamp."""
+        raise NotImplementedError
+
+    def replace_table(self, data: TableLike, name: str) -> None:
+        """Overwrite the named table with ``data`` instead of appending to it."""
         raise NotImplementedError
 
     @abstractmethod
@@ -30,81 +186,532 @@ class AbstractFeatureStore(ABC):
         """Close connections if necessary."""
         raise NotImplementedError
 
+    def list_tables(self) -> List[str]:
+        """Names of the stored tables."""
+        raise NotImplementedError
+
+    def scan(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        limit: Optional[int] = None,
+    ) -> "pa.Table":
+        """Read a table as Arrow, keeping only ``columns`` and matching rows.
+
+        ``filters`` are ``(column, op, value)`` tuples combined with ``AND``;
+        ``op`` is one of :data:`FILTER_OPERATORS`. Backends push projection,
+        filters and limit down to the storage engine where possible.
+        """
+        raise NotImplementedError
+
+    def load_table(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        limit: Optional[int] = None,
+        as_arrow: bool = False,
+    ):
+        """Like :meth:`scan` but returns a pandas DataFrame unless ``as_arrow``."""
+        table = self.scan(name, columns=columns, filters=filters, limit=limit)
+        return table if as_arrow else table.to_pandas()
+
+    def scan_batches(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        batch_size: int = 122_880,
+    ) -> "pa.RecordBatchReader":
+        """Stream a scan as record batches of at most ``batch_size`` rows."""
+        import pyarrow as pa
+
+        table = self.scan(name, columns=columns, filters=filters)
+        return pa.RecordBatchReader.from_batches(table.schema, table.to_batches(batch_size))
+
 
 class DuckDBFeatureStore(AbstractFeatureStore):
-    """Persist data to DuckDB and accompanying Parquet files."""
+    """Persist data to DuckDB and accompanying Parquet files.
+
+    Every :meth:`save_table` call appends a batch to the DuckDB table and
+    writes it as new part files of a hive-partitioned Parquet dataset under
+    ``parquet_dir/<name>/``, e.g. ``ingest_date=2024-05-01/part-<uuid>.parquet``.
+    Existing files are never rewritten, so the mirror keeps the full history
+    and can be queried with partition pruning through :meth:`parquet_relation`.
+    Small part files are merged by :meth:`compact`, automatically once a
+    table reaches ``auto_compact_files`` files when that is set. Parquet
+    reads list the dataset through a :class:`~storage.compaction.FileSwap`,
+    so they never see merged and original files together, and replaced files
+    are deleted ``compaction_grace_seconds`` after the swap.
+
+    Arrow tables are scanned by DuckDB in place (no conversion through
+    pandas) and ``RecordBatchReader`` streams are written ``row_group_size``
+    rows at a time, so a large upload is never materialised at once.
+
+    The store is safe to share between threads: each thread queries through
+    its own cursor (:meth:`cursor`), DataFrames are registered under unique
+    view names and writes are serialised by a lock. To batch many small
+    concurrent writes into fewer inserts, put a
+    :class:`~storage.write_queue.BatchingWriter` in front of it.
+    """
 
     def __init__(self, db_path: Path = Path("storage/feature_store.duckdb"),
-                 parquet_dir: Path = Path("storage/parquet")) -> None:
+                 parquet_dir: Path = Path("storage/parquet"),
+                 partition_by: Sequence[str] = ("ingest_date",),
+                 row_group_size: int = 122_880,
+                 auto_compact_files: Optional[int] = None,
+                 compaction_grace_seconds: float = 600.0) -> None:
         import duckdb  # local import to avoid hard dependency when unused
 
+        from storage.compaction import FileSwap
+
         self.db_path = db_path
         self.parquet_dir = parquet_dir
         self.parquet_dir.mkdir(parents=True, exist_ok=True)
+        self.partition_by = tuple(partition_by)
+        self.row_group_size = row_group_size
+        self.auto_compact_files = auto_compact_files
+        self._file_swap = FileSwap(self.parquet_dir, compaction_grace_seconds)
         self.conn = duckdb.connect(str(self.db_path))
+        self._local = threading.local()
+        self._cursors: List[Any] = []
+        self._cursors_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+
+    def cursor(self):
+        """DuckDB cursor owned by the calling thread."""
+        cur = getattr(self._local, "cursor", None)
+        if cur is None:
+            cur = self.conn.cursor()
+            self._local.cursor = cur
+            with self._cursors_lock:
+                self._cursors.append(cur)
+        return cur
 
-    def save_table(self, df: pd.DataFrame, name: str) -> None:
-        """Save a DataFrame as a table and Parquet file."""
-        self.conn.register("df_view", df)
-        self.conn.execute(
-            f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM df_view WHERE 1=0"
+    def _partition_columns(self, columns: Sequence[str]) -> List[str]:
+        partitions = [c for c in self.partition_by if c == "ingest_date" or c in columns]
+        return partitions or ["ingest_date"]
+
+    def _append_parquet(self, cur, view: str, data: TableLike, dataset: Path) -> None:
+        """Append the registered ``view`` of ``data`` as new part files of ``dataset``."""
+        columns = column_names(data)
+        partitions = self._partition_columns(columns)
+        select = f"SELECT * FROM {view}"
+        if "ingest_date" in partitions and "ingest_date" not in columns:
+            select = f"SELECT *, DATE '{date.today().isoformat()}' AS ingest_date FROM {view}"
+        cur.execute(
+            f"COPY ({select}) TO '{dataset.as_posix()}' (FORMAT PARQUET, COMPRESSION ZSTD, "
+            f"PARTITION_BY ({', '.join(partitions)}), ROW_GROUP_SIZE {self.row_group_size}, "
+            "FILENAME_PATTERN 'part-{uuid}', APPEND)"
         )
-        self.conn.execute(f"INSERT INTO {name} SELECT * FROM df_view")
-        parquet_path = self.parquet_dir / f"{name}.parquet"
-        df.to_parquet(parquet_path, index=False)
 
-    def save_timeseries(self, df: pd.DataFrame, name: str, timestamp_col: str) -> None:
-        ordered = df.sort_values(timestamp_col)
-        self.save_table(ordered, name)
+    def _parquet_source(self, name: str) -> str:
+        files = self._file_swap.live_files(self.parquet_dir / name)
+        if not files:  # let DuckDB report the missing dataset
+            pattern = (self.parquet_dir / name / "**" / "*.parquet").as_posix()
+            return f"read_parquet('{pattern}', hive_partitioning = true)"
+        sources = ", ".join(f"'{p.as_posix()}'" for p in files)
+        return f"read_parquet([{sources}], hive_partitioning = true)"
+
+    def parquet_relation(self, name: str):
+        """Lazy DuckDB relation over the Parquet dataset of table ``name``.
+
+        Filters on partition columns (e.g. ``ingest_date``) only read the
+        matching directories, other filters use row-group statistics.
+        """
+        return self.cursor().sql(f"SELECT * FROM {self._parquet_source(name)}")
+
+    def list_tables(self) -> List[str]:
+        return [row[0] for row in self.cursor().execute("SHOW TABLES").fetchall()]
+
+    def scan(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        limit: Optional[int] = None,
+        source: str = "table",
+    ) -> "pa.Table":
+        """Run the scan as one DuckDB query.
+
+        With ``source="parquet"`` the Parquet dataset is read instead of the
+        DuckDB table: partition filters prune directories and the remaining
+        filters skip row groups using their min/max statistics.
+        """
+        sql, params = self._scan_sql(name, columns, filters, limit, source)
+        return self.cursor().execute(sql, params).fetch_arrow_table()
+
+    def scan_batches(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        batch_size: int = 122_880,
+        source: str = "table",
+    ) -> "pa.RecordBatchReader":
+        """Stream the scan from DuckDB without materialising the result.
+
+        The stream runs on its own cursor, so the calling thread can keep
+        querying the store while consuming it.
+        """
+        sql, params = self._scan_sql(name, columns, filters, None, source)
+        return self.conn.cursor().execute(sql, params).fetch_record_batch(batch_size)
+
+    def _scan_sql(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]],
+        filters: Optional[Sequence[Filter]],
+        limit: Optional[int],
+        source: str,
+    ) -> Tuple[str, List[Any]]:
+        if source == "table":
+            relation = _duckdb_quote(name)
+        elif source == "parquet":
+            relation = self._parquet_source(name)
+        else:
+            raise ValueError("source must be 'table' or 'parquet'")
+        select = ", ".join(_duckdb_quote(c) for c in columns) if columns else "*"
+        where, params = _sql_where(_check_filters(filters), _duckdb_quote, lambda i: "?")
+        sql = f"SELECT {select} FROM {relation}{where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return sql, params
+
+    def save_table(self, data: TableLike, name: str) -> None:
+        """Append rows to a table and to its Parquet dataset."""
+        for chunk in _chunks(data, self.row_group_size):
+            self._save_chunk(chunk, name)
+
+    def _save_chunk(self, data: Union[pd.DataFrame, "pa.Table"], name: str) -> None:
+        cur = self.cursor()
+        view = f"df_view_{uuid.uuid4().hex}"
+        with self._write_lock:
+            cur.register(view, data)
+            try:
+                cur.execute(
+                    f"CREATE TABLE IF NOT EXISTS {name} AS SELECT * FROM {view} WHERE 1=0"
+                )
+                cur.execute(f"INSERT INTO {name} SELECT * FROM {view}")
+                self._append_parquet(cur, view, data, self.parquet_dir / name)
+            finally:
+                cur.unregister(view)
+            if self.auto_compact_files is not None:
+                self._maybe_compact(name)
+        self._publish_online(data)
+
+    def replace_table(self, data: TableLike, name: str) -> None:
+        """Overwrite table ``name`` and its Parquet dataset with ``data``.
+
+        The new part files are written to a scratch directory and swapped in
+        for the current ones like a compaction, so Parquet readers see either
+        the old or the new contents.
+        """
+        cur = self.cursor()
+        view = f"df_view_{uuid.uuid4().hex}"
+        dataset = self.parquet_dir / name
+        scratch = self.parquet_dir / f".replace-{uuid.uuid4().hex}"
+        with self._write_lock:
+            cur.register(view, data)
+            try:
+                cur.execute(f"CREATE OR REPLACE TABLE {name} AS SELECT * FROM {view}")
+                self._append_parquet(cur, view, data, scratch)
+                moves = []
+                for path in sorted(scratch.glob("**/*.parquet")):
+                    destination = dataset / path.relative_to(scratch)
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    moves.append((path, destination))
+                self._file_swap.swap(moves, self._file_swap.live_files(dataset))
+            finally:
+                cur.unregister(view)
+                shutil.rmtree(scratch, ignore_errors=True)
+        self._publish_online(data)
+
+    def _maybe_compact(self, name: str) -> None:
+        """Compact the dataset of ``name`` once it has ``auto_compact_files`` parts."""
+        from storage.compaction import compact_dataset
+
+        dataset = self.parquet_dir / name
+        if len(self._file_swap.live_files(dataset)) >= self.auto_compact_files:
+            compact_dataset(self.cursor(), dataset, min_files=2, swap=self._file_swap)
+
+    def compact(self, **kwargs):
+        """Compact the Parquet datasets and vacuum the database.
+
+        See :func:`storage.compaction.compact_store` for the options; returns
+        its :class:`~storage.compaction.CompactionReport`.
+        """
+        from storage.compaction import compact_store
+
+        return compact_store(self, **kwargs)
+
+    def save_timeseries(self, data: TableLike, name: str, timestamp_col: str) -> None:
+        """Store a time series; curves with a ``run_id`` go to the timeseries store.
+
+        Those are upserted by ``(run_id, timestamp)`` with minute/hour/day
+        rollups maintained by :class:`~storage.timeseries_store.TimeseriesStore`.
+        """
+        if "run_id" in column_names(data):
+            with self._write_lock:
+                self.timeseries(timestamp_col).write(to_pandas(data), name)
+            return
+        self.save_table(_sorted(data, timestamp_col), name)
+
+    def timeseries(self, timestamp_col: str = "timestamp"):
+        """Timeseries store on this thread's cursor, sharing the Parquet root."""
+        from storage.timeseries_store import TimeseriesStore
+
+        return TimeseriesStore(
+            parquet_dir=self.parquet_dir / "timeseries", conn=self.cursor(), time_col=timestamp_col
+        )
 
     def close(self) -> None:
+        with self._cursors_lock:
+            for cur in self._cursors:
+                cur.close()
+            self._cursors.clear()
         self.conn.close()
 
 
 class PostgresFeatureStore(AbstractFeatureStore):
-    """Persist data to a PostgreSQL database using SQLAlchemy."""
+    """Persist data to a PostgreSQL database using SQLAlchemy.
+
+    Tables are bulk loaded with ``COPY ... FROM STDIN``: the data is
+    converted to Arrow and written as CSV by Arrow's writer
+    ``copy_chunk_rows`` rows at a time, so memory stays bounded, and all
+    chunks are loaded in a single transaction. The engine
+    uses an explicit connection pool (``pool_size``, ``max_overflow``,
+    ``pool_timeout``, ``pool_recycle``) with pre-ping to drop stale
+    connections.
+    """
 
-    def __init__(self, conn_str: str, schema: Optional[str] = None) -> None:
+    def __init__(self, conn_str: str, schema: Optional[str] = None,
+                 pool_size: int = 5, max_overflow: int = 10,
+                 pool_timeout: float = 30.0, pool_recycle: int = 1800,
+                 copy_chunk_rows: int = 100_000) -> None:
         from sqlalchemy import create_engine
 
-        self.engine = create_engine(conn_str)
+        pool_args: Dict[str, Any] = {}
+        if not conn_str.startswith("sqlite"):
+            pool_args = dict(
+                pool_size=pool_size, max_overflow=max_overflow,
+                pool_timeout=pool_timeout, pool_recycle=pool_recycle,
+            )
+        self.engine = create_engine(conn_str, pool_pre_ping=True, **pool_args)
         self.schema = schema
+        self.copy_chunk_rows = copy_chunk_rows
+
+    def _relation(self, name: str) -> str:
+        quote = self.engine.dialect.identifier_preparer.quote
+        return quote(name) if self.schema is None else f"{quote(self.schema)}.{quote(name)}"
+
+    def save_table(self, data: TableLike, name: str, method: str = "copy") -> None:
+        """Append ``data`` to ``name``, creating the table from its schema if needed.
+
+        ``method="insert"`` uses ``DataFrame.to_sql`` instead of ``COPY``,
+        which is also the fallback for drivers without ``copy_expert``.
+        """
+        import pyarrow as pa
 
-    def save_table(self, df: pd.DataFrame, name: str) -> None:
-        df.to_sql(name, self.engine, schema=self.schema, if_exists="append", index=False)
+        if method not in ("copy", "insert"):
+            raise ValueError("method must be 'copy' or 'insert'")
+        if isinstance(data, pa.RecordBatchReader) and self.online_store is not None:
+            data = data.read_all()  # published after the load commits
+        if method == "insert" or self.engine.dialect.name != "postgresql":
+            data = to_pandas(data)
+            data.to_sql(name, self.engine, schema=self.schema, if_exists="append", index=False)
+        else:
+            if isinstance(data, pd.DataFrame):
+                empty = data.head(0)
+            else:
+                empty = data.schema.empty_table().to_pandas()
+            empty.to_sql(name, self.engine, schema=self.schema, if_exists="append", index=False)
+            self.copy_frame(data, name)
+        self._publish_online(data)
 
-    def save_timeseries(self, df: pd.DataFrame, name: str, timestamp_col: str) -> None:
-        ordered = df.sort_values(timestamp_col)
-        self.save_table(ordered, name)
+    def replace_table(self, data: TableLike, name: str) -> None:
+        """Drop and recreate ``name`` with ``data`` in a single transaction."""
+        data = to_pandas(data)
+        with self.engine.begin() as conn:
+            data.to_sql(name, conn, schema=self.schema, if_exists="replace", index=False)
+        self._publish_online(data)
+
+    def copy_frame(self, data: TableLike, name: str) -> int:
+        """Stream ``data`` into an existing table with ``COPY FROM STDIN``; return rows.
+
+        Nulls are written as unquoted empty fields, which CSV ``COPY`` loads
+        as ``NULL``, while empty strings are quoted.
+        """
+        import io
+
+        from pyarrow import csv
+
+        quote = self.engine.dialect.identifier_preparer.quote
+        columns = ", ".join(quote(c) for c in column_names(data))
+        sql = f"COPY {self._relation(name)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        options = csv.WriteOptions(include_header=False)
+        rows = 0
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            for chunk in _chunks(data, self.copy_chunk_rows):
+                for batch in to_arrow(chunk).to_batches(self.copy_chunk_rows):
+                    buffer = io.BytesIO()
+                    csv.write_csv(batch, buffer, options)
+                    buffer.seek(0)
+                    cursor.copy_expert(sql, buffer)
+                    rows += batch.num_rows
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+        return rows
+
+    def list_tables(self) -> List[str]:
+        from sqlalchemy import inspect
+
+        return inspect(self.engine).get_table_names(schema=self.schema)
+
+    def scan(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        limit: Optional[int] = None,
+    ) -> "pa.Table":
+        """Select only ``columns`` with a bound ``WHERE`` clause and ``LIMIT``."""
+        import pyarrow as pa
+        from sqlalchemy import text
+
+        quote = self.engine.dialect.identifier_preparer.quote
+        relation = self._relation(name)
+        select = ", ".join(quote(c) for c in columns) if columns else "*"
+        where, values = _sql_where(_check_filters(filters), quote, lambda i: f":p{i}")
+        sql = f"SELECT {select} FROM {relation}{where}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        params: Dict[str, Any] = {f"p{i}": v for i, v in enumerate(values)}
+        with self.engine.connect() as conn:
+            df = pd.read_sql(text(sql), conn, params=params)
+        return pa.Table.from_pandas(df, preserve_index=False)
+
+    def save_timeseries(self, data: TableLike, name: str, timestamp_col: str) -> None:
+        self.save_table(_sorted(data, timestamp_col), name)
 
     def close(self) -> None:
         self.engine.dispose()
 
 
 class SheetsFeatureStore(AbstractFeatureStore):
-    """Persist data to a Google Sheets spreadsheet."""
+    """Persist data to a Google Sheets spreadsheet.
 
-    def __init__(self, creds_file: Path, spreadsheet: str) -> None:
-        import gspread
-        from google.oauth2.service_account import Credentials
+    In ``incremental`` mode the last grid written to each worksheet is kept
+    as a local snapshot and only changed cells are sent, as chunked
+    ``batch_update`` calls of at most ``max_cells_per_request`` cells. All
+    API calls go through a rate limiter (``requests_per_minute``) and are
+    retried with exponential backoff on quota and server errors. Edits made
+    directly in the sheet are not seen by the diff; pass ``incremental=False``
+    (or call :meth:`save_table` with ``full=True``) to rewrite everything.
+    An already authorised gspread ``client`` can be injected, e.g. a fake one
+    in tests.
+    """
 
-        scopes = ["https://www.googleapis.com/auth/spreadsheets"]
-        creds = Credentials.from_service_account_file(str(creds_file), scopes=scopes)
-        self.client = gspread.authorize(creds)
-        self.spreadsheet = self.client.open(spreadsheet)
+    def __init__(self, creds_file: Optional[Path], spreadsheet: str, client: Any = None,
+                 incremental: bool = True,
+                 snapshot_dir: Path = Path("storage/sheets_snapshots"),
+                 max_cells_per_request: int = 10_000,
+                 requests_per_minute: float = 50.0,
+                 max_retries: int = 5, backoff: float = 1.0) -> None:
+        from storage.sheets_sync import RateLimiter, SnapshotStore
 
-    def save_table(self, df: pd.DataFrame, name: str) -> None:
-        worksheet = None
-        try:
-            worksheet = self.spreadsheet.worksheet(name)
-            worksheet.clear()
-        except Exception:
-            worksheet = self.spreadsheet.add_worksheet(title=name, rows="100", cols="26")
-        worksheet.update([df.columns.values.tolist()] + df.values.tolist())
+        if client is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            scopes = ["https://www.googleapis.com/auth/spreadsheets"]
+            creds = Credentials.from_service_account_file(str(creds_file), scopes=scopes)
+            client = gspread.authorize(creds)
+        self.client = client
+        self.spreadsheet_name = spreadsheet
+        self.incremental = incremental
+        self.snapshots = SnapshotStore(snapshot_dir)
+        self.max_cells_per_request = max_cells_per_request
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.limiter = RateLimiter(requests_per_minute)
+        self.spreadsheet = self._call(lambda: self.client.open(spreadsheet))
+
+    def _call(self, fn: Callable[[], Any]) -> Any:
+        from storage.sheets_sync import call_with_retry
+
+        return call_with_retry(fn, self.limiter, self.max_retries, self.backoff)
+
+    def save_table(self, data: TableLike, name: str, full: bool = False) -> None:
+        """Write ``data`` to worksheet ``name``, sending only changed cells if possible.
+
+        Arrow input is turned into cells column by column, without going
+        through pandas.
+        """
+        from storage.sheets_sync import (
+            chunk_updates, diff_ranges, frame_to_grid, grid_shape, table_to_grid
+        )
+
+        if isinstance(data, pd.DataFrame):
+            grid = frame_to_grid(data)
+        else:
+            data = to_arrow(data)
+            grid = table_to_grid(data)
+        n_rows, n_cols = grid_shape(grid)
+        previous = None
+        existing = {ws.title: ws for ws in self._call(self.spreadsheet.worksheets)}
+        worksheet = existing.get(name)
+        if worksheet is None:
+            worksheet = self._call(
+                lambda: self.spreadsheet.add_worksheet(title=name, rows=n_rows, cols=n_cols)
+            )
+        elif self.incremental and not full:
+            previous = self.snapshots.load(self.spreadsheet_name, name)
+        if previous is None:
+            self._call(worksheet.clear)
+        if (worksheet.row_count, worksheet.col_count) != (n_rows, n_cols):
+            self._call(lambda: worksheet.resize(rows=n_rows, cols=n_cols))
+        self.snapshots.drop(self.spreadsheet_name, name)
+        for chunk in chunk_updates(diff_ranges(previous, grid), self.max_cells_per_request):
+            self._call(lambda c=chunk: worksheet.batch_update(c, value_input_option="RAW"))
+        self.snapshots.save(self.spreadsheet_name, name, grid)
+        self._publish_online(data)
+
+    def replace_table(self, data: TableLike, name: str) -> None:
+        """Same as :meth:`save_table`, which always rewrites the whole worksheet."""
+        self.save_table(data, name)
+
+    def list_tables(self) -> List[str]:
+        return [ws.title for ws in self._call(self.spreadsheet.worksheets)]
+
+    def scan(
+        self,
+        name: str,
+        columns: Optional[Sequence[str]] = None,
+        filters: Optional[Sequence[Filter]] = None,
+        limit: Optional[int] = None,
+    ) -> "pa.Table":
+        """Fetch the worksheet and filter it locally (Sheets has no pushdown)."""
+        import pyarrow as pa
+
+        worksheet = self._call(lambda: self.spreadsheet.worksheet(name))
+        df = pd.DataFrame(self._call(worksheet.get_all_records))
+        df = _filter_frame(df, _check_filters(filters))
+        if columns:
+            df = df[list(columns)]
+        if limit is not None:
+            df = df.head(limit)
+        return pa.Table.from_pandas(df, preserve_index=False)
 
-    def save_timeseries(self, df: pd.DataFrame, name: str, timestamp_col: str) -> None:
-        ordered = df.sort_values(timestamp_col)
-        self.save_table(ordered, name)
+    def save_timeseries(self, data: TableLike, name: str, timestamp_col: str) -> None:
+        self.save_table(_sorted(data, timestamp_col), name)
 
     def close(self) -> None:  # pragma: no cover - nothing to close
         pass
@@ -113,6 +720,12 @@ class SheetsFeatureStore(AbstractFeatureStore):
 __all__ = [
     "AbstractFeatureStore",
     "DuckDBFeatureStore",
+    "FILTER_OPERATORS",
+    "Filter",
     "PostgresFeatureStore",
     "SheetsFeatureStore",
+    "TableLike",
+    "column_names",
+    "to_arrow",
+    "to_pandas",
 ]
@@ -0,0 +1,242 @@
+"""
+Online feature store for low-latency lookups at serving time.
+
+The latest features of each entity (e.g. ``muestra_id``) are kept in a small
+SQLite database as one JSON document per entity, fronted by an in-process
+LRU cache. The cache is dropped whenever ``PRAGMA data_version`` shows that
+another connection (e.g. an ingestion worker in a different process) has
+committed, so readers never serve features older than the database.
+
+Offline stores publish every saved table with an entity column here (see
+:meth:`AbstractFeatureStore.attach_online_store`), so endpoints can fetch a
+sample's characterisation by id instead of scanning DuckDB.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+import pandas as pd
+
+ONLINE_STORE_PATH = Path(
+    os.getenv(
+        "ONLINE_STORE_PATH", Path(__file__).resolve().parent / "online_features.sqlite"
+    )
+)
+
+# SQLite limits the number of bound parameters per statement
+_MAX_PARAMS = 900
+
+
+def _is_missing(value: Any) -> bool:
+    """True for scalar missing values (``None``, ``NaN``, ``NaT``, ``pd.NA``)."""
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):  # containers
+        return False
+
+
+def _json_value(value: Any) -> Any:
+    if value is None:
+        return None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+class OnlineFeatureStore:
+    """Latest features per entity in SQLite with an in-process LRU in front."""
+
+    def __init__(self, path: Path = ONLINE_STORE_PATH, cache_size: int = 10_000) -> None:
+        self.path = Path(path)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Bumped on every invalidation; reads only cache rows fetched within one
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS features ("
+                "entity_id TEXT PRIMARY KEY, updated_at REAL, payload TEXT)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        """Connection owned by the calling thread."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _sync_cache(self, conn: sqlite3.Connection) -> None:
+        """Drop the cache if another connection committed since this one last looked.
+
+        ``data_version`` is per connection and only changes for commits made
+        through other connections; this thread's own writes invalidate
+        their entities in :meth:`put`. A connection's first look has nothing
+        to compare to, so it drops the cache too.
+        """
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        seen = getattr(self._local, "data_version", None)
+        self._local.data_version = version
+        if seen != version:
+            with self._lock:
+                self._cache.clear()
+                self._generation += 1
+
+    def _remember(self, entity_id: str, features: Dict[str, Any]) -> None:
+        self._cache[entity_id] = features
+        self._cache.move_to_end(entity_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def put(self, rows: Mapping[str, Mapping[str, Any]]) -> int:
+        """Merge ``{entity_id: {feature: value}}`` into the stored documents.
+
+        Features not present in a row keep their previous value, as do those
+        whose value is ``NaN``/``NaT``; ``None`` removes a feature. Returns the
+        number of entities written.
+        """
+        now = time.time()
+        params = [
+            (str(entity), now, json.dumps({
+                k: _json_value(v) for k, v in feats.items() if v is None or not _is_missing(v)
+            }))
+            for entity, feats in rows.items()
+        ]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT INTO features (entity_id, updated_at, payload) VALUES (?, ?, ?) "
+                "ON CONFLICT(entity_id) DO UPDATE SET updated_at = excluded.updated_at, "
+                "payload = json_patch(features.payload, excluded.payload)",
+                params,
+            )
+        with self._lock:
+            for entity, _, _ in params:
+                self._cache.pop(entity, None)
+            self._generation += 1
+        return len(params)
+
+    def update_from_frame(
+        self,
+        df: pd.DataFrame,
+        entity_col: str = "muestra_id",
+        timestamp_col: Optional[str] = None,
+    ) -> int:
+        """Publish the latest row per entity of an offline table.
+
+        With ``timestamp_col`` rows are ordered by it first, otherwise the
+        last row of each entity in ``df`` wins. Missing values are not sent,
+        so they never erase a feature stored by an earlier table.
+        """
+        if entity_col not in df.columns or df.empty:
+            return 0
+        if timestamp_col is not None and timestamp_col in df.columns:
+            df = df.sort_values(timestamp_col, kind="stable")
+        latest = df.drop_duplicates(entity_col, keep="last").set_index(entity_col)
+        rows = latest.to_dict(orient="index")
+        return self.put({
+            entity: {k: v for k, v in feats.items() if not _is_missing(v)}
+            for entity, feats in rows.items()
+        })
+
+    def get_features(self, entity_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """Features of every known entity in ``entity_ids``; unknown ids are omitted."""
+        ids = [str(e) for e in entity_ids]
+        conn = self._conn()
+        self._sync_cache(conn)
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        with self._lock:
+            generation = self._generation
+            for entity in ids:
+                cached = self._cache.get(entity)
+                if cached is None:
+                    missing.append(entity)
+                else:
+                    self._cache.move_to_end(entity)
+                    found[entity] = cached
+        for start in range(0, len(missing), _MAX_PARAMS):
+            chunk = missing[start:start + _MAX_PARAMS]
+            marks = ", ".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT entity_id, payload FROM features WHERE entity_id IN ({marks})", chunk
+            ).fetchall()
+            with self._lock:
+                # Rows read before a concurrent invalidation may be stale: return, don't cache
+                fresh = self._generation == generation
+                for entity, payload in rows:
+                    features = json.loads(payload)
+                    found[entity] = features
+                    if fresh:
+                        self._remember(entity, features)
+        return found
+
+    def get(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        """Features of one entity or ``None``."""
+        return self.get_features([entity_id]).get(str(entity_id))
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            self._local.data_version = None
+
+
+def resolve_features(
+    provided: Mapping[str, Optional[float]],
+    entity_id: Optional[str] = None,
+    store: Optional[OnlineFeatureStore] = None,
+    required: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """Fill features not given by the caller from the online store.
+
+    Explicit values in ``provided`` win over stored ones. Raises
+    ``LookupError`` when ``entity_id`` is unknown and ``KeyError`` naming
+    the ``required`` features that are still missing.
+    """
+    features = {k: v for k, v in provided.items() if v is not None}
+    if entity_id is not None:
+        stored = (store or default_online_store()).get(entity_id)
+        if stored is None:
+            raise LookupError(f"No online features for entity '{entity_id}'")
+        features = {**stored, **features}
+    missing = [name for name in required if features.get(name) is None]
+    if missing:
+        raise KeyError(f"Missing features: {', '.join(missing)}")
+    return features
+
+
+_DEFAULT: Optional[OnlineFeatureStore] = None
+
+
+def default_online_store() -> OnlineFeatureStore:
+    """Process-wide store at :data:`ONLINE_STORE_PATH`."""
+    global _DEFAULT
+    if _DEFAULT is None:
+        _DEFAULT = OnlineFeatureStore()
+    return _DEFAULT
+
+
+__all__ = [
+    "ONLINE_STORE_PATH",
+    "OnlineFeatureStore",
+    "default_online_store",
+    "resolve_features",
+]
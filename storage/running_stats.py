@@ -0,0 +1,154 @@
+"""
+Running per-variable statistics kept in the feature store.
+
+:class:`RunningStats` holds the count, mean and sum of squared deviations
+(``m2``) of every variable using Welford's algorithm, merged a whole batch
+at a time with the parallel update of Chan et al., so accepted measurements
+never have to be re-read. The state is persisted as a small table of the
+feature store (one row per variable, stamped with ``updated_at``), which is
+overwritten on every save and reloaded on start. This lets ingestion score
+z-scores against the history of each variable instead of relying on clients
+to send ``mean``/``std``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from storage.feature_store import AbstractFeatureStore
+
+STATS_TABLE = "measurement_stats"
+_COLUMNS = ["count", "mean", "m2"]
+
+
+def _empty_state() -> pd.DataFrame:
+    return pd.DataFrame(
+        {"count": pd.Series(dtype="int64"), "mean": pd.Series(dtype="float64"),
+         "m2": pd.Series(dtype="float64")},
+        index=pd.Index([], name="name", dtype=object),
+    )
+
+
+class RunningStats:
+    """Welford count/mean/variance per variable, persisted in a feature store.
+
+    Parameters
+    ----------
+    store:
+        Feature store holding the ``table`` of statistics; ``None`` keeps
+        them in memory only.
+    table:
+        Name of the statistics table.
+    min_count:
+        Variables with fewer samples get no z-score (``NaN``).
+    persist_every:
+        Seconds between writes of the state to ``store`` by :meth:`update`;
+        ``0`` writes after every batch. Call :meth:`save` on shutdown.
+    """
+
+    def __init__(
+        self,
+        store: Optional[AbstractFeatureStore] = None,
+        table: str = STATS_TABLE,
+        min_count: int = 30,
+        persist_every: float = 30.0,
+    ) -> None:
+        self.store = store
+        self.table = table
+        self.min_count = min_count
+        self.persist_every = persist_every
+        self._state = _empty_state()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        if store is not None:
+            self.load()
+
+    def load(self) -> None:
+        """Replace the state with the stored one (latest row per variable)."""
+        if self.store is None or self.table not in self.store.list_tables():
+            return
+        df = self.store.load_table(self.table)
+        if df.empty:
+            return
+        latest = df.sort_values("updated_at", kind="stable").drop_duplicates("name", keep="last")
+        state = latest.set_index("name")[_COLUMNS].astype({"count": "int64"})
+        with self._lock:
+            self._state = state
+
+    def snapshot(self) -> pd.DataFrame:
+        """Copy of the state with ``std`` (sample standard deviation) added."""
+        with self._lock:
+            state = self._state.copy()
+        denom = (state["count"] - 1).where(state["count"] > 1)
+        return state.assign(std=np.sqrt(state["m2"] / denom))
+
+    def zscores(self, names: Sequence[str], values: Sequence[float]) -> np.ndarray:
+        """``|value - mean| / std`` of each value against its variable's statistics.
+
+        ``NaN`` for unknown variables, those with fewer than ``min_count``
+        samples and those without spread.
+        """
+        state = self.snapshot()
+        state = state[(state["count"] >= self.min_count) & (state["std"] > 0)]
+        pos = state.index.get_indexer(pd.Index(np.asarray(names, dtype=object)))
+        mean = np.append(state["mean"].to_numpy(), np.nan)[pos]
+        std = np.append(state["std"].to_numpy(), np.nan)[pos]
+        return np.abs(np.asarray(values, dtype=float) - mean) / std
+
+    def update(self, names: Sequence[str], values: Sequence[float]) -> None:
+        """Merge a batch of accepted values into the statistics.
+
+        Non-finite values are ignored. The state is written to the store
+        when ``persist_every`` seconds have passed since the last write.
+        """
+        batch = pd.DataFrame({"name": np.asarray(names, dtype=object),
+                              "value": np.asarray(values, dtype=float)})
+        batch = batch[np.isfinite(batch["value"])]
+        if batch.empty:
+            return
+        grouped = batch.groupby("name")["value"]
+        n_b = grouped.count()
+        mean_b = grouped.mean()
+        m2_b = grouped.var(ddof=0) * n_b
+        with self._lock:
+            old = self._state.reindex(self._state.index.union(n_b.index))
+            n_a = old["count"].fillna(0)
+            mean_a = old["mean"].fillna(0.0)
+            m2_a = old["m2"].fillna(0.0)
+            n_b, mean_b, m2_b = (s.reindex(old.index, fill_value=0) for s in (n_b, mean_b, m2_b))
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self._state = pd.DataFrame(
+                {
+                    "count": n.astype("int64"),
+                    "mean": mean_a + delta * n_b / n,
+                    "m2": m2_a + m2_b + delta ** 2 * n_a * n_b / n,
+                },
+                index=old.index,
+            )
+            self._dirty = True
+            due = time.monotonic() - self._saved_at >= self.persist_every
+        if due:
+            self.save()
+
+    def save(self) -> None:
+        """Overwrite the stored table with the full state (one row per variable)."""
+        if self.store is None:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            frame = self._state.reset_index()
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        frame["updated_at"] = pd.Timestamp.now(tz="UTC").tz_localize(None)
+        self.store.replace_table(frame, self.table)
+
+
+__all__ = ["RunningStats", "STATS_TABLE"]
@@ -0,0 +1,192 @@
+"""
+Incremental synchronisation of tables to Google Sheets worksheets.
+
+The last grid written to each worksheet is kept as a local JSON snapshot.
+A new write is compared cell by cell against it and only runs of changed
+cells are sent, grouped into chunked ``batch_update`` calls. Calls are
+spaced to stay under the per-minute request quota and retried with
+exponential backoff on rate-limit and server errors.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:  # pragma: no cover - typing only
+    import pyarrow as pa
+
+Grid = List[List[Any]]
+
+# HTTP status codes worth retrying
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+def _cell(value: Any) -> Any:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return ""
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def frame_to_grid(df: pd.DataFrame) -> Grid:
+    """Header plus rows as JSON-serialisable cell values (missing values as ``""``)."""
+    rows = df.astype(object).values.tolist()
+    return [[str(c) for c in df.columns]] + [[_cell(v) for v in row] for row in rows]
+
+
+def table_to_grid(table: "pa.Table") -> Grid:
+    """Like :func:`frame_to_grid` for an Arrow table, converted column by column."""
+    columns = [[_cell(v) for v in column.to_pylist()] for column in table.columns]
+    return [list(table.column_names)] + [list(row) for row in zip(*columns)]
+
+
+def column_letter(col: int) -> str:
+    """1-based column index to its A1 letters."""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def a1_range(row: int, col_start: int, col_end: int) -> str:
+    """A1 range of one row spanning ``col_start..col_end`` (1-based, inclusive)."""
+    return f"{column_letter(col_start)}{row}:{column_letter(col_end)}{row}"
+
+
+def diff_ranges(old: Optional[Grid], new: Grid) -> List[Dict[str, Any]]:
+    """``batch_update`` payloads for the cells of ``new`` that differ from ``old``.
+
+    Changed cells are grouped into horizontal runs per row; cells beyond the
+    old grid always count as changed. Cells outside ``new`` are expected to
+    be removed by resizing the worksheet.
+    """
+    old = old or []
+    updates = []
+    for r, row in enumerate(new):
+        prev = old[r] if r < len(old) else []
+        changed = [c >= len(prev) or prev[c] != value for c, value in enumerate(row)]
+        c = 0
+        while c < len(row):
+            if not changed[c]:
+                c += 1
+                continue
+            start = c
+            while c < len(row) and changed[c]:
+                c += 1
+            updates.append({"range": a1_range(r + 1, start + 1, c), "values": [row[start:c]]})
+    return updates
+
+
+def chunk_updates(updates: Sequence[Dict[str, Any]], max_cells: int) -> List[List[Dict[str, Any]]]:
+    """Split payloads into requests of at most ``max_cells`` cells each."""
+    chunks: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    cells = 0
+    for update in updates:
+        size = len(update["values"][0])
+        if current and cells + size > max_cells:
+            chunks.append(current)
+            current, cells = [], 0
+        current.append(update)
+        cells += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class RateLimiter:
+    """Space calls so at most ``per_minute`` happen in any minute."""
+
+    def __init__(self, per_minute: float = 60.0, sleep: Callable[[float], None] = time.sleep,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self.sleep = sleep
+        self.clock = clock
+        self._next = 0.0
+
+    def wait(self) -> None:
+        now = self.clock()
+        if now < self._next:
+            self.sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def call_with_retry(
+    fn: Callable[[], Any],
+    limiter: Optional[RateLimiter] = None,
+    max_retries: int = 5,
+    backoff: float = 1.0,
+    sleep: Callable[[float], None] = time.sleep,
+) -> Any:
+    """Call ``fn`` respecting ``limiter``; retry quota/server errors with backoff."""
+    for attempt in range(max_retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return fn()
+        except Exception as exc:
+            if _status_code(exc) not in RETRY_STATUS or attempt == max_retries:
+                raise
+            sleep(backoff * 2 ** attempt + random.uniform(0, backoff))
+
+
+class SnapshotStore:
+    """Last written grid per worksheet, stored as JSON files."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def _path(self, spreadsheet: str, worksheet: str) -> Path:
+        key = f"{spreadsheet}__{worksheet}"
+        safe = "".join(ch if ch.isalnum() or ch in "-_." else "_" for ch in key)
+        return self.root / f"{safe}.json"
+
+    def load(self, spreadsheet: str, worksheet: str) -> Optional[Grid]:
+        path = self._path(spreadsheet, worksheet)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text())
+
+    def save(self, spreadsheet: str, worksheet: str, grid: Grid) -> None:
+        path = self._path(spreadsheet, worksheet)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(grid))
+        tmp.replace(path)
+
+    def drop(self, spreadsheet: str, worksheet: str) -> None:
+        self._path(spreadsheet, worksheet).unlink(missing_ok=True)
+
+
+def grid_shape(grid: Grid) -> Tuple[int, int]:
+    return len(grid), max((len(row) for row in grid), default=0)
+
+
+__all__ = [
+    "RateLimiter",
+    "SnapshotStore",
+    "a1_range",
+    "call_with_retry",
+    "chunk_updates",
+    "diff_ranges",
+    "frame_to_grid",
+    "grid_shape",
+    "table_to_grid",
+]
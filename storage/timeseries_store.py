@@ -0,0 +1,250 @@
+"""
+Timeseries store for reactor sensor curves.
+
+Raw samples (pH, Eh, DO, Fe(II)/Fe(III), temperature, ...) are stored in a
+DuckDB table keyed by ``(run_id, timestamp)``: writing a sample that already
+exists replaces it, and each batch is inserted sorted by key so DuckDB's
+per-row-group min/max indexes make range queries on one run cheap. Raw
+batches are also appended to a Parquet dataset partitioned by day.
+
+Every write refreshes min/max/mean rollups per minute, hour and day for the
+buckets it touched. Minutes are aggregated from raw samples, hours from
+minutes and days from hours, so dashboards and lag-feature builders can read
+downsampled curves without scanning multi-Hz logs. Each rollup keeps the
+number of non-null samples per column (``<col>_n``) so coarser means stay
+exact when a sensor has gaps. Batches may bring new numeric columns; they
+are added to the existing tables.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Sequence, Union
+
+import pandas as pd
+
+from storage.feature_store import _duckdb_quote as _q
+
+RESOLUTIONS = ("minute", "hour", "day")
+
+# Source of each rollup level: raw samples or the previous, finer rollup
+_SOURCE = {"minute": None, "hour": "minute", "day": "hour"}
+
+_NUMERIC_TYPES = (
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+    "UINTEGER", "UBIGINT", "FLOAT", "REAL", "DOUBLE", "DECIMAL",
+)
+
+TimeLike = Union[str, datetime, pd.Timestamp, None]
+
+
+class TimeseriesStore:
+    """Raw curves keyed by ``(run_id, timestamp)`` plus multi-resolution rollups.
+
+    Parameters
+    ----------
+    db_path:
+        DuckDB database file, ignored when ``conn`` is given.
+    parquet_dir:
+        Root of the day-partitioned raw Parquet datasets; ``None`` disables
+        the mirror.
+    conn:
+        Existing DuckDB connection to share, e.g. the one of
+        :class:`~storage.feature_store.DuckDBFeatureStore`.
+    """
+
+    def __init__(
+        self,
+        db_path: Path = Path("storage/timeseries.duckdb"),
+        parquet_dir: Optional[Path] = Path("storage/parquet/timeseries"),
+        conn=None,
+        run_col: str = "run_id",
+        time_col: str = "timestamp",
+    ) -> None:
+        if conn is None:
+            import duckdb  # local import to avoid hard dependency when unused
+
+            conn = duckdb.connect(str(db_path))
+            self._owns_conn = True
+        else:
+            self._owns_conn = False
+        self.conn = conn
+        self.parquet_dir = parquet_dir
+        if parquet_dir is not None:
+            parquet_dir.mkdir(parents=True, exist_ok=True)
+        self.run_col = run_col
+        self.time_col = time_col
+
+    @staticmethod
+    def rollup_name(name: str, resolution: str) -> str:
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of {RESOLUTIONS}")
+        return f"{name}_{resolution}"
+
+    def _value_columns(self, name: str) -> List[str]:
+        rows = self.conn.execute(f"DESCRIBE {_q(name)}").fetchall()
+        return [
+            col for col, dtype, *_ in rows
+            if col not in (self.run_col, self.time_col) and dtype.startswith(_NUMERIC_TYPES)
+        ]
+
+    def _columns(self, relation: str) -> dict:
+        rows = self.conn.execute(f"DESCRIBE {relation}").fetchall()
+        return {col: dtype for col, dtype, *_ in rows}
+
+    def _add_missing(self, table: str, columns: dict) -> None:
+        """``ALTER TABLE ... ADD COLUMN`` every column of ``columns`` not in ``table``."""
+        existing = self._columns(table)
+        for col, dtype in columns.items():
+            if col not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {_q(col)} {dtype}")
+
+    def _create_tables(self, name: str) -> None:
+        batch = self._columns("SELECT * FROM ts_batch")
+        columns = ", ".join(f"{_q(col)} {dtype}" for col, dtype in batch.items())
+        key = f"{_q(self.run_col)}, {_q(self.time_col)}"
+        self.conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {_q(name)} ({columns}, PRIMARY KEY ({key}))"
+        )
+        self._add_missing(_q(name), batch)
+        run_type = batch[self.run_col]
+        stats = {}
+        for c in self._value_columns(name):
+            stats.update({c + "_min": "DOUBLE", c + "_max": "DOUBLE",
+                          c + "_mean": "DOUBLE", c + "_n": "BIGINT"})
+        for resolution in RESOLUTIONS:
+            target = _q(self.rollup_name(name, resolution))
+            self.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {target} ("
+                f"{_q(self.run_col)} {run_type}, bucket TIMESTAMP, n BIGINT, "
+                f"PRIMARY KEY ({_q(self.run_col)}, bucket))"
+            )
+            self._add_missing(target, stats)
+
+    def _refresh_rollup(self, name: str, resolution: str, values: Sequence[str]) -> None:
+        """Recompute the buckets of ``resolution`` touched by the current batch."""
+        run, ts = _q(self.run_col), _q(self.time_col)
+        target = _q(self.rollup_name(name, resolution))
+        source = _SOURCE[resolution]
+        if source is None:
+            table, time_expr, count = _q(name), ts, "COUNT(*)"
+            aggs = [
+                f"MIN({_q(c)}) AS {_q(c + '_min')}, MAX({_q(c)}) AS {_q(c + '_max')}, "
+                f"AVG({_q(c)}) AS {_q(c + '_mean')}, COUNT({_q(c)}) AS {_q(c + '_n')}"
+                for c in values
+            ]
+        else:
+            table, time_expr, count = _q(self.rollup_name(name, source)), "bucket", "SUM(n)"
+            # Means of finer buckets are weighted by their non-null sample counts
+            aggs = [
+                f"MIN({_q(c + '_min')}) AS {_q(c + '_min')}, "
+                f"MAX({_q(c + '_max')}) AS {_q(c + '_max')}, "
+                f"SUM({_q(c + '_mean')} * {_q(c + '_n')}) / NULLIF(SUM({_q(c + '_n')}), 0) "
+                f"AS {_q(c + '_mean')}, "
+                f"COALESCE(SUM({_q(c + '_n')}), 0) AS {_q(c + '_n')}"
+                for c in values
+            ]
+        bucket = f"date_trunc('{resolution}', {time_expr})"
+        self.conn.execute(
+            f"CREATE OR REPLACE TEMP TABLE ts_touched AS "
+            f"SELECT DISTINCT {run} AS run_key, date_trunc('{resolution}', {ts}) AS bucket "
+            f"FROM ts_batch"
+        )
+        self.conn.execute(
+            f"DELETE FROM {target} WHERE ({run}, bucket) IN "
+            f"(SELECT run_key, bucket FROM ts_touched)"
+        )
+        lo, hi = self.conn.execute("SELECT MIN(bucket), MAX(bucket) FROM ts_touched").fetchone()
+        select = ", ".join([f"{run}", f"{bucket} AS bucket", f"{count} AS n"] + aggs)
+        # The explicit time range lets DuckDB skip row groups via min/max indexes
+        self.conn.execute(
+            f"INSERT INTO {target} BY NAME SELECT {select} FROM {table} "
+            f"WHERE {time_expr} >= ? "
+            f"AND {time_expr} < CAST(? AS TIMESTAMP) + INTERVAL 1 {resolution} "
+            f"AND ({run}, {bucket}) IN (SELECT run_key, bucket FROM ts_touched) "
+            f"GROUP BY {run}, {bucket}",
+            [lo, hi],
+        )
+
+    def _append_parquet(self, name: str) -> None:
+        dataset = (self.parquet_dir / name).as_posix()
+        self.conn.execute(
+            f"COPY (SELECT *, CAST({_q(self.time_col)} AS DATE) AS day FROM ts_batch) "
+            f"TO '{dataset}' (FORMAT PARQUET, COMPRESSION ZSTD, PARTITION_BY (day), "
+            "FILENAME_PATTERN 'part-{uuid}', APPEND)"
+        )
+
+    def write(self, df: pd.DataFrame, name: str) -> int:
+        """Upsert samples of ``df`` and refresh the affected rollup buckets.
+
+        ``df`` needs the ``run_col`` and ``time_col`` columns; all numeric
+        columns are rolled up. Returns the number of rows written.
+        """
+        missing = {self.run_col, self.time_col} - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing key columns: {sorted(missing)}")
+        batch = df.drop_duplicates([self.run_col, self.time_col], keep="last")
+        batch = batch.sort_values([self.run_col, self.time_col])
+        batch = batch.assign(**{self.time_col: pd.to_datetime(batch[self.time_col])})
+        self.conn.register("ts_batch", batch)
+        try:
+            self._create_tables(name)
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO {_q(name)} BY NAME SELECT * FROM ts_batch"
+            )
+            values = self._value_columns(name)
+            for resolution in RESOLUTIONS:
+                self._refresh_rollup(name, resolution, values)
+            if self.parquet_dir is not None:
+                self._append_parquet(name)
+        finally:
+            self.conn.execute("DROP TABLE IF EXISTS ts_touched")
+            self.conn.unregister("ts_batch")
+        return len(batch)
+
+    def runs(self, name: str) -> List:
+        """Run identifiers stored in ``name``."""
+        rows = self.conn.execute(
+            f"SELECT DISTINCT {_q(self.run_col)} FROM {_q(name)} ORDER BY 1"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def query(
+        self,
+        name: str,
+        run_id,
+        start: TimeLike = None,
+        end: TimeLike = None,
+        columns: Optional[Sequence[str]] = None,
+        resolution: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Samples of one run with ``start <= timestamp < end``.
+
+        With ``resolution`` (``"minute"``, ``"hour"`` or ``"day"``) the rollup
+        is read instead; its time column is ``bucket`` and ``columns`` refer to
+        rollup columns such as ``pH_mean``.
+        """
+        if resolution is None:
+            table, time_col = _q(name), _q(self.time_col)
+        else:
+            table, time_col = _q(self.rollup_name(name, resolution)), "bucket"
+        select = ", ".join(_q(c) for c in columns) if columns else "*"
+        if columns:
+            select = f"{_q(self.run_col)}, {time_col}, {select}"
+        clauses, params = [f"{_q(self.run_col)} = ?"], [run_id]
+        if start is not None:
+            clauses.append(f"{time_col} >= ?")
+            params.append(pd.Timestamp(start).to_pydatetime())
+        if end is not None:
+            clauses.append(f"{time_col} < ?")
+            params.append(pd.Timestamp(end).to_pydatetime())
+        sql = f"SELECT {select} FROM {table} WHERE {' AND '.join(clauses)} ORDER BY {time_col}"
+        return self.conn.execute(sql, params).df()
+
+    def close(self) -> None:
+        if self._owns_conn:
+            self.conn.close()
+
+
+__all__ = ["RESOLUTIONS", "TimeseriesStore"]
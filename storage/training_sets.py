@@ -0,0 +1,196 @@
+"""
+Point-in-time correct training sets built from the feature store.
+
+A training set starts from an entity list: one row per training example with
+the entity identifier (e.g. ``muestra_id``) and the cutoff timestamp at which
+the prediction would have been made. Every :class:`FeatureSource` is joined
+with a DuckDB ``ASOF`` join, which picks for each row the latest record of
+that entity with ``time <= cutoff``; values recorded after the cutoff never
+leak into the example. The whole join runs inside DuckDB and is written as a
+versioned Parquet snapshot under ``storage/training_sets/<name>/``, next to a
+JSON manifest describing how it was built. Snapshots are written to a hidden
+temporary directory and renamed into place once complete.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from storage.feature_store import _duckdb_quote as _q
+
+SNAPSHOT_DIR = Path(__file__).resolve().parent / "training_sets"
+
+
+@dataclass
+class FeatureSource:
+    """A feature store table joined as of each entity's cutoff.
+
+    ``columns`` defaults to every column except the entity and time columns.
+    Output columns are named ``<prefix><column>``. With ``tolerance`` (a
+    DuckDB interval such as ``"30 days"``) records older than that relative
+    to the cutoff are treated as missing.
+    """
+
+    table: str
+    entity_col: str = "muestra_id"
+    time_col: str = "timestamp"
+    columns: Optional[List[str]] = None
+    prefix: str = ""
+    tolerance: Optional[str] = None
+
+
+def _source_columns(conn, source: FeatureSource) -> List[str]:
+    if source.columns is not None:
+        return list(source.columns)
+    rows = conn.execute(f"DESCRIBE {_q(source.table)}").fetchall()
+    return [r[0] for r in rows if r[0] not in (source.entity_col, source.time_col)]
+
+
+def build_query(
+    conn,
+    entities_view: str,
+    sources: Sequence[FeatureSource],
+    entity_col: str = "muestra_id",
+    cutoff_col: str = "cutoff",
+) -> str:
+    """SQL joining ``entities_view`` with every source as of ``cutoff_col``."""
+    select = ["e.*"]
+    joins = []
+    for i, source in enumerate(sources):
+        alias = f"s{i}"
+        columns = _source_columns(conn, source)
+        inner = ", ".join(
+            [f"{_q(source.entity_col)} AS _entity", f"{_q(source.time_col)} AS _time"]
+            + [_q(c) for c in columns]
+        )
+        joins.append(
+            f"ASOF LEFT JOIN (SELECT {inner} FROM {_q(source.table)}) {alias} "
+            f"ON e.{_q(entity_col)} = {alias}._entity "
+            f"AND e.{_q(cutoff_col)} >= {alias}._time"
+        )
+        for column in columns:
+            value = f"{alias}.{_q(column)}"
+            if source.tolerance is not None:
+                value = (
+                    f"CASE WHEN e.{_q(cutoff_col)} - {alias}._time "
+                    f"<= INTERVAL '{source.tolerance}' THEN {value} END"
+                )
+            select.append(f"{value} AS {_q(source.prefix + column)}")
+    return f"SELECT {', '.join(select)} FROM {entities_view} e {' '.join(joins)}"
+
+
+def _version(spec: Dict[str, Any]) -> str:
+    digest = hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode())
+    # Microsecond timestamps keep versions in build order
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    return f"{stamp}-{digest.hexdigest()[:8]}"
+
+
+def build_training_set(
+    store,
+    entities: pd.DataFrame,
+    sources: Sequence[FeatureSource],
+    name: str,
+    entity_col: str = "muestra_id",
+    cutoff_col: str = "cutoff",
+    snapshot_dir: Path = SNAPSHOT_DIR,
+) -> Path:
+    """Join ``sources`` as of each entity's cutoff and write a Parquet snapshot.
+
+    ``store`` is a :class:`~storage.feature_store.DuckDBFeatureStore`.
+    Returns the snapshot directory ``snapshot_dir/name/<version>``.
+    """
+    conn = store.cursor()
+    frame = entities.assign(**{cutoff_col: pd.to_datetime(entities[cutoff_col])})
+    conn.register("pit_entities", frame)
+    try:
+        sql = build_query(conn, "pit_entities", sources, entity_col, cutoff_col)
+        spec = {
+            "name": name,
+            "entity_col": entity_col,
+            "cutoff_col": cutoff_col,
+            "sources": [asdict(s) for s in sources],
+        }
+        version = _version(spec)
+        target = Path(snapshot_dir) / name / version
+        staging = target.parent / f".{version}.{uuid.uuid4().hex}.tmp"
+        staging.mkdir(parents=True)
+        try:
+            conn.execute(
+                f"COPY ({sql} ORDER BY e.{_q(entity_col)}, e.{_q(cutoff_col)}) "
+                f"TO '{(staging / 'data.parquet').as_posix()}' "
+                "(FORMAT PARQUET, COMPRESSION ZSTD)"
+            )
+            n_rows, lo, hi = conn.execute(
+                f"SELECT COUNT(*), MIN({_q(cutoff_col)}), MAX({_q(cutoff_col)}) "
+                "FROM pit_entities"
+            ).fetchone()
+            manifest = dict(spec, version=version, rows=n_rows, cutoff_min=lo, cutoff_max=hi)
+            (staging / "manifest.json").write_text(json.dumps(manifest, indent=2, default=str))
+            staging.rename(target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    finally:
+        conn.unregister("pit_entities")
+    return target
+
+
+def list_versions(name: str, snapshot_dir: Path = SNAPSHOT_DIR) -> List[str]:
+    """Complete snapshot versions of ``name`` (with data and manifest), oldest first."""
+    root = Path(snapshot_dir) / name
+    if not root.exists():
+        return []
+    return sorted(
+        p.name for p in root.iterdir()
+        if not p.name.startswith(".")
+        and (p / "data.parquet").exists() and (p / "manifest.json").exists()
+    )
+
+
+def load_training_set(
+    name: str,
+    version: Optional[str] = None,
+    snapshot_dir: Path = SNAPSHOT_DIR,
+    drop_keys: bool = False,
+    as_arrow: bool = False,
+):
+    """Load a snapshot (the latest one by default).
+
+    With ``drop_keys`` the entity and cutoff columns are removed so the frame
+    holds only features and labels. Returns a DataFrame, or the Arrow table
+    read from the snapshot if ``as_arrow``. Raises ``FileNotFoundError`` when
+    ``name`` has no snapshot.
+    """
+    import pyarrow.parquet as pq
+
+    versions = list_versions(name, snapshot_dir)
+    if not versions:
+        raise FileNotFoundError(f"No training set snapshot named '{name}'")
+    target = Path(snapshot_dir) / name / (version or versions[-1])
+    columns = None
+    if drop_keys:
+        manifest = json.loads((target / "manifest.json").read_text())
+        keys = {manifest["entity_col"], manifest["cutoff_col"]}
+        columns = [c for c in pq.read_schema(target / "data.parquet").names if c not in keys]
+    table = pq.read_table(target / "data.parquet", columns=columns)
+    return table if as_arrow else table.to_pandas()
+
+
+__all__ = [
+    "FeatureSource",
+    "SNAPSHOT_DIR",
+    "build_query",
+    "build_training_set",
+    "list_versions",
+    "load_training_set",
+]
@@ -0,0 +1,134 @@
+"""
+Single-writer queue that batches feature store writes.
+
+Request handlers running in a thread pool submit small DataFrames or Arrow
+tables; one background thread drains the queue, concatenates frames headed
+for the same table (with the same columns) and writes them with a single
+``save_table`` call. Callers get a :class:`~concurrent.futures.Future` that
+resolves once their rows are stored, so they can still report failures.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from storage.feature_store import AbstractFeatureStore, TableLike, column_names, to_arrow
+
+
+@dataclass
+class _Write:
+    df: TableLike
+    name: str
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+def _concat(frames: List[TableLike]) -> TableLike:
+    """One frame of all ``frames``; Arrow unless every one is a DataFrame."""
+    import pyarrow as pa
+
+    if len(frames) == 1:
+        return frames[0]
+    if all(isinstance(f, pd.DataFrame) for f in frames):
+        return pd.concat(frames, ignore_index=True)
+    return pa.concat_tables([to_arrow(f) for f in frames], promote_options="permissive")
+
+
+class BatchingWriter:
+    """Serialise and batch writes to ``store`` on a dedicated thread.
+
+    Parameters
+    ----------
+    store:
+        Feature store receiving the batched writes.
+    max_batch_rows:
+        A batch is written as soon as it holds this many rows.
+    max_delay:
+        Seconds to wait for more writes after the first one of a batch.
+    """
+
+    def __init__(
+        self, store: AbstractFeatureStore, max_batch_rows: int = 50_000, max_delay: float = 0.05
+    ) -> None:
+        self.store = store
+        self.max_batch_rows = max_batch_rows
+        self.max_delay = max_delay
+        self._queue: "queue.Queue[object]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="feature-store-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, df: TableLike, name: str) -> Future:
+        """Queue ``df`` for table ``name``; the future resolves to its row count.
+
+        Record batches and streams are turned into Arrow tables first.
+        """
+        if self._closed:
+            raise RuntimeError("BatchingWriter is closed")
+        item = _Write(df if isinstance(df, pd.DataFrame) else to_arrow(df), name)
+        self._queue.put(item)
+        return item.future
+
+    def write(self, df: TableLike, name: str, timeout: Optional[float] = None) -> int:
+        """Queue ``df`` and block until it has been written."""
+        return self.submit(df, name).result(timeout)
+
+    def _collect(self, first: _Write) -> Tuple[List[_Write], bool]:
+        batch, rows = [first], len(first.df)
+        deadline = time.monotonic() + self.max_delay
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            rows += len(item.df)
+        return batch, False
+
+    def _flush(self, batch: List[_Write]) -> None:
+        groups: Dict[Tuple[str, Tuple[str, ...]], List[_Write]] = {}
+        for item in batch:
+            groups.setdefault((item.name, tuple(column_names(item.df))), []).append(item)
+        for (name, _), items in groups.items():
+            try:
+                self.store.save_table(_concat([item.df for item in items]), name)
+            except Exception as exc:
+                for item in items:
+                    item.future.set_exception(exc)
+            else:
+                for item in items:
+                    item.future.set_result(len(item.df))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch, stop = self._collect(item)
+            self._flush(batch)
+            if stop:
+                return
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Write everything still queued and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+
+__all__ = ["BatchingWriter"]
@@ -0,0 +1,19 @@
+"""Tests of the batched optimisation wrappers."""
+
+import pytest
+
+from optimization.bayes_opt import optimize, optimize_pareto
+
+
+@pytest.mark.parametrize("run", [optimize, optimize_pareto])
+def test_persistent_study_requires_a_name(run, tmp_path):
+    with pytest.raises(ValueError, match="study_name"):
+        run(n_trials=2, storage=f"sqlite:///{tmp_path / 'studies.db'}")
+
+
+def test_named_study_is_shared_through_storage(tmp_path):
+    pytest.importorskip("optuna")
+    storage = f"sqlite:///{tmp_path / 'studies.db'}"
+    optimize(n_trials=3, batch_size=3, storage=storage, study_name="shared")
+    study = optimize(n_trials=2, batch_size=2, storage=storage, study_name="shared")
+    assert len(study.trials) == 5
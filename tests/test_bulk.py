@@ -0,0 +1,39 @@
+"""Tests of the vectorized validation of bulk measurement uploads."""
+
+import numpy as np
+import pyarrow as pa
+
+from ingestion.bulk import conform, robust_zscores, validate_measurements, zscores
+from storage.running_stats import RunningStats
+
+UNIT_FACTORS = {"kg": 1.0, "g": 1e-3, "mg": 1e-6}
+
+
+def _table(names, values, units=None):
+    units = units or ["kg"] * len(values)
+    return conform(pa.table({"name": names, "value": values, "unit": units}))
+
+
+def test_robust_zscores_need_enough_values_and_spread():
+    z = robust_zscores(
+        np.array(["a"] * 5 + ["b"] * 2 + ["c"] * 5, dtype=object),
+        np.array([1.0, 1.1, 0.9, 1.05, 50.0, 1.0, 9.0, 2.0, 2.0, 2.0, 2.0, 2.0]),
+    )
+    assert z[4] > 3 and np.all(z[:4] < 3)
+    assert np.isnan(z[5:]).all()
+
+
+def test_cold_start_variable_is_checked_against_the_batch():
+    stats = RunningStats(min_count=30)
+    table = _table(["new"] * 6, [1.0, 1.1, 0.9, 1.05, 0.95, 50.0])
+    valid, rejected, errors = validate_measurements(table, UNIT_FACTORS, stats=stats)
+    assert rejected == 1
+    assert errors == [{"row": 5, "error": "outlier (|z| > 3)"}]
+    assert valid.num_rows == 5
+
+
+def test_known_variables_use_running_stats():
+    stats = RunningStats(min_count=3)
+    stats.update(["old"] * 5, [1.0, 2.0, 3.0, 2.0, 1.0])
+    z = zscores(_table(["old", "old"], [2000.0, 9.0], ["g", "kg"]), UNIT_FACTORS, stats)
+    assert np.allclose(z, np.abs(np.array([2.0, 9.0]) - 1.8) / np.sqrt(0.7))
@@ -0,0 +1,45 @@
+"""Tests of Parquet compaction running alongside readers of the same store."""
+
+import pandas as pd
+import pytest
+
+from storage.compaction import count_files
+from storage.feature_store import DuckDBFeatureStore
+
+pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = DuckDBFeatureStore(tmp_path / "fs.duckdb", tmp_path / "parquet")
+    for i in range(6):
+        store.save_table(pd.DataFrame({"muestra_id": [f"s{i}"], "v": [float(i)]}), "m")
+    yield store
+    store.close()
+
+
+def test_compaction_keeps_planned_reads_working(store):
+    relation = store.parquet_relation("m")
+    stream = store.scan_batches("m", source="parquet", batch_size=1)
+
+    report = store.compact()
+
+    assert report.files_before == 6 and report.files_after == 1
+    # Originals stay on disk for the grace period but are no longer listed
+    assert count_files(store.parquet_dir / "m") == 7
+    assert store.scan("m", source="parquet").num_rows == 6
+    assert len(relation.fetchall()) == 6
+    assert stream.read_all().num_rows == 6
+
+
+def test_retired_files_stay_hidden_until_purged(store, tmp_path):
+    store.compact()
+    store.close()
+    reopened = DuckDBFeatureStore(tmp_path / "fs.duckdb", tmp_path / "parquet")
+    try:
+        assert reopened.scan("m", source="parquet").num_rows == 6
+        assert reopened._file_swap.purge(force=True) == 6
+        assert count_files(reopened.parquet_dir / "m") == 1
+        assert reopened.scan("m", source="parquet").num_rows == 6
+    finally:
+        reopened.close()
@@ -0,0 +1,75 @@
+"""Tests of the SQLite online store and its in-process cache."""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from storage.online_store import OnlineFeatureStore
+
+
+def test_cache_sees_writes_from_other_connections(tmp_path):
+    path = tmp_path / "online.sqlite"
+    reader = OnlineFeatureStore(path)
+    writer = OnlineFeatureStore(path)  # stands in for another process
+    writer.put({"s1": {"cu": 1.0, "fe": 2.0}})
+    assert reader.get("s1") == {"cu": 1.0, "fe": 2.0}
+
+    writer.put({"s1": {"cu": 5.0}})
+    assert reader.get("s1") == {"cu": 5.0, "fe": 2.0}
+
+
+def test_put_merges_and_removes_features(tmp_path):
+    store = OnlineFeatureStore(tmp_path / "online.sqlite")
+    store.put({"s1": {"cu": 1.0, "fe": 2.0}})
+    store.put({"s1": {"fe": None, "as": 0.1}})
+    assert store.get_features(["s1", "unknown"]) == {"s1": {"cu": 1.0, "as": 0.1}}
+
+
+def test_missing_values_do_not_erase_stored_features(tmp_path):
+    store = OnlineFeatureStore(tmp_path / "online.sqlite")
+    store.update_from_frame(pd.DataFrame({"muestra_id": ["s1"], "cu": [1.0], "lab": ["A"]}))
+    store.update_from_frame(pd.DataFrame({"muestra_id": ["s1"], "cu": [np.nan], "lab": [None]}))
+    store.put({"s1": {"fe": float("nan")}})
+    assert store.get("s1") == {"cu": 1.0, "lab": "A"}
+
+
+def test_new_thread_does_not_serve_foreign_writes_from_cache(tmp_path):
+    path = tmp_path / "online.sqlite"
+    reader = OnlineFeatureStore(path)
+    writer = OnlineFeatureStore(path)
+    writer.put({"s1": {"cu": 1.0}})
+    assert reader.get("s1") == {"cu": 1.0}
+    writer.put({"s1": {"cu": 2.0}})
+
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(reader.get("s1")))
+    thread.start()
+    thread.join()
+    assert seen == [{"cu": 2.0}]
+
+
+def test_rows_read_during_a_put_are_not_cached(tmp_path):
+    store = OnlineFeatureStore(tmp_path / "online.sqlite")
+    store.put({"s1": {"cu": 1.0}})
+    store.get("s1")  # first look at data_version
+    store._cache.clear()
+    real_conn = store._conn()
+
+    class RacingConnection:
+        """Runs a concurrent put right after the SELECT is executed."""
+
+        def execute(self, sql, *args):
+            cursor = real_conn.execute(sql, *args)
+            if sql.startswith("SELECT"):
+                rows = cursor.fetchall()
+                store._generation += 1  # what put() does after the read
+                return type("Rows", (), {"fetchall": lambda self: rows})()
+            return cursor
+
+    store._local.conn = RacingConnection()
+    try:
+        store.get("s1")
+    finally:
+        store._local.conn = real_conn
+    assert "s1" not in store._cache
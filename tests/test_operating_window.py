@@ -0,0 +1,43 @@
+"""Tests of the operating window enforced on active learning runs."""
+
+import pytest
+
+from active_learning.scheduler import Scheduler
+from validation.constraints import load_operating_window
+from validation.runtime_checks import ConstraintViolation
+
+IN_WINDOW = {
+    "pH": 1.6, "temperature": 42.0, "Eh": 450.0, "DO": 7.0,
+    "fe_iii": 15.0, "solids_pct": 17.0, "D80": 100.0,
+}
+
+
+@pytest.fixture
+def scheduler():
+    return Scheduler(
+        lambda f: (0.0, 1.0), lambda f: 1.0,
+        constraints=load_operating_window(), retrain_callback=None,
+    )
+
+
+def test_every_window_column_is_checked(scheduler):
+    assert scheduler.register_run(IN_WINDOW) == 0
+    for column in IN_WINDOW:
+        with pytest.raises(ConstraintViolation):
+            scheduler.register_run(dict(IN_WINDOW, **{column: -1.0}))
+
+
+def test_runs_missing_a_window_column_are_refused(scheduler):
+    features = {k: v for k, v in IN_WINDOW.items() if k != "solids_pct"}
+    with pytest.raises(ConstraintViolation, match="solids_pct"):
+        scheduler.register_run(features)
+
+
+def test_restrict_reports_missing_columns():
+    window = load_operating_window()
+    with pytest.raises(KeyError, match="temperature"):
+        window.restrict(["pH"])
+    with pytest.warns(UserWarning):
+        assert [c.name for c in window.restrict(["pH"], strict=False).constraints] == [
+            "ph_window"
+        ]
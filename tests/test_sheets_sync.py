@@ -0,0 +1,217 @@
+"""Tests of the incremental Google Sheets sync with an in-memory gspread fake."""
+
+import re
+
+import pandas as pd
+import pytest
+
+from storage.feature_store import SheetsFeatureStore
+from storage.sheets_sync import (
+    RateLimiter,
+    SnapshotStore,
+    a1_range,
+    call_with_retry,
+    chunk_updates,
+    diff_ranges,
+    frame_to_grid,
+)
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code)
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index
+
+
+class FakeWorksheet:
+    def __init__(self, title, rows, cols):
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.cells = [["" for _ in range(cols)] for _ in range(rows)]
+        self.calls = []
+
+    def clear(self):
+        self.calls.append("clear")
+        self.cells = [["" for _ in range(self.col_count)] for _ in range(self.row_count)]
+
+    def resize(self, rows, cols):
+        self.calls.append(("resize", rows, cols))
+        cells = [row[:cols] + [""] * (cols - len(row[:cols])) for row in self.cells[:rows]]
+        self.cells = cells + [["" for _ in range(cols)] for _ in range(rows - len(cells))]
+        self.row_count, self.col_count = rows, cols
+
+    def batch_update(self, updates, value_input_option=None):
+        self.calls.append(("batch_update", len(updates)))
+        for update in updates:
+            start, _ = update["range"].split(":")
+            letters, row = re.match(r"([A-Z]+)(\d+)", start).groups()
+            col = _column_index(letters)
+            for offset, value in enumerate(update["values"][0]):
+                self.cells[int(row) - 1][col - 1 + offset] = value
+
+    def get_all_records(self):
+        header, *rows = self.cells
+        return [dict(zip(header, row)) for row in rows]
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.sheets = {}
+        self.failures = []
+
+    def _maybe_fail(self):
+        if self.failures:
+            raise FakeAPIError(self.failures.pop(0))
+
+    def worksheets(self):
+        self._maybe_fail()
+        return list(self.sheets.values())
+
+    def worksheet(self, name):
+        self._maybe_fail()
+        return self.sheets[name]
+
+    def add_worksheet(self, title, rows, cols):
+        self.sheets[title] = FakeWorksheet(title, rows, cols)
+        return self.sheets[title]
+
+
+class FakeClient:
+    def __init__(self):
+        self.spreadsheet = FakeSpreadsheet()
+
+    def open(self, name):
+        return self.spreadsheet
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SheetsFeatureStore(
+        None, "lab", client=FakeClient(), snapshot_dir=tmp_path,
+        requests_per_minute=0, backoff=0.0,
+    )
+
+
+def test_diff_ranges_groups_changed_runs():
+    old = [["a", "b", "c"], [1, 2, 3]]
+    new = [["a", "b", "c"], [1, 5, 6], [7, 8, 9]]
+    assert diff_ranges(old, new) == [
+        {"range": "B2:C2", "values": [[5, 6]]},
+        {"range": "A3:C3", "values": [[7, 8, 9]]},
+    ]
+    assert diff_ranges(new, new) == []
+    assert diff_ranges(None, [["x"]]) == [{"range": "A1:A1", "values": [["x"]]}]
+
+
+def test_a1_range_past_z():
+    assert a1_range(3, 26, 28) == "Z3:AB3"
+
+
+def test_chunk_updates_respects_cell_limit():
+    updates = [{"range": f"A{i}:C{i}", "values": [[0, 0, 0]]} for i in range(1, 6)]
+    chunks = chunk_updates(updates, max_cells=7)
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert chunk_updates([], max_cells=7) == []
+    # A single payload larger than the limit is still sent on its own
+    assert len(chunk_updates([{"range": "A1:J1", "values": [[0] * 10]}], 3)) == 1
+
+
+def test_snapshot_round_trip(tmp_path):
+    snapshots = SnapshotStore(tmp_path)
+    grid = frame_to_grid(pd.DataFrame({"a": [1, None], "b": ["x", "y"]}))
+    assert snapshots.load("lab", "t/1") is None
+    snapshots.save("lab", "t/1", grid)
+    assert snapshots.load("lab", "t/1") == [["a", "b"], [1.0, "x"], ["", "y"]]
+    assert not list(tmp_path.glob("*.tmp"))
+    snapshots.drop("lab", "t/1")
+    assert snapshots.load("lab", "t/1") is None
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_call_with_retry_backs_off_on_retryable_errors(status, monkeypatch):
+    monkeypatch.setattr("storage.sheets_sync.random.uniform", lambda a, b: 0.0)
+    failures = [FakeAPIError(status), FakeAPIError(status)]
+    sleeps = []
+
+    def fn():
+        if failures:
+            raise failures.pop(0)
+        return "ok"
+
+    assert call_with_retry(fn, backoff=1.0, sleep=sleeps.append) == "ok"
+    assert sleeps == [1.0, 2.0]
+
+
+def test_call_with_retry_gives_up():
+    sleeps = []
+
+    def always_429():
+        raise FakeAPIError(429)
+
+    with pytest.raises(FakeAPIError):
+        call_with_retry(always_429, max_retries=2, backoff=0.5, sleep=sleeps.append)
+    assert len(sleeps) == 2
+
+    def not_found():
+        raise FakeAPIError(404)
+
+    with pytest.raises(FakeAPIError):
+        call_with_retry(not_found, sleep=sleeps.append)
+    assert len(sleeps) == 2
+
+
+def test_rate_limiter_spaces_calls():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    limiter = RateLimiter(per_minute=30, sleep=sleep, clock=lambda: now[0])
+    for _ in range(3):
+        limiter.wait()
+    assert sleeps == [2.0, 2.0]
+
+
+def test_save_table_sends_only_changed_cells(store):
+    df = pd.DataFrame({"muestra_id": ["s1", "s2"], "cu": [1.0, 2.0]})
+    store.save_table(df, "features")
+    sheet = store.spreadsheet.sheets["features"]
+    assert sheet.cells == [["muestra_id", "cu"], ["s1", 1.0], ["s2", 2.0]]
+
+    sheet.calls.clear()
+    store.save_table(df.assign(cu=[1.0, 3.0]), "features")
+    assert sheet.calls == [("batch_update", 1)]
+    assert sheet.cells[2] == ["s2", 3.0]
+
+
+def test_save_table_resizes_when_grid_shrinks(store):
+    store.save_table(pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]}), "t")
+    sheet = store.spreadsheet.sheets["t"]
+    sheet.calls.clear()
+    store.save_table(pd.DataFrame({"a": [1]}), "t")
+    assert ("resize", 2, 1) in sheet.calls
+    assert sheet.cells == [["a"], [1]]
+    assert store.snapshots.load("lab", "t") == [["a"], [1]]
+
+
+def test_reads_are_retried(store):
+    store.save_table(pd.DataFrame({"a": [1, 2]}), "t")
+    store.spreadsheet.failures = [429, 503]
+    assert store.list_tables() == ["t"]
+    store.spreadsheet.failures = [500]
+    assert store.scan("t", filters=[("a", ">", 1)]).to_pylist() == [{"a": 2}]
@@ -0,0 +1,263 @@
+"""
+Declarative operating-window constraints compiled to NumPy predicates.
+
+A constraint spec is a JSON (or YAML) document listing bounds per column::
+
+    {
+      "version": "1",
+      "constraints": [
+        {"name": "ph_window", "column": "pH", "min": 1.4, "max": 2.0},
+        {"name": "acid_vs_time", "column": "acid_concentration",
+         "max": {"column": "extraction_time", "scale": 2.0}},
+        {"name": "acid_at_low_T", "column": "acid_concentration", "max": 5,
+         "when": {"column": "temperature", "lt": 70}}
+      ]
+    }
+
+Bounds use the operators ``min``/``ge``, ``gt``, ``max``/``le`` and ``lt``.
+A bound is either a number or a reference to another column,
+``{"column": name, "scale": 1.0, "offset": 0.0}``. An optional ``when``
+clause restricts the constraint to rows matching that condition.
+
+Compiled constraints are evaluated over whole columns at once, so the same
+spec validates a single recipe, a batch of optimiser candidates or a
+DataFrame of samples, and reports a violation mask per constraint.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import warnings
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+OPERATING_WINDOW_PATH = Path(__file__).with_name("operating_window.json")
+
+_OPERATORS = {
+    "min": np.greater_equal,
+    "ge": np.greater_equal,
+    "gt": np.greater,
+    "max": np.less_equal,
+    "le": np.less_equal,
+    "lt": np.less,
+}
+
+Columns = Mapping[str, np.ndarray]
+ConstraintData = Union[pd.DataFrame, Mapping[str, Any], Sequence[Mapping[str, Any]], np.ndarray]
+
+
+@dataclass(frozen=True)
+class _Bound:
+    op: str
+    value: float = 0.0
+    column: Optional[str] = None
+    scale: float = 1.0
+
+    @classmethod
+    def parse(cls, op: str, spec: Any) -> "_Bound":
+        if isinstance(spec, Mapping):
+            return cls(
+                op=op,
+                value=float(spec.get("offset", 0.0)),
+                column=spec["column"],
+                scale=float(spec.get("scale", 1.0)),
+            )
+        return cls(op=op, value=float(spec))
+
+    def holds(self, x: np.ndarray, cols: Columns) -> np.ndarray:
+        rhs = self.value
+        if self.column is not None:
+            rhs = self.scale * cols[self.column] + self.value
+        return _OPERATORS[self.op](x, rhs)
+
+
+@dataclass(frozen=True)
+class _Condition:
+    column: str
+    bounds: tuple
+
+    @classmethod
+    def parse(cls, spec: Mapping[str, Any]) -> "_Condition":
+        bounds = tuple(_Bound.parse(op, spec[op]) for op in _OPERATORS if op in spec)
+        if not bounds:
+            raise ValueError(f"Constraint on '{spec['column']}' defines no bounds")
+        return cls(column=spec["column"], bounds=bounds)
+
+    @property
+    def columns(self) -> set:
+        refs = {b.column for b in self.bounds if b.column is not None}
+        return {self.column} | refs
+
+    def holds(self, cols: Columns) -> np.ndarray:
+        x = cols[self.column]
+        ok = np.ones(len(x), dtype=bool)
+        for bound in self.bounds:
+            ok &= bound.holds(x, cols)
+        return ok
+
+
+@dataclass(frozen=True)
+class Constraint:
+    """A single compiled constraint."""
+
+    name: str
+    condition: _Condition
+    when: Optional[_Condition] = None
+
+    @property
+    def columns(self) -> set:
+        cols = set(self.condition.columns)
+        if self.when is not None:
+            cols |= self.when.columns
+        return cols
+
+    def violated(self, cols: Columns) -> np.ndarray:
+        """Return ``True`` for every row breaking the constraint.
+
+        Missing values (NaN) never satisfy a bound and are reported as
+        violations unless the ``when`` clause excludes the row.
+        """
+        bad = ~self.condition.holds(cols)
+        if self.when is not None:
+            bad &= self.when.holds(cols)
+        return bad
+
+
+class ConstraintSet:
+    """Collection of compiled constraints evaluated column-wise."""
+
+    def __init__(self, constraints: Iterable[Constraint], spec: Optional[Dict[str, Any]] = None) -> None:
+        self.constraints: List[Constraint] = list(constraints)
+        self.spec = spec or {}
+
+    @classmethod
+    def from_dict(cls, spec: Mapping[str, Any]) -> "ConstraintSet":
+        """Compile a constraint spec as described in the module docstring."""
+        compiled = []
+        for i, item in enumerate(spec.get("constraints", [])):
+            when = item.get("when")
+            compiled.append(
+                Constraint(
+                    name=item.get("name", f"{item['column']}_{i}"),
+                    condition=_Condition.parse(item),
+                    when=_Condition.parse(when) if when else None,
+                )
+            )
+        return cls(compiled, dict(spec))
+
+    @property
+    def names(self) -> List[str]:
+        return [c.name for c in self.constraints]
+
+    @property
+    def columns(self) -> set:
+        cols: set = set()
+        for c in self.constraints:
+            cols |= c.columns
+        return cols
+
+    def restrict(self, columns: Iterable[str], strict: bool = True) -> "ConstraintSet":
+        """Constraints whose columns are all among ``columns``.
+
+        Raises ``KeyError`` naming the constrained columns missing from
+        ``columns``; with ``strict=False`` the affected constraints are
+        dropped with a warning instead.
+        """
+        available = set(columns)
+        missing = sorted(self.columns - available)
+        if missing:
+            if strict:
+                raise KeyError(f"Missing required columns: {missing}")
+            warnings.warn(
+                f"Constraints on missing columns {missing} are not checked", stacklevel=2
+            )
+        return ConstraintSet(
+            [c for c in self.constraints if c.columns <= available], self.spec
+        )
+
+    def fingerprint(self) -> str:
+        """Short hash of the spec, suitable as a cache or study key component."""
+        payload = json.dumps(self.spec, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+    def violations(
+        self, data: ConstraintData, names: Optional[Sequence[str]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Return a boolean violation mask per constraint.
+
+        ``data`` may be a DataFrame, a mapping of column to scalar or array,
+        a list of records or a 2-D array whose columns are given by
+        ``names``.
+
+        Raises
+        ------
+        KeyError
+            If a column used by a constraint is missing from ``data``.
+        """
+        cols = _to_columns(data, names)
+        missing = sorted(self.columns - set(cols))
+        if missing:
+            raise KeyError(f"Missing required columns: {missing}")
+        return {c.name: c.violated(cols) for c in self.constraints}
+
+    def feasible(
+        self, data: ConstraintData, names: Optional[Sequence[str]] = None
+    ) -> np.ndarray:
+        """Return ``True`` for every row satisfying all constraints."""
+        cols = _to_columns(data, names)
+        n = len(next(iter(cols.values()))) if cols else 0
+        ok = np.ones(n, dtype=bool)
+        for mask in self.violations(cols).values():
+            ok &= ~mask
+        return ok
+
+
+def _to_columns(data: ConstraintData, names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    if isinstance(data, pd.DataFrame):
+        return {c: data[c].to_numpy(dtype=float, na_value=np.nan) for c in data.columns
+                if pd.api.types.is_numeric_dtype(data[c])}
+    if isinstance(data, np.ndarray):
+        if names is None:
+            raise ValueError("names are required when data is an array")
+        arr = np.atleast_2d(np.asarray(data, dtype=float))
+        return {n: arr[:, i] for i, n in enumerate(names)}
+    if isinstance(data, Mapping):
+        return {k: np.atleast_1d(np.asarray(v, dtype=float)) for k, v in data.items()}
+    records = list(data)
+    keys = set().union(*(r.keys() for r in records)) if records else set()
+    return {
+        k: np.array([r.get(k, np.nan) for r in records], dtype=float) for k in keys
+    }
+
+
+def load_constraints(path: Union[str, Path]) -> ConstraintSet:
+    """Load and compile a constraint spec from a JSON or YAML file."""
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix in {".yaml", ".yml"}:
+        try:  # pragma: no cover - optional dependency
+            import yaml
+        except Exception as exc:  # pragma: no cover - PyYAML not installed
+            raise ImportError("PyYAML is required to load YAML constraint specs") from exc
+        spec = yaml.safe_load(text)
+    else:
+        spec = json.loads(text)
+    return ConstraintSet.from_dict(spec)
+
+
+def load_operating_window() -> ConstraintSet:
+    """Return the hard operating window listed in the project README."""
+    return load_constraints(OPERATING_WINDOW_PATH)
+
+
+__all__ = [
+    "Constraint",
+    "ConstraintSet",
+    "load_constraints",
+    "load_operating_window",
+]
@@ -5,6 +5,8 @@ from typing import Callable, Dict
 
 import pandas as pd
 
+from validation.constraints import ConstraintSet
+
 
 class ConstraintViolation(Exception):
     """Raised when a runtime constraint is violated."""
@@ -37,3 +39,26 @@ def validate_runtime(
             raise ConstraintViolation(
                 f"Constraint failed for column '{column}' at rows {invalid}"
             )
+
+
+def validate_constraints(df: pd.DataFrame, constraints: ConstraintSet) -> None:
+    """Validate a dataframe against a declarative :class:`ConstraintSet`.
+
+    All constraints are evaluated over whole columns and every failing
+    constraint is reported together with its offending rows.
+
+    Raises
+    ------
+    ConstraintViolation
+        If a required column is missing or any constraint is not satisfied.
+    """
+    try:
+        violations = constraints.violations(df)
+    except KeyError as exc:
+        raise ConstraintViolation(str(exc.args[0])) from exc
+    failed = {
+        name: df.index[mask].tolist() for name, mask in violations.items() if mask.any()
+    }
+    if failed:
+        details = "; ".join(f"'{name}' at rows {rows}" for name, rows in failed.items())
+        raise ConstraintViolation(f"Constraints failed: {details}")